@@ -0,0 +1,31 @@
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'jobs',
+        sa.Column('id', sa.String(), primary_key=True),
+        sa.Column('kind', sa.String(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('payload', sa.String()),
+        sa.Column('result', sa.String()),
+        sa.Column('error', sa.String()),
+        sa.Column('progress', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('timeout', sa.Float()),
+        sa.Column('cancel_requested', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('created_at', sa.Float(), nullable=False),
+        sa.Column('started_at', sa.Float()),
+        sa.Column('finished_at', sa.Float()),
+    )
+    op.create_index('ix_jobs_status_created', 'jobs', ['status', 'created_at'])
+
+
+def downgrade():
+    op.drop_index('ix_jobs_status_created', 'jobs')
+    op.drop_table('jobs')
@@ -0,0 +1,55 @@
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+# external-content FTS5 index over history; triggers keep it in sync
+FTS_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS history_fts USING fts5(
+        test, result, content='history', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS history_fts_ai AFTER INSERT ON history BEGIN
+        INSERT INTO history_fts(rowid, test, result) VALUES (new.id, new.test, new.result);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS history_fts_ad AFTER DELETE ON history BEGIN
+        INSERT INTO history_fts(history_fts, rowid, test, result)
+        VALUES ('delete', old.id, old.test, old.result);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS history_fts_au AFTER UPDATE ON history BEGIN
+        INSERT INTO history_fts(history_fts, rowid, test, result)
+        VALUES ('delete', old.id, old.test, old.result);
+        INSERT INTO history_fts(rowid, test, result) VALUES (new.id, new.test, new.result);
+    END
+    """,
+    "INSERT INTO history_fts(history_fts) VALUES ('rebuild')",
+]
+
+
+def upgrade():
+    op.create_index('ix_history_timestamp', 'history', ['timestamp'])
+    op.create_index('ix_history_test', 'history', ['test'])
+    try:
+        for stmt in FTS_DDL:
+            op.execute(stmt)
+    except sa.exc.OperationalError:
+        # SQLite built without FTS5: history search falls back to LIKE
+        pass
+
+
+def downgrade():
+    for trigger in ('history_fts_ai', 'history_fts_ad', 'history_fts_au'):
+        op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+    op.execute('DROP TABLE IF EXISTS history_fts')
+    op.drop_index('ix_history_test', 'history')
+    op.drop_index('ix_history_timestamp', 'history')
@@ -0,0 +1,41 @@
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+HISTORY_COLUMNS = [
+    ('p_value', sa.Float()),
+    ('effect', sa.Float()),
+    ('ci_low', sa.Float()),
+    ('ci_high', sa.Float()),
+    ('winner', sa.Text()),
+    ('payload', sa.LargeBinary()),
+]
+
+# fill the structured columns from JSON results written before this revision
+BACKFILL = """
+UPDATE history SET
+    p_value = coalesce(json_extract(result, '$.p_value'), json_extract(result, '$.p_value_ab')),
+    effect = coalesce(json_extract(result, '$.effect'), json_extract(result, '$.effect_ab'),
+                      json_extract(result, '$.uplift'), json_extract(result, '$.uplift_ab')),
+    ci_low = coalesce(json_extract(result, '$.ci[0]'), json_extract(result, '$.ci_ab[0]')),
+    ci_high = coalesce(json_extract(result, '$.ci[1]'), json_extract(result, '$.ci_ab[1]')),
+    winner = json_extract(result, '$.winner')
+WHERE json_valid(result) AND json_type(result) = 'object'
+"""
+
+
+def upgrade():
+    for name, type_ in HISTORY_COLUMNS:
+        op.add_column('history', sa.Column(name, type_, nullable=True))
+    op.add_column('session_states', sa.Column('data', sa.LargeBinary(), nullable=True))
+    op.execute(BACKFILL)
+
+
+def downgrade():
+    op.drop_column('session_states', 'data')
+    for name, _ in reversed(HISTORY_COLUMNS):
+        op.drop_column('history', name)
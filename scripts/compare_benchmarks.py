@@ -0,0 +1,82 @@
+"""Compare a pytest-benchmark JSON report against the committed baseline.
+
+Usage::
+
+    python scripts/compare_benchmarks.py bench.json [--baseline PATH]
+        [--threshold 20] [--stat median] [--update]
+
+Exits with status 1 when any benchmark present in both files is slower than
+the baseline by more than ``--threshold`` percent. ``--update`` rewrites the
+baseline from the report instead of comparing.
+"""
+import argparse
+import json
+import platform
+import sys
+from pathlib import Path
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent.parent / "tests" / "benchmarks" / "baseline.json"
+
+
+def load_report(path: Path, stat: str) -> dict:
+    data = json.loads(path.read_text())
+    return {b["name"]: float(b["stats"][stat]) for b in data["benchmarks"]}
+
+
+def write_baseline(path: Path, timings: dict, stat: str) -> None:
+    body = {
+        "stat": stat,
+        "machine": {"python": platform.python_version(), "machine": platform.machine()},
+        "benchmarks": dict(sorted(timings.items())),
+    }
+    path.write_text(json.dumps(body, indent=2) + "\n")
+
+
+def compare(current: dict, baseline: dict) -> list:
+    """Return ``(name, base, now, change_pct)`` rows; ``change_pct`` is None for new benchmarks."""
+    rows = []
+    for name in sorted(current):
+        base = baseline.get(name)
+        if base is None or base <= 0:
+            rows.append((name, None, current[name], None))
+            continue
+        rows.append((name, base, current[name], (current[name] / base - 1.0) * 100.0))
+    return rows
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("report", type=Path)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--threshold", type=float, default=20.0, help="allowed slowdown in percent")
+    parser.add_argument("--stat", default="median", choices=["min", "median", "mean"])
+    parser.add_argument("--update", action="store_true", help="overwrite the baseline with the report")
+    args = parser.parse_args(argv)
+
+    current = load_report(args.report, args.stat)
+    if args.update:
+        write_baseline(args.baseline, current, args.stat)
+        print(f"Baseline updated: {len(current)} benchmarks -> {args.baseline}")
+        return 0
+
+    stored = json.loads(args.baseline.read_text())
+    if stored.get("stat", args.stat) != args.stat:
+        print(f"Baseline stores '{stored['stat']}', comparing '{args.stat}'", file=sys.stderr)
+    failed = []
+    for name, base, now, change in compare(current, stored["benchmarks"]):
+        if change is None:
+            print(f"NEW   {name}: {now * 1e3:.3f} ms")
+            continue
+        regressed = change > args.threshold
+        if regressed:
+            failed.append(name)
+        label = "FAIL " if regressed else "ok   "
+        print(f"{label} {name}: {base * 1e3:.3f} -> {now * 1e3:.3f} ms ({change:+.1f}%)")
+    if failed:
+        print(f"{len(failed)} benchmark(s) regressed by more than {args.threshold:g}%", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,19 +1,62 @@
-"""Core utilities for A/B testing framework."""
-
-from .types import MetricType, DataSchema, AnalysisConfig
-from .validation import validate_dataframe, infer_metric_type, ValidationError
-from .engine import AnalysisResult, analyze_groups
-from .cuped import estimate_theta, apply_cuped
-
-__all__ = [
-    "MetricType",
-    "DataSchema",
-    "AnalysisConfig",
-    "validate_dataframe",
-    "infer_metric_type",
-    "ValidationError",
-    "AnalysisResult",
-    "analyze_groups",
-    "estimate_theta",
-    "apply_cuped",
-]
+"""Core utilities for A/B testing framework.
+
+Public names are resolved lazily (PEP 562), so importing a light submodule
+such as :mod:`abtest_core.srm` does not pull in pandas and SciPy through the
+analysis engine.
+"""
+from __future__ import annotations
+
+import importlib
+from typing import TYPE_CHECKING, Any
+
+_EXPORTS = {
+    "MetricType": "types",
+    "DataSchema": "types",
+    "AnalysisConfig": "types",
+    "validate_dataframe": "validation",
+    "infer_metric_type": "validation",
+    "ValidationError": "validation",
+    "AnalysisResult": "engine",
+    "analyze_groups": "engine",
+    "estimate_theta": "cuped",
+    "apply_cuped": "cuped",
+    "RegressionAdjustment": "cuped",
+    "SimulationDesign": "simulation",
+    "simulate_power": "simulation",
+    "QuantileSketch": "sketch",
+    "UserAggregation": "aggregation",
+    "aggregate_events": "aggregation",
+    "aggregate_event_chunks": "aggregation",
+    "StreamingAnalyzer": "streaming",
+    "analyze_chunks": "streaming",
+    "SliceIndex": "slicing",
+    "CumulativeSeries": "timeseries",
+    "cumulative_series": "timeseries",
+}
+
+__all__ = list(_EXPORTS)
+
+if TYPE_CHECKING:
+    from .types import MetricType, DataSchema, AnalysisConfig
+    from .validation import validate_dataframe, infer_metric_type, ValidationError
+    from .engine import AnalysisResult, analyze_groups
+    from .cuped import estimate_theta, apply_cuped, RegressionAdjustment
+    from .simulation import SimulationDesign, simulate_power
+    from .sketch import QuantileSketch
+    from .aggregation import UserAggregation, aggregate_events, aggregate_event_chunks
+    from .streaming import StreamingAnalyzer, analyze_chunks
+    from .slicing import SliceIndex
+    from .timeseries import CumulativeSeries, cumulative_series
+
+
+def __getattr__(name: str) -> Any:
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(list(globals()) + __all__)
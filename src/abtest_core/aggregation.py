@@ -0,0 +1,262 @@
+"""Event-to-user aggregation keyed by ``DataSchema.user_id``.
+
+User IDs are factorized once into dense integer codes with a hash table
+(:func:`pandas.factorize`) and every per-user reduction is a single
+``np.bincount`` pass over those codes. Group membership is reduced to the
+count, sum and sum of squares of group codes per user: a user belongs to a
+single group exactly when ``n * sum(g**2) == sum(g)**2``, which detects
+multi-group users without sorting.
+
+Chunked inputs are reduced chunk by chunk into partial aggregates. When the
+partials grow beyond ``max_rows`` they are hash-partitioned by user ID and
+spilled to disk, then merged one partition at a time, so peak memory is
+bounded by the largest partition rather than the number of users.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Literal, Optional
+
+from .types import DataSchema
+from .utils import lazy_import
+from .validation import ValidationError
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from numpy.typing import NDArray
+
+logger = logging.getLogger(__name__)
+
+_UID = "_uid"
+_N = "_n"
+_GSUM = "_gsum"
+_GSQ = "_gsq"
+_GFIRST = "_gfirst"
+
+
+@dataclass
+class UserAggregation:
+    """Per-user table and diagnostics produced by :func:`aggregate_events`."""
+
+    users: "pd.DataFrame"
+    n_events: int
+    multi_group_users: "NDArray[Any]"
+
+
+def _value_cols(schema: DataSchema) -> List[str]:
+    cols = [schema.metric_col, schema.numerator_col, schema.denominator_col]
+    return [c for c in cols if c]
+
+
+def _reduce(
+    uid: Any,
+    sums: Dict[str, "NDArray[Any]"],
+    firsts: Dict[str, Any],
+) -> "pd.DataFrame":
+    """Sum ``sums`` and keep the first value of ``firsts`` per user ID."""
+    np = lazy_import("numpy")
+    pd = lazy_import("pandas")
+    codes, uniques = pd.factorize(uid)
+    n_users = len(uniques)
+    out: Dict[str, Any] = {_UID: uniques}
+    for name, arr in sums.items():
+        out[name] = np.bincount(codes, weights=np.nan_to_num(arr), minlength=n_users)
+    # factorize numbers users by first appearance, so first occurrences of
+    # the codes are already in code order
+    first_pos = np.flatnonzero(~pd.Series(codes).duplicated().to_numpy())
+    for name, arr in firsts.items():
+        out[name] = np.asarray(arr)[first_pos]
+    return pd.DataFrame(out)
+
+
+def _sum_cols(schema: DataSchema) -> List[str]:
+    return [_N, _GSUM, _GSQ] + _value_cols(schema)
+
+
+def _partial_from_events(
+    df: "pd.DataFrame", schema: DataSchema, carry: List[str], group_codes: Dict[Any, int]
+) -> "pd.DataFrame":
+    np = lazy_import("numpy")
+    pd = lazy_import("pandas")
+    missing = int(df[schema.user_id].isna().sum())
+    if missing:
+        raise ValidationError(
+            "missing_user_id_values",
+            "Пустые идентификаторы пользователей",
+            f"{missing} events have no {schema.user_id}",
+            "Удалите события без user_id или заполните их",
+        )
+    local, uniq = pd.factorize(df[schema.group_col].to_numpy())
+    if (local < 0).any():
+        raise ValueError("group column contains missing values")
+    mapping = np.array([group_codes.setdefault(u, len(group_codes)) for u in uniq], dtype=float)
+    g = mapping[local]
+    sums = {_N: np.ones(len(df)), _GSUM: g, _GSQ: g * g}
+    for col in _value_cols(schema):
+        sums[col] = df[col].to_numpy(dtype=float)
+    firsts = {_GFIRST: g}
+    firsts.update({col: df[col].to_numpy() for col in carry})
+    return _reduce(df[schema.user_id].to_numpy(), sums, firsts)
+
+
+def _merge_partials(
+    parts: List["pd.DataFrame"], schema: DataSchema, carry: List[str]
+) -> "pd.DataFrame":
+    pd = lazy_import("pandas")
+    if len(parts) == 1:
+        return parts[0]
+    frame = pd.concat(parts, ignore_index=True)
+    return _reduce(
+        frame[_UID].to_numpy(),
+        {c: frame[c].to_numpy() for c in _sum_cols(schema)},
+        {c: frame[c].to_numpy() for c in [_GFIRST] + carry},
+    )
+
+
+def _finalize(
+    partial: "pd.DataFrame",
+    schema: DataSchema,
+    carry: List[str],
+    group_labels: List[Any],
+    on_conflict: str,
+) -> UserAggregation:
+    np = lazy_import("numpy")
+    pd = lazy_import("pandas")
+    n, gsum, gsq = partial[_N].to_numpy(), partial[_GSUM].to_numpy(), partial[_GSQ].to_numpy()
+    multi = n * gsq != gsum * gsum
+    conflicting = partial.loc[multi, _UID].to_numpy()
+    if multi.any():
+        if on_conflict == "error":
+            raise ValidationError(
+                "user_in_multiple_groups",
+                "Пользователи попали в несколько групп",
+                f"{int(multi.sum())} users have events in more than one group",
+                "Проверьте сплитование или выберите on_conflict='drop'",
+            )
+        if on_conflict == "drop":
+            logger.info("Dropped %d users present in multiple groups", int(multi.sum()))
+            partial = partial.loc[~multi]
+    labels = np.asarray(group_labels, dtype=object)
+    users = pd.DataFrame(
+        {
+            schema.user_id: partial[_UID].to_numpy(),
+            schema.group_col: labels[partial[_GFIRST].to_numpy().astype(int)],
+        }
+    )
+    for col in _value_cols(schema) + carry:
+        users[col] = partial[col].to_numpy()
+    users["n_events"] = partial[_N].to_numpy().astype(np.int64)
+    return UserAggregation(users, int(n.sum()), conflicting)
+
+
+def _require_user_id(schema: DataSchema) -> None:
+    if not schema.user_id:
+        raise ValidationError(
+            "missing_user_id",
+            "Не указана колонка пользователя",
+            "DataSchema.user_id is required for event aggregation",
+            "Укажите user_id в DataSchema",
+        )
+
+
+def _carry_cols(schema: DataSchema, carry: Optional[Iterable[str]]) -> List[str]:
+    cols = list(carry or [])
+    if schema.preperiod_metric_col and schema.preperiod_metric_col not in cols:
+        cols.append(schema.preperiod_metric_col)
+    return cols
+
+
+def aggregate_events(
+    df: "pd.DataFrame",
+    schema: DataSchema,
+    carry: Optional[Iterable[str]] = None,
+    on_conflict: Literal["drop", "first", "error"] = "drop",
+) -> UserAggregation:
+    """Reduce event-level rows to one row per ``schema.user_id``.
+
+    Metric, numerator and denominator columns are summed per user (missing
+    values count as zero). ``carry`` columns, and the pre-period column,
+    keep the user's first value. Users seen in several groups are dropped,
+    kept in their first group (``"first"``) or rejected (``"error"``).
+    """
+    _require_user_id(schema)
+    cols = _carry_cols(schema, carry)
+    group_codes: Dict[Any, int] = {}
+    partial = _partial_from_events(df, schema, cols, group_codes)
+    return _finalize(partial, schema, cols, list(group_codes), on_conflict)
+
+
+def aggregate_event_chunks(
+    chunks: Iterable["pd.DataFrame"],
+    schema: DataSchema,
+    carry: Optional[Iterable[str]] = None,
+    on_conflict: Literal["drop", "first", "error"] = "drop",
+    max_rows: int = 5_000_000,
+    partitions: int = 16,
+    spill_dir: Optional[str] = None,
+) -> UserAggregation:
+    """Aggregate an iterable of event chunks with bounded memory.
+
+    Partial per-user aggregates are kept in memory until they exceed
+    ``max_rows`` rows; then they are split into ``partitions`` files by a
+    hash of the user ID under ``spill_dir`` (a temporary directory by
+    default, removed afterwards) and merged partition by partition at the
+    end.
+    """
+    pd = lazy_import("pandas")
+    _require_user_id(schema)
+    cols = _carry_cols(schema, carry)
+    group_codes: Dict[Any, int] = {}
+    pending: List["pd.DataFrame"] = []
+    pending_rows = 0
+    spilled = 0
+    tmp_dir: Optional[str] = None
+
+    def _spill() -> None:
+        nonlocal pending, pending_rows, spilled, tmp_dir
+        if tmp_dir is None:
+            tmp_dir = tempfile.mkdtemp(prefix="abtest-agg-", dir=spill_dir)
+        merged = _merge_partials(pending, schema, cols)
+        part = pd.util.hash_array(merged[_UID].to_numpy()) % partitions
+        for p in range(partitions):
+            chunk = merged.loc[part == p]
+            if len(chunk):
+                chunk.to_pickle(os.path.join(tmp_dir, f"part-{p:04d}-{spilled:06d}.pkl"))
+        spilled += 1
+        pending, pending_rows = [], 0
+
+    try:
+        for chunk in chunks:
+            partial = _partial_from_events(chunk, schema, cols, group_codes)
+            pending.append(partial)
+            pending_rows += len(partial)
+            if pending_rows > max_rows:
+                # collapse repeated users first; spill only if still too large
+                pending = [_merge_partials(pending, schema, cols)]
+                pending_rows = len(pending[0])
+                if pending_rows > max_rows:
+                    _spill()
+        if tmp_dir is None:
+            if not pending:
+                raise ValueError("no event chunks provided")
+            merged = _merge_partials(pending, schema, cols)
+        else:
+            if pending:
+                _spill()
+            files = sorted(os.listdir(tmp_dir))
+            results = []
+            for p in range(partitions):
+                prefix = f"part-{p:04d}-"
+                parts = [pd.read_pickle(os.path.join(tmp_dir, f)) for f in files if f.startswith(prefix)]
+                if parts:
+                    results.append(_merge_partials(parts, schema, cols))
+            merged = pd.concat(results, ignore_index=True)
+            logger.info("Merged %d spilled batches across %d partitions", spilled, partitions)
+    finally:
+        if tmp_dir is not None:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    return _finalize(merged, schema, cols, list(group_codes), on_conflict)
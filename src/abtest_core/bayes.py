@@ -3,41 +3,51 @@ from __future__ import annotations
 from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
 
 from .utils import lazy_import
+import functools
 import math
 
 if TYPE_CHECKING:
     import numpy as np
     from numpy.typing import NDArray
 
-try:  # pragma: no cover - fallback when scipy not available
-    from scipy.stats import beta as beta_dist
-except Exception:  # pragma: no cover - minimal beta pdf/cdf
-    def _beta_pdf_scalar(x: float, a: float, b: float) -> float:
-        coeff = math.exp(math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b))
-        return coeff * (x ** (a - 1)) * ((1.0 - x) ** (b - 1))
+def _beta_pdf_scalar(x: float, a: float, b: float) -> float:
+    coeff = math.exp(math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b))
+    return coeff * (x ** (a - 1)) * ((1.0 - x) ** (b - 1))
 
-    def _beta_cdf_scalar(x: float, a: float, b: float, n: int = 1000) -> float:
-        if x <= 0.0:
-            return 0.0
+
+def _beta_cdf_scalar(x: float, a: float, b: float, n: int = 1000) -> float:
+    if x <= 0.0:
+        return 0.0
+    np = lazy_import("numpy")
+    xs = np.linspace(0.0, x, n)
+    ys = _beta_pdf_scalar(xs, a, b)
+    return float(np.trapezoid(ys, xs))
+
+
+class _Beta:
+    """Minimal beta pdf/cdf used when SciPy is not available."""
+
+    @staticmethod
+    def pdf(x, a, b):
         np = lazy_import("numpy")
-        xs = np.linspace(0.0, x, n)
-        ys = _beta_pdf_scalar(xs, a, b)
-        return float(np.trapezoid(ys, xs))
+        x_arr = np.asarray(x)
+        return np.vectorize(lambda v: _beta_pdf_scalar(float(v), a, b))(x_arr)
 
-    class _Beta:
-        @staticmethod
-        def pdf(x, a, b):
-            np = lazy_import("numpy")
-            x_arr = np.asarray(x)
-            return np.vectorize(lambda v: _beta_pdf_scalar(float(v), a, b))(x_arr)
+    @staticmethod
+    def cdf(x, a, b):
+        np = lazy_import("numpy")
+        x_arr = np.asarray(x)
+        return np.vectorize(lambda v: _beta_cdf_scalar(float(v), a, b))(x_arr)
 
-        @staticmethod
-        def cdf(x, a, b):
-            np = lazy_import("numpy")
-            x_arr = np.asarray(x)
-            return np.vectorize(lambda v: _beta_cdf_scalar(float(v), a, b))(x_arr)
 
-    beta_dist = _Beta()
+@functools.lru_cache(maxsize=1)
+def _beta_dist() -> Any:
+    """SciPy's beta distribution, imported on first use, or the fallback."""
+    try:
+        from scipy.stats import beta
+    except Exception:  # pragma: no cover - fallback when scipy not available
+        return _Beta()
+    return beta
 
 
 # ---------------------------------------------------------------------------
@@ -91,6 +101,7 @@ def prob_win_binomial(
     np = lazy_import("numpy")
     a1, b1 = beta_post(a0, b0, x1, n1)
     a2, b2 = beta_post(a0, b0, x2, n2)
+    beta_dist = _beta_dist()
     xs = np.linspace(0.0, 1.0, grid)
     f1 = beta_dist.pdf(xs, a1, b1)
     cdf2 = beta_dist.cdf(xs, a2, b2)
@@ -0,0 +1,107 @@
+"""Streaming outlier capping (winsorization) for continuous metrics.
+
+Capping runs in two passes over the data. The first pass feeds a
+:class:`QuantileSketch` to find the cap threshold; the second either clips
+values in place or folds the capped values straight into running moments,
+so neither pass needs more than the sketch and one chunk in memory.
+"""
+from __future__ import annotations
+
+import math
+from typing import TYPE_CHECKING, Any, Dict, Optional, Sequence
+
+from .sketch import QuantileSketch
+from .utils import lazy_import
+
+if TYPE_CHECKING:
+    from numpy.typing import NDArray
+
+_BLOCK = 1 << 16
+
+
+class MetricCapper:
+    """Cap values at an upper (and optionally lower) percentile.
+
+    Args:
+        quantile: Upper quantile used as the cap, e.g. ``0.99``.
+        lower_quantile: Optional lower quantile for two-sided winsorization.
+        k: Accuracy parameter of the underlying sketch.
+        seed: Seed for the sketch compactions, for reproducible thresholds.
+    """
+
+    def __init__(
+        self,
+        quantile: float = 0.99,
+        lower_quantile: Optional[float] = None,
+        k: int = 1000,
+        seed: Optional[int] = None,
+    ) -> None:
+        if not 0 < quantile <= 1:
+            raise ValueError("quantile must be in (0, 1]")
+        if lower_quantile is not None and not 0 <= lower_quantile < quantile:
+            raise ValueError("lower_quantile must be in [0, quantile)")
+        self.quantile = quantile
+        self.lower_quantile = lower_quantile
+        self.sketch = QuantileSketch(k=k, seed=seed)
+        self._n = 0
+        self._sum = 0.0
+        self._sumsq = 0.0
+        self._n_capped = 0
+
+    def partial_fit(self, values: Sequence[float] | "NDArray[Any]") -> "MetricCapper":
+        """First pass: add a chunk to the threshold sketch."""
+        self.sketch.update(values)
+        return self
+
+    @property
+    def upper(self) -> float:
+        return float(self.sketch.quantile(self.quantile))
+
+    @property
+    def lower(self) -> float:
+        if self.lower_quantile is None:
+            return -math.inf
+        return float(self.sketch.quantile(self.lower_quantile))
+
+    def transform(
+        self, values: Sequence[float] | "NDArray[Any]", out: Optional["NDArray[Any]"] = None
+    ) -> "NDArray[Any]":
+        """Second pass: return capped values, writing into ``out`` if given.
+
+        Pass the input array itself as ``out`` to cap without allocating.
+        """
+        np = lazy_import("numpy")
+        return np.clip(np.asarray(values, dtype=float), self.lower, self.upper, out=out)
+
+    def update(self, values: Sequence[float] | "NDArray[Any]") -> "MetricCapper":
+        """Second pass: fold capped values into running moments.
+
+        The chunk is clipped block by block into a small reusable buffer, so
+        the capped copy of the chunk is never materialized.
+        """
+        np = lazy_import("numpy")
+        x = np.asarray(values, dtype=float).ravel()
+        lo, hi = self.lower, self.upper
+        buf = np.empty(min(_BLOCK, x.size))
+        for start in range(0, x.size, _BLOCK):
+            block = x[start: start + _BLOCK]
+            capped = buf[: block.size]
+            np.clip(block, lo, hi, out=capped)
+            valid = ~np.isnan(capped)
+            if not valid.all():
+                capped = capped[valid]
+                block = block[valid]
+            self._n += int(capped.size)
+            self._n_capped += int(np.count_nonzero(capped != block))
+            self._sum += float(capped.sum())
+            self._sumsq += float(np.dot(capped, capped))
+        return self
+
+    def moments(self) -> Dict[str, Any]:
+        """Mean, ddof=1 variance and counts of the capped values seen so far."""
+        n = self._n
+        if n < 2:
+            raise ValueError("at least two observations required")
+        mean = self._sum / n
+        var = max(0.0, (self._sumsq - n * mean * mean) / (n - 1))
+        return {"n": n, "mean": mean, "var": var, "n_capped": self._n_capped}
@@ -9,16 +9,156 @@ if TYPE_CHECKING:
     import numpy as np  # noqa: F401
 
 
+class RegressionAdjustment:
+    """Multi-covariate CUPED/CUPAC fitted from accumulated moments.
+
+    Chunks of the metric ``y`` and covariates ``X`` are folded into running
+    sums (n, Σx, Σy, XᵀX, Xᵀy, yᵀy), so data never has to fit in memory. The
+    sums are taken around the first chunk's means to limit cancellation.
+    Theta is solved once from the centered Gram matrix and the variance
+    reduction follows analytically from the same moments.
+    """
+
+    def __init__(self) -> None:
+        self.n = 0
+        self._shift_x: Optional["NDArray[Any]"] = None
+        self._shift_y = 0.0
+        self._sx: Any = None
+        self._sy = 0.0
+        self._xtx: Any = None
+        self._xty: Any = None
+        self._yty = 0.0
+
+    @staticmethod
+    def _as_matrix(X: Any) -> "NDArray[Any]":
+        np = lazy_import("numpy")
+        X = np.asarray(X, dtype=float)
+        return X.reshape(-1, 1) if X.ndim == 1 else X
+
+    def update(
+        self,
+        y: Sequence[float] | "NDArray[Any]",
+        X: Sequence[float] | "NDArray[Any]",
+    ) -> "RegressionAdjustment":
+        """Accumulate a chunk of metric values and covariate rows."""
+        np = lazy_import("numpy")
+        y = np.asarray(y, dtype=float).ravel()
+        X = self._as_matrix(X)
+        if X.shape[0] != y.shape[0]:
+            raise ValueError("y and X must have the same number of rows")
+        if y.size == 0:
+            return self
+        if self._shift_x is None:
+            k = X.shape[1]
+            self._shift_x = X.mean(axis=0)
+            self._shift_y = float(y.mean())
+            self._sx = np.zeros(k)
+            self._xtx = np.zeros((k, k))
+            self._xty = np.zeros(k)
+        elif X.shape[1] != self._shift_x.shape[0]:
+            raise ValueError("number of covariates changed between chunks")
+        xc = X - self._shift_x
+        yc = y - self._shift_y
+        self.n += int(y.size)
+        self._sx += xc.sum(axis=0)
+        self._sy += float(yc.sum())
+        self._xtx += xc.T @ xc
+        self._xty += xc.T @ yc
+        self._yty += float(yc @ yc)
+        return self
+
+    def merge(self, other: "RegressionAdjustment") -> "RegressionAdjustment":
+        """Fold the moments accumulated by ``other`` into this instance."""
+        if other.n == 0:
+            return self
+        if self.n == 0:
+            for key, val in other.__dict__.items():
+                setattr(self, key, val.copy() if hasattr(val, "copy") else val)
+            return self
+        np = lazy_import("numpy")
+        # re-express other's sums around this instance's shift
+        dx = other._shift_x - self._shift_x
+        dy = other._shift_y - self._shift_y
+        n = other.n
+        self._xtx += other._xtx + np.outer(other._sx, dx) + np.outer(dx, other._sx) + n * np.outer(dx, dx)
+        self._xty += other._xty + other._sx * dy + dx * other._sy + n * dx * dy
+        self._yty += other._yty + 2 * dy * other._sy + n * dy * dy
+        self._sx += other._sx + n * dx
+        self._sy += other._sy + n * dy
+        self.n += n
+        return self
+
+    def moments(self) -> Dict[str, Any]:
+        """Return means and ddof=1 covariances of the accumulated data."""
+        np = lazy_import("numpy")
+        if self.n < 2:
+            raise ValueError("at least two observations required")
+        n = self.n
+        mx = self._sx / n
+        my = self._sy / n
+        cov_xx = (self._xtx - n * np.outer(mx, mx)) / (n - 1)
+        cov_xy = (self._xty - n * mx * my) / (n - 1)
+        var_y = (self._yty - n * my * my) / (n - 1)
+        return {
+            "mean_x": mx + self._shift_x,
+            "mean_y": float(my + self._shift_y),
+            "cov_xx": cov_xx,
+            "cov_xy": cov_xy,
+            "var_y": float(var_y),
+        }
+
+    def fit(self, ridge_alpha: float = 0.0) -> Dict[str, Any]:
+        """Solve for theta and report the implied variance reduction.
+
+        ``ridge_alpha`` is added to the covariate variances for stability.
+        Covariates with zero variance receive a zero coefficient.
+        """
+        np = lazy_import("numpy")
+        m = self.moments()
+        cov_xx, cov_xy, var_y = m["cov_xx"], m["cov_xy"], m["var_y"]
+        k = cov_xy.shape[0]
+        a = cov_xx + ridge_alpha * np.eye(k)
+        theta = np.linalg.lstsq(a, cov_xy, rcond=None)[0]
+        var_adj = var_y - 2 * theta @ cov_xy + theta @ cov_xx @ theta
+        reduction = 0.0 if var_y <= 0 else (1 - var_adj / var_y) * 100.0
+        return {
+            "theta": theta,
+            "mean_x": m["mean_x"],
+            "variance_reduction_pct": float(reduction),
+            "var_adjusted": float(var_adj),
+        }
+
+    def transform(
+        self,
+        y: Sequence[float] | "NDArray[Any]",
+        X: Sequence[float] | "NDArray[Any]",
+        theta: Any,
+        mean_x: Any = None,
+    ) -> "NDArray[Any]":
+        """Adjust a chunk using covariate means from the accumulated data."""
+        np = lazy_import("numpy")
+        if mean_x is None:
+            mean_x = self.moments()["mean_x"]
+        X = self._as_matrix(X)
+        return np.asarray(y, dtype=float) - (X - mean_x) @ np.atleast_1d(theta)
+
+
 def apply_cuped(
     post: Sequence[float] | "NDArray[Any]",
     pre: Sequence[float] | "NDArray[Any]",
-    theta: float,
+    theta: Any,
 ) -> "NDArray[Any]":
-    """Return CUPED-adjusted post metrics."""
+    """Return CUPED-adjusted post metrics.
+
+    ``pre`` may be a single covariate or an ``(n, k)`` matrix with ``theta``
+    holding one coefficient per column.
+    """
     np = lazy_import("numpy")
     pre = np.asarray(pre, dtype=float)
     post = np.asarray(post, dtype=float)
-    pre_c = pre - pre.mean()
+    pre_c = pre - pre.mean(axis=0)
+    if pre.ndim == 2:
+        return post - pre_c @ np.atleast_1d(theta)
     return post - theta * pre_c
 
 
@@ -32,21 +172,11 @@ def estimate_theta(
     Theta is estimated as cov(pre, post)/var(pre). If ``ridge_alpha`` is
     provided, ``var(pre) + ridge_alpha`` is used in the denominator for
     stability. The function returns a dictionary with the estimated theta and
-    the percentage of variance reduction after applying CUPED.
+    the percentage of variance reduction after applying CUPED, derived from
+    the sample moments without materializing the adjusted metric.
     """
-    np = lazy_import("numpy")
-    pre = np.asarray(pre, dtype=float)
-    post = np.asarray(post, dtype=float)
-    cov_matrix = np.cov(pre, post, ddof=1)
-    try:
-        cov = cov_matrix[0, 1]  # type: ignore[index]
-    except Exception:
-        cov = cov_matrix[0][1]
-    var_pre = np.var(pre, ddof=1)
-    denom = var_pre + ridge_alpha
-    theta = 0.0 if denom == 0 else cov / denom
-    adjusted = apply_cuped(post, pre, theta)
-    var_post = np.var(post, ddof=1)
-    var_adj = np.var(adjusted, ddof=1)
-    reduction = 0.0 if var_post == 0 else (1 - var_adj / var_post) * 100.0
-    return {"theta": float(theta), "variance_reduction_pct": float(reduction)}
+    res = RegressionAdjustment().update(post, pre).fit(ridge_alpha)
+    return {
+        "theta": float(res["theta"][0]),
+        "variance_reduction_pct": res["variance_reduction_pct"],
+    }
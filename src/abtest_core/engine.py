@@ -7,13 +7,29 @@ import pandas as pd
 import numpy as np
 
 from .types import AnalysisConfig
-from .multiple import holm, benjamini_yekutieli
+from .multiple import adjust_pvalues
 from .stats_binomial import prop_diff_test
 from .stats_continuous import welch_ttest, yuen_trimmed_mean_test, bootstrap_bca_ci
-from .stats_ratio import ratio_test
-from .cuped import estimate_theta, apply_cuped
+from .stats_ratio import RatioAggregates, ratio_delta_test, ratio_test
+from .stats_quantile import quantile_test
+from .sketch import QuantileSketch
+from .capping import MetricCapper
+from .cuped import RegressionAdjustment
 from .sequential import make_plan, sequential_test
 from .bayes import prob_win_binomial, prob_win_continuous
+from .profiling import current_profile, profiling, span
+
+
+# in-memory columns up to this size get exact (never compacted) sketches
+_EXACT_SKETCH_ROWS = 1_000_000
+
+
+def _sketch_params(config: AnalysisConfig, n: int) -> dict[str, int]:
+    """Sketch ``k``/``seed`` for ``n`` in-memory values: exact up to ``_EXACT_SKETCH_ROWS``, seeded beyond."""
+    k = int(getattr(config, "sketch_k", 1000))
+    if n <= _EXACT_SKETCH_ROWS:
+        k = max(k, n)
+    return {"k": k, "seed": int(getattr(config, "sketch_seed", 0))}
 
 
 @dataclass
@@ -26,9 +42,47 @@ class AnalysisResult:
     segments: Optional[list[dict]] = None
 
 
+def _ratio_segments(
+    df: "pd.DataFrame", col: str, mask1: np.ndarray, mask2: np.ndarray, config: AnalysisConfig
+) -> list[dict]:
+    """Delta-method tests of every value of ``col`` for user-level ratio metrics."""
+    codes, values = pd.factorize(df[col], sort=True)
+    # groupby drops missing segment values; factorize codes them as -1
+    known = codes >= 0
+    num = df["numerator"].to_numpy(dtype=float)
+    den = df["denominator"].to_numpy(dtype=float)
+    agg1, agg2 = (
+        RatioAggregates.from_arrays(num[m], den[m], codes[m], len(values))
+        for m in (mask1 & known, mask2 & known)
+    )
+    res = ratio_delta_test(agg1, agg2, alpha=config.alpha, sided=config.sided)
+    n = agg1.n + agg2.n
+    return [
+        {
+            "segment": {"col": col, "val": val},
+            "p_raw": float(res["p_value"][i]),
+            "effect": float(res["effect"][i]),
+            "n": int(n[i]),
+        }
+        for i, val in enumerate(values)
+    ]
+
+
 def analyze_groups(df: "pd.DataFrame", config: AnalysisConfig) -> AnalysisResult:
     if not isinstance(df, pd.DataFrame):
         df = pd.DataFrame(df)
+    if not getattr(config, "profile", False) or current_profile() is not None:
+        # nested calls (segments) record into the caller's profile
+        with span("analyze_groups", n=len(df)):
+            return _analyze_groups(df, config)
+    with profiling() as prof:
+        with span("analyze_groups", n=len(df)):
+            result = _analyze_groups(df, config)
+    result.meta = {**(result.meta or {}), "timings": prof.as_list()}
+    return result
+
+
+def _analyze_groups(df: "pd.DataFrame", config: AnalysisConfig) -> AnalysisResult:
     groups = list(pd.unique(df["group"]))
     if len(groups) != 2:
         raise ValueError("exactly two groups required")
@@ -36,100 +90,186 @@ def analyze_groups(df: "pd.DataFrame", config: AnalysisConfig) -> AnalysisResult
     mask2 = df["group"] == groups[1] if len(groups) > 1 else ~mask1
     method_notes: List[str] = []
     meta: dict[str, Any] = {}
+    cap_q = getattr(config, "cap_quantile", None)
+    if cap_q is not None:
+        with span("capping", n=len(df)):
+            if config.metric_type != "continuous" or "metric" not in df.columns:
+                method_notes.append(str("Capping skipped: continuous metrics only"))
+            else:
+                values = df["metric"].to_numpy(dtype=float, copy=True)
+                cap_on = getattr(config, "cap_on", "control")
+                basis = values[mask1.to_numpy()] if cap_on == "control" else values
+                capper = MetricCapper(cap_q, **_sketch_params(config, len(basis))).partial_fit(basis)
+                threshold = capper.upper
+                n_capped = int(np.count_nonzero(values > threshold))
+                capper.transform(values, out=values)
+                df = df.assign(metric=values)
+                meta["capping"] = {
+                    "quantile": float(cap_q),
+                    "on": cap_on,
+                    "threshold": threshold,
+                    "n_capped": n_capped,
+                }
+                method_notes.append(str(f"Capped at p{cap_q * 100:g} ({cap_on})={threshold:.4g}, n={n_capped}"))
     if config.use_cuped:
-        pre_col = config.preperiod_metric_col
-        if not pre_col or pre_col not in df.columns:
-            method_notes.append(str("CUPED skipped: pre-period column missing"))
-        else:
-            mask_complete = df[pre_col].notna() & df["metric"].notna()
-            if mask_complete.sum() < 10:
-                method_notes.append(str("CUPED skipped: insufficient pre-period data"))
+        with span("cuped", n=len(df)):
+            pre_col = config.preperiod_metric_col
+            covariates = list(getattr(config, "cuped_covariates", []) or ([pre_col] if pre_col else []))
+            if not covariates or any(c not in df.columns for c in covariates):
+                method_notes.append(str("CUPED skipped: pre-period column missing"))
+            elif "metric" not in df.columns:
+                method_notes.append(str("CUPED skipped: not available for user-level ratio"))
             else:
-                pre = df.loc[mask_complete, pre_col]
-                post = df.loc[mask_complete, "metric"]
-                corr = np.corrcoef(pre, post)[0, 1]
-                if np.isnan(corr) or abs(corr) < 0.1:
-                    method_notes.append(str("CUPED skipped: low correlation"))
+                mask_complete = df[covariates].notna().all(axis=1) & df["metric"].notna()
+                if mask_complete.sum() < 10:
+                    method_notes.append(str("CUPED skipped: insufficient pre-period data"))
                 else:
-                    stats = estimate_theta(pre, post)
-                    df.loc[mask_complete, "metric"] = apply_cuped(post, pre, stats["theta"])
-                    method_notes.append(
-                        str(
-                            f"CUPED theta={stats['theta']:.4g}, variance reduction≈{stats['variance_reduction_pct']:.1f}%"
+                    pre = df.loc[mask_complete, covariates].to_numpy(dtype=float)
+                    post = df.loc[mask_complete, "metric"].to_numpy(dtype=float)
+                    adjuster = RegressionAdjustment().update(post, pre)
+                    stats = adjuster.fit()
+                    # R² below 0.01 matches the single-covariate |corr| < 0.1 cut-off
+                    if not np.isfinite(stats["variance_reduction_pct"]) or stats["variance_reduction_pct"] < 1.0:
+                        method_notes.append(str("CUPED skipped: low correlation"))
+                    else:
+                        theta = stats["theta"]
+                        df.loc[mask_complete, "metric"] = adjuster.transform(post, pre, theta, stats["mean_x"])
+                        theta_txt = (
+                            f"{theta[0]:.4g}" if len(theta) == 1 else "[" + ", ".join(f"{t:.4g}" for t in theta) + "]"
                         )
-                    )
-    g1 = df.loc[mask1, "metric"]
-    g2 = df.loc[mask2, "metric"]
+                        method_notes.append(
+                            str(
+                                f"CUPED theta={theta_txt}, variance reduction≈{stats['variance_reduction_pct']:.1f}%"
+                            )
+                        )
+    user_level_ratio = (
+        config.metric_type == "ratio" and "numerator" in df.columns and "denominator" in df.columns
+    )
+    value_col = "numerator" if user_level_ratio and "metric" not in df.columns else "metric"
+    g1 = df.loc[mask1, value_col]
+    g2 = df.loc[mask2, value_col]
     bres = None
-    if config.metric_type == "binomial":
-        x1, n1 = g1.sum(), g1.count()
-        x2, n2 = g2.sum(), g2.count()
-        res_bin = cast(dict[str, Any], prop_diff_test(int(x1), int(n1), int(x2), int(n2), alpha=config.alpha, sided=config.sided))
-        p_value = float(res_bin["p_value"])
-        effect = float(res_bin["effect"])
-        ci_lo, ci_hi = cast(Tuple[float, float], res_bin["ci"])
-        ci = (float(ci_lo), float(ci_hi))
-        method_notes.append(str(res_bin["method"]))
-        if getattr(config, "use_bayes", False):
-            bres = prob_win_binomial(int(x1), int(n1), int(x2), int(n2), a0=1, b0=1, rope=getattr(config, "bayes_rope", None))
-    elif config.metric_type == "continuous":
-        if config.robust:
-            res_cont = cast(dict[str, Any], yuen_trimmed_mean_test(g1.to_numpy(), g2.to_numpy(), alpha=config.alpha, sided=config.sided))
-        else:
-            mean1, var1, n1 = g1.mean(), g1.var(ddof=1), g1.count()
-            mean2, var2, n2 = g2.mean(), g2.var(ddof=1), g2.count()
-            res_cont = cast(dict[str, Any], welch_ttest(mean1, var1, n1, mean2, var2, n2, sided=config.sided, alpha=config.alpha))
-        p_value = float(res_cont["p_value"])
-        effect = float(res_cont["effect"])
-        ci_lo, ci_hi = cast(Tuple[float, float], res_cont["ci"])
-        ci = (float(ci_lo), float(ci_hi))
-        method_notes.append(str(res_cont["notes"]))
-        if getattr(config, "use_bayes", False):
-            bres = prob_win_continuous(
-                g1.to_numpy(),
-                g2.to_numpy(),
-                rope=getattr(config, "bayes_rope", None),
-                draws=getattr(config, "bayes_draws", 10000),
-            )
-        if config.bootstrap:
-            ci = bootstrap_bca_ci(
-                g1.to_numpy(),
-                g2.to_numpy(),
-                lambda a, b: float(np.mean(b) - np.mean(a)),
-                alpha=config.alpha,
-            )
-            method_notes.append(str("bootstrap_bca"))
-    elif config.metric_type == "ratio":
-        mean1, var1, n1 = g1.mean(), g1.var(ddof=1), g1.count()
-        mean2, var2, n2 = g2.mean(), g2.var(ddof=1), g2.count()
-        res_ratio = cast(
-            dict[str, Any],
-            ratio_test(
-                mean1,
-                var1,
-                n1,
-                mean2,
-                var2,
-                n2,
+    with span("test", metric=str(config.metric_type), n=int(len(g1) + len(g2))):
+        if config.metric_type == "binomial":
+            x1, n1 = g1.sum(), g1.count()
+            x2, n2 = g2.sum(), g2.count()
+            res_bin = cast(dict[str, Any], prop_diff_test(int(x1), int(n1), int(x2), int(n2), alpha=config.alpha, sided=config.sided))
+            p_value = float(res_bin["p_value"])
+            effect = float(res_bin["effect"])
+            ci_lo, ci_hi = cast(Tuple[float, float], res_bin["ci"])
+            ci = (float(ci_lo), float(ci_hi))
+            method_notes.append(str(res_bin["method"]))
+            if getattr(config, "use_bayes", False):
+                with span("bayes"):
+                    bres = prob_win_binomial(int(x1), int(n1), int(x2), int(n2), a0=1, b0=1, rope=getattr(config, "bayes_rope", None))
+        elif config.metric_type == "continuous":
+            if config.robust:
+                res_cont = cast(dict[str, Any], yuen_trimmed_mean_test(g1.to_numpy(), g2.to_numpy(), alpha=config.alpha, sided=config.sided))
+            else:
+                mean1, var1, n1 = g1.mean(), g1.var(ddof=1), g1.count()
+                mean2, var2, n2 = g2.mean(), g2.var(ddof=1), g2.count()
+                res_cont = cast(dict[str, Any], welch_ttest(mean1, var1, n1, mean2, var2, n2, sided=config.sided, alpha=config.alpha))
+            p_value = float(res_cont["p_value"])
+            effect = float(res_cont["effect"])
+            ci_lo, ci_hi = cast(Tuple[float, float], res_cont["ci"])
+            ci = (float(ci_lo), float(ci_hi))
+            method_notes.append(str(res_cont["notes"]))
+            if getattr(config, "use_bayes", False):
+                with span("bayes"):
+                    bres = prob_win_continuous(
+                        g1.to_numpy(),
+                        g2.to_numpy(),
+                        rope=getattr(config, "bayes_rope", None),
+                        draws=getattr(config, "bayes_draws", 10000),
+                    )
+            if config.bootstrap:
+                with span("bootstrap", n=int(len(g1) + len(g2))):
+                    ci = bootstrap_bca_ci(
+                        g1.to_numpy(),
+                        g2.to_numpy(),
+                        lambda a, b: float(np.mean(b) - np.mean(a)),
+                        alpha=config.alpha,
+                    )
+                method_notes.append(str("bootstrap_bca"))
+        elif user_level_ratio:
+            num = df["numerator"].to_numpy(dtype=float)
+            den = df["denominator"].to_numpy(dtype=float)
+            m1 = mask1.to_numpy()
+            m2 = mask2.to_numpy()
+            res_ratio = ratio_delta_test(
+                RatioAggregates.from_arrays(num[m1], den[m1]),
+                RatioAggregates.from_arrays(num[m2], den[m2]),
                 alpha=config.alpha,
                 sided=config.sided,
-                fieller=config.use_fieller,
-            ),
-        )
-        p_value = float(res_ratio["p_value"])
-        effect = float(res_ratio["effect"])
-        ci_lo, ci_hi = cast(Tuple[float, float], res_ratio["ci"])
-        ci = (float(ci_lo), float(ci_hi))
-        method_notes.append(str(res_ratio["notes"]))
-        if getattr(config, "use_bayes", False):
-            bres = prob_win_continuous(
-                g1.to_numpy(),
-                g2.to_numpy(),
-                rope=getattr(config, "bayes_rope", None),
-                draws=getattr(config, "bayes_draws", 10000),
             )
-    else:
-        raise ValueError("unknown metric type")
+            p_value = float(res_ratio["p_value"])
+            effect = float(res_ratio["effect"])
+            ci = (float(res_ratio["ci"][0]), float(res_ratio["ci"][1]))
+            meta["ratio"] = {
+                "ratio_a": res_ratio["ratio_a"],
+                "ratio_b": res_ratio["ratio_b"],
+                "diff": res_ratio["diff"],
+                "diff_ci": res_ratio["diff_ci"],
+            }
+            method_notes.append(str(res_ratio["notes"]))
+            if getattr(config, "use_bayes", False):
+                method_notes.append(str("Bayes skipped: not available for user-level ratio"))
+        elif config.metric_type == "quantile":
+            v1, v2 = g1.to_numpy(dtype=float), g2.to_numpy(dtype=float)
+            res_q = cast(
+                dict[str, Any],
+                quantile_test(
+                    QuantileSketch(**_sketch_params(config, len(v1))).update(v1),
+                    QuantileSketch(**_sketch_params(config, len(v2))).update(v2),
+                    q=float(getattr(config, "quantile", 0.5)),
+                    alpha=config.alpha,
+                    sided=config.sided,
+                ),
+            )
+            p_value = float(res_q["p_value"])
+            effect = float(res_q["effect"])
+            ci_lo, ci_hi = cast(Tuple[float, float], res_q["ci"])
+            ci = (float(ci_lo), float(ci_hi))
+            meta["quantile"] = {
+                "q": float(getattr(config, "quantile", 0.5)),
+                "value_a": res_q["quantile_a"],
+                "value_b": res_q["quantile_b"],
+            }
+            method_notes.append(str(res_q["notes"]))
+            if getattr(config, "use_bayes", False):
+                method_notes.append(str("Bayes skipped: not available for quantile metrics"))
+        elif config.metric_type == "ratio":
+            mean1, var1, n1 = g1.mean(), g1.var(ddof=1), g1.count()
+            mean2, var2, n2 = g2.mean(), g2.var(ddof=1), g2.count()
+            res_ratio = cast(
+                dict[str, Any],
+                ratio_test(
+                    mean1,
+                    var1,
+                    n1,
+                    mean2,
+                    var2,
+                    n2,
+                    alpha=config.alpha,
+                    sided=config.sided,
+                    fieller=config.use_fieller,
+                ),
+            )
+            p_value = float(res_ratio["p_value"])
+            effect = float(res_ratio["effect"])
+            ci_lo, ci_hi = cast(Tuple[float, float], res_ratio["ci"])
+            ci = (float(ci_lo), float(ci_hi))
+            method_notes.append(str(res_ratio["notes"]))
+            if getattr(config, "use_bayes", False):
+                with span("bayes"):
+                    bres = prob_win_continuous(
+                        g1.to_numpy(),
+                        g2.to_numpy(),
+                        rope=getattr(config, "bayes_rope", None),
+                        draws=getattr(config, "bayes_draws", 10000),
+                    )
+        else:
+            raise ValueError("unknown metric type")
     if bres is not None:
         meta["bayes"] = bres
         msg = f"Bayes: P(B>A)≈{bres['p_win']:.3f}"
@@ -137,61 +277,66 @@ def analyze_groups(df: "pd.DataFrame", config: AnalysisConfig) -> AnalysisResult
             msg += f", P(diff∈ROPE)≈{bres['p_rope']:.3f}"
         method_notes.append(str(msg))
     if getattr(config, "use_sequential", False):
-        k = max(1, int(getattr(config, "sequential_looks", 5)))
-        preset = (getattr(config, "sequential_preset", "pocock") or "pocock")
-        plan = make_plan(k, float(config.alpha), preset)
-        history = list(getattr(config, "sequential_history_p", []))
-        if not history or history[-1] != p_value:
-            history.append(float(p_value))
-        decision = sequential_test(history, plan)
-        meta["sequential"] = {
-            "plan": plan,
-            "history_len": len(history),
-            "decision": decision,
-        }
-        method_notes.append(
-            str(
-                f"Sequential ({preset}, k={k}): look={decision['look']}, "
-                f"{'STOP' if decision['stop'] else 'continue'}, "
-                f"p≤{plan['thresholds'][decision['look']-1]:.4g} at this look; "
-                f"spent≈{decision['spent_alpha_cum']:.4g}."
-            )
-        )
-    segments_res: list[dict] | None = None
-    if getattr(config, "segments", None):
-        segments_res = []
-        pvals: list[float] = []
-        seg_cfg = AnalysisConfig(**config.__dict__)
-        seg_cfg.segments = []
-        seg_cfg.multiple_testing = "none"
-        for col in config.segments:
-            if col not in df.columns:
-                continue
-            for val, sdf in df.groupby(col):
-                seg_res = analyze_groups(sdf, seg_cfg)
-                segments_res.append(
-                    {
-                        "segment": {"col": col, "val": val},
-                        "p_raw": float(seg_res.p_value),
-                        "effect": float(seg_res.effect),
-                        "n": int(len(sdf)),
-                    }
-                )
-                pvals.append(float(seg_res.p_value))
-        if segments_res:
-            if config.multiple_testing == "holm":
-                p_adj = holm(pvals)
-            elif config.multiple_testing == "by":
-                p_adj = benjamini_yekutieli(pvals)
-            else:
-                p_adj = pvals
-            for seg, adj in zip(segments_res, p_adj):
-                seg["p_adj"] = float(adj)
+        with span("sequential"):
+            k = max(1, int(getattr(config, "sequential_looks", 5)))
+            preset = (getattr(config, "sequential_preset", "pocock") or "pocock")
+            plan = make_plan(k, float(config.alpha), preset)
+            history = list(getattr(config, "sequential_history_p", []))
+            if not history or history[-1] != p_value:
+                history.append(float(p_value))
+            decision = sequential_test(history, plan)
+            meta["sequential"] = {
+                "plan": plan,
+                "history_len": len(history),
+                "decision": decision,
+            }
             method_notes.append(
                 str(
-                    f"Multiple testing: {config.multiple_testing.upper()} on {len(pvals)} comparisons"
+                    f"Sequential ({preset}, k={k}): look={decision['look']}, "
+                    f"{'STOP' if decision['stop'] else 'continue'}, "
+                    f"p≤{plan['thresholds'][decision['look']-1]:.4g} at this look; "
+                    f"spent≈{decision['spent_alpha_cum']:.4g}."
                 )
             )
+    segments_res: list[dict] | None = None
+    if getattr(config, "segments", None):
+        with span("segments", n=len(df)):
+            segments_res = []
+            pvals: list[float] = []
+            seg_cfg = AnalysisConfig(**config.__dict__)
+            seg_cfg.segments = []
+            seg_cfg.multiple_testing = "none"
+            # segments reuse the already capped metric and global threshold
+            seg_cfg.cap_quantile = None
+            for col in config.segments:
+                if col not in df.columns:
+                    continue
+                if user_level_ratio:
+                    # every segment of the column from one bincount pass per group
+                    ratio_segs = _ratio_segments(df, col, mask1.to_numpy(), mask2.to_numpy(), config)
+                    segments_res.extend(ratio_segs)
+                    pvals.extend(seg["p_raw"] for seg in ratio_segs)
+                    continue
+                for val, sdf in df.groupby(col):
+                    seg_res = analyze_groups(sdf, seg_cfg)
+                    segments_res.append(
+                        {
+                            "segment": {"col": col, "val": val},
+                            "p_raw": float(seg_res.p_value),
+                            "effect": float(seg_res.effect),
+                            "n": int(len(sdf)),
+                        }
+                    )
+                    pvals.append(float(seg_res.p_value))
+            if segments_res:
+                p_adj = adjust_pvalues(pvals, config.multiple_testing)
+                for seg, adj in zip(segments_res, p_adj):
+                    seg["p_adj"] = float(adj)
+                method_notes.append(
+                    str(
+                        f"Multiple testing: {config.multiple_testing.upper()} on {len(pvals)} comparisons"
+                    )
+                )
 
     return AnalysisResult(
         p_value=float(p_value),
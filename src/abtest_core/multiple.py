@@ -1,51 +1,134 @@
-"""Multiple testing correction methods."""
+"""Multiple testing correction methods.
+
+The batch corrections are vectorized with NumPy: p-values are sorted once with
+``argsort``, adjusted with cumulative min/max passes and scattered back to the
+input order. Inputs may be any array-like; for N-dimensional inputs each slice
+along ``axis`` is treated as an independent family of hypotheses.
+"""
 from __future__ import annotations
 
-def holm(pvals: list[float]) -> list[float]:
+import math
+from typing import TYPE_CHECKING, Any, Iterable, Sequence
+
+from .utils import lazy_import
+
+if TYPE_CHECKING:
+    from numpy.typing import NDArray
+
+
+def _adjust(pvals: Any, method: str, axis: int) -> "NDArray[Any]":
+    np = lazy_import("numpy")
+    p = np.asarray(pvals, dtype=float)
+    if p.ndim == 0:
+        raise ValueError("pvals must be array-like")
+    p = np.moveaxis(p, axis, -1)
+    m = p.shape[-1]
+    if m == 0:
+        return np.moveaxis(p.copy(), -1, axis)
+    order = np.argsort(p, axis=-1, kind="stable")
+    sp = np.take_along_axis(p, order, axis=-1)
+    rank = np.arange(1, m + 1, dtype=float)
+    if method == "holm":
+        adj = np.maximum.accumulate((m - rank + 1) * sp, axis=-1)
+    elif method == "hochberg":
+        adj = np.minimum.accumulate(((m - rank + 1) * sp)[..., ::-1], axis=-1)[..., ::-1]
+    elif method in ("bh", "by"):
+        scale = m / rank
+        if method == "by":
+            scale = scale * np.sum(1.0 / rank)
+        adj = np.minimum.accumulate((sp * scale)[..., ::-1], axis=-1)[..., ::-1]
+    else:
+        raise ValueError("unknown correction method")
+    np.minimum(adj, 1.0, out=adj)
+    out = np.empty_like(adj)
+    np.put_along_axis(out, order, adj, axis=-1)
+    return np.moveaxis(out, -1, axis)
+
+
+def holm(pvals: Sequence[float] | "NDArray[Any]", axis: int = -1) -> "NDArray[Any]":
     """Holm-Bonferroni step-down procedure.
 
-    Returns a list of adjusted p-values aligned with the input order.
+    Returns an array of adjusted p-values aligned with the input order.
     """
-    m = len(pvals)
-    order = sorted(range(m), key=lambda i: pvals[i])
-    sorted_p = [pvals[i] for i in order]
-    adj = [0.0] * m
-    prev = 0.0
-    for i, p in enumerate(sorted_p):
-        val = (m - i) * p
-        if val > 1.0:
-            val = 1.0
-        if val < prev:
-            val = prev
-        prev = val
-        adj[i] = val
-    # reorder to original positions
-    out = [0.0] * m
-    for idx, orig in enumerate(order):
-        out[orig] = adj[idx]
-    return out
-
-
-def benjamini_yekutieli(pvals: list[float]) -> list[float]:
+    return _adjust(pvals, "holm", axis)
+
+
+def hochberg(pvals: Sequence[float] | "NDArray[Any]", axis: int = -1) -> "NDArray[Any]":
+    """Hochberg step-up procedure (FWER under independence or PRDS)."""
+    return _adjust(pvals, "hochberg", axis)
+
+
+def benjamini_hochberg(pvals: Sequence[float] | "NDArray[Any]", axis: int = -1) -> "NDArray[Any]":
+    """Benjamini-Hochberg FDR control under independence or PRDS."""
+    return _adjust(pvals, "bh", axis)
+
+
+def benjamini_yekutieli(pvals: Sequence[float] | "NDArray[Any]", axis: int = -1) -> "NDArray[Any]":
     """Benjamini-Yekutieli FDR control under dependence."""
-    m = len(pvals)
-    if m == 0:
-        return []
-    order = sorted(range(m), key=lambda i: pvals[i])
-    sorted_p = [pvals[i] for i in order]
-    c_m = sum(1.0 / (i + 1) for i in range(m))
-    adj = [0.0] * m
-    prev = 1.0
-    for i in range(m - 1, -1, -1):
-        rank = i + 1
-        val = sorted_p[i] * m * c_m / rank
-        if val > prev:
-            val = prev
-        if val > 1.0:
-            val = 1.0
-        prev = val
-        adj[i] = val
-    out = [0.0] * m
-    for idx, orig in enumerate(order):
-        out[orig] = adj[idx]
-    return out
+    return _adjust(pvals, "by", axis)
+
+
+def adjust_pvalues(
+    pvals: Sequence[float] | "NDArray[Any]", method: str, axis: int = -1
+) -> "NDArray[Any]":
+    """Dispatch to a correction by name (``holm``, ``hochberg``, ``bh``, ``by``).
+
+    ``none`` returns the p-values unchanged as a float array.
+    """
+    if method == "none":
+        np = lazy_import("numpy")
+        return np.array(pvals, dtype=float)
+    return _adjust(pvals, method, axis)
+
+
+def _lord_gamma(j: int) -> float:
+    """Default LORD spending sequence (Javanmard & Montanari, 2018)."""
+    return 0.07720838 * math.log(max(j, 2)) / (j * math.exp(math.sqrt(math.log(j))))
+
+
+class LordFdr:
+    """Online FDR control with LORD (version 3).
+
+    P-values are tested one at a time as they arrive. The level for test
+    ``t`` is ``gamma(t - tau) * W(tau)``, where ``tau`` is the time of the
+    most recent discovery and ``W(tau)`` the alpha-wealth right after it, so
+    the state is a handful of scalars regardless of the stream length.
+    """
+
+    def __init__(self, alpha: float = 0.05, w0: float | None = None) -> None:
+        if not 0 < alpha < 1:
+            raise ValueError("alpha must be in (0, 1)")
+        w0 = alpha / 10 if w0 is None else float(w0)
+        if not 0 <= w0 <= alpha:
+            raise ValueError("w0 must be in [0, alpha]")
+        self.alpha = alpha
+        self.w0 = w0
+        self.payout = alpha - w0
+        self.t = 0
+        self.discoveries = 0
+        self.wealth = w0
+        self._tau = 0
+        self._wealth_at_tau = w0
+
+    @property
+    def next_level(self) -> float:
+        """Significance level that will be applied to the next p-value."""
+        return _lord_gamma(self.t + 1 - self._tau) * self._wealth_at_tau
+
+    def test(self, p: float) -> bool:
+        """Test one p-value and return whether it is a discovery."""
+        level = self.next_level
+        self.t += 1
+        reject = float(p) <= level
+        self.wealth -= level
+        if reject:
+            self.wealth += self.payout
+            self.discoveries += 1
+            self._tau = self.t
+            self._wealth_at_tau = self.wealth
+        return reject
+
+    def test_many(self, pvals: Iterable[float]) -> "NDArray[Any]":
+        """Test a batch of p-values in arrival order."""
+        np = lazy_import("numpy")
+        return np.fromiter((self.test(p) for p in pvals), dtype=bool)
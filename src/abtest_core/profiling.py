@@ -0,0 +1,115 @@
+"""Lightweight profiling spans for analysis stages.
+
+Stages are wrapped in :func:`span`. Nothing is measured unless a
+:func:`profiling` block is active in the current context or a listener is
+registered with :func:`add_listener`; otherwise :func:`span` returns a
+shared no-op object, so instrumented code pays one context-variable lookup.
+Nested spans are recorded with ``/``-joined paths (``segments/test``) while
+listeners receive the leaf stage name, which keeps metric labels bounded.
+"""
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+Listener = Callable[[str, float, Dict[str, Any]], None]
+
+_active: ContextVar[Optional["Profile"]] = ContextVar("abtest_profile", default=None)
+_listeners: List[Listener] = []
+
+
+class Profile:
+    """Collected span records of one :func:`profiling` block."""
+
+    def __init__(self) -> None:
+        self.records: List[Dict[str, Any]] = []
+        self._stack: List[str] = []
+
+    def as_list(self) -> List[Dict[str, Any]]:
+        """Records in completion order: ``stage``, ``seconds`` and attributes."""
+        return [dict(r) for r in self.records]
+
+    def total(self, stage: str) -> float:
+        """Summed seconds of every record whose path ends with ``stage``."""
+        return sum(r["seconds"] for r in self.records if r["stage"].rsplit("/", 1)[-1] == stage)
+
+
+class _Span:
+    __slots__ = ("name", "attrs", "profile", "start")
+
+    def __init__(self, name: str, attrs: Dict[str, Any], profile: Optional[Profile]) -> None:
+        self.name = name
+        self.attrs = attrs
+        self.profile = profile
+        self.start = 0.0
+
+    def set(self, **attrs: Any) -> None:
+        """Attach attributes known only inside the span (e.g. sizes)."""
+        self.attrs.update(attrs)
+
+    def __enter__(self) -> "_Span":
+        if self.profile is not None:
+            self.profile._stack.append(self.name)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        seconds = time.perf_counter() - self.start
+        if self.profile is not None:
+            path = "/".join(self.profile._stack)
+            self.profile._stack.pop()
+            self.profile.records.append({"stage": path, "seconds": seconds, **self.attrs})
+        for listener in _listeners:
+            listener(self.name, seconds, self.attrs)
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set(self, **attrs: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+def span(name: str, **attrs: Any) -> Any:
+    """Time a stage; use as ``with span("cuped", n=len(df)):``."""
+    profile = _active.get()
+    if profile is None and not _listeners:
+        return _NOOP
+    return _Span(name, attrs, profile)
+
+
+def current_profile() -> Optional[Profile]:
+    return _active.get()
+
+
+@contextmanager
+def profiling() -> Iterator[Profile]:
+    """Record every span opened in this context into a new :class:`Profile`."""
+    profile = Profile()
+    token = _active.set(profile)
+    try:
+        yield profile
+    finally:
+        _active.reset(token)
+
+
+def add_listener(listener: Listener) -> None:
+    """Call ``listener(stage, seconds, attrs)`` whenever a span finishes."""
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
+def remove_listener(listener: Listener) -> None:
+    if listener in _listeners:
+        _listeners.remove(listener)
@@ -0,0 +1,157 @@
+"""Equality slices over per-user rows via categorical codes and row bitmaps.
+
+Every dimension column is factorized once (:func:`pandas.factorize`) into the
+smallest integer dtype that holds its codes, and group × converted is folded
+into a single cell code ``group * 2 + converted`` whose totals come from one
+``np.bincount``. Each filter value maps to a bitmap of matching rows packed
+eight to a byte (:func:`numpy.packbits`); a filter combination is the bitwise
+AND of one bitmap per filtered dimension, and its group × converted table is
+the population count of that AND with each cell's bitmap. Slicing 10M users
+touches a few 1.25 MB bitmaps and takes milliseconds. Value bitmaps are built
+on first use and the most recent ones are kept for repeated filters.
+"""
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, Hashable, List, Mapping, Optional, Sequence, Tuple, Union
+
+from .utils import lazy_import
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from numpy.typing import NDArray
+
+
+def _popcount(bits: "NDArray[Any]") -> int:
+    np = lazy_import("numpy")
+    if hasattr(np, "bitwise_count"):
+        return int(np.bitwise_count(bits).sum(dtype=np.int64))
+    return int(np.unpackbits(bits).sum(dtype=np.int64))  # NumPy < 2.0
+
+
+def _small_codes(codes: "NDArray[Any]", n_values: int) -> "NDArray[Any]":
+    np = lazy_import("numpy")
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_values < np.iinfo(dtype).max:
+            return codes.astype(dtype, copy=False)
+    return codes
+
+
+class SliceIndex:
+    """Count users and conversions per group for any combination of equality filters.
+
+    ``data`` is a DataFrame or a list of record dicts with ``group_col`` and
+    ``converted_col`` columns; every other column can be filtered on. Filter
+    values match either the stored value or its string form, so ``"30"`` typed
+    in a text box selects a numeric trait equal to ``30``.
+    """
+
+    def __init__(
+        self,
+        data: Union["pd.DataFrame", Sequence[Mapping[str, Any]]],
+        group_col: str = "group",
+        converted_col: str = "converted",
+        cache_size: int = 256,
+    ) -> None:
+        np = lazy_import("numpy")
+        pd = lazy_import("pandas")
+        frame = data if isinstance(data, pd.DataFrame) else pd.DataFrame(list(data))
+        self.n_rows = len(frame)
+        self._codes: Dict[str, "NDArray[Any]"] = {}
+        self._lookup: Dict[str, Dict[str, List[int]]] = {}
+        self._values: Dict[str, List[Any]] = {}
+        self._bitmaps: "OrderedDict[Tuple[str, Any], NDArray[Any]]" = OrderedDict()
+        self._cache_size = cache_size
+
+        if group_col in frame.columns:
+            group_codes, groups = pd.factorize(frame[group_col], use_na_sentinel=True)
+        else:
+            group_codes, groups = np.full(self.n_rows, -1), []
+        self.groups: List[Any] = list(groups)
+        if converted_col in frame.columns:
+            converted = frame[converted_col].fillna(0).to_numpy().astype(bool)
+        else:
+            converted = np.zeros(self.n_rows, dtype=bool)
+        # rows without a group land in cell 0 of a sentinel slot past the real groups
+        group_codes = np.where(group_codes < 0, len(self.groups), group_codes)
+        cells = group_codes * 2 + converted
+        n_cells = 2 * len(self.groups) + 2
+        self._totals = np.bincount(cells, minlength=n_cells)
+        self._cell_bits = [np.packbits(cells == c) for c in range(n_cells - 2)]
+
+        for col in frame.columns:
+            if col in (group_col, converted_col):
+                continue
+            codes, uniques = pd.factorize(frame[col], use_na_sentinel=True)
+            self._codes[col] = _small_codes(codes, len(uniques))
+            self._values[col] = list(uniques)
+            lookup: Dict[str, List[int]] = {}
+            for code, value in enumerate(uniques):
+                for key in {value, str(value)} if isinstance(value, Hashable) else {str(value)}:
+                    lookup.setdefault(key, []).append(code)
+            self._lookup[col] = lookup
+
+    @property
+    def dimensions(self) -> List[str]:
+        return list(self._codes)
+
+    def values(self, column: str) -> List[Any]:
+        """Distinct non-null values of ``column`` in order of first appearance."""
+        return list(self._values.get(column, []))
+
+    def bitmap(self, column: str, value: Any) -> "NDArray[Any]":
+        """Packed bitmap of rows where ``column`` equals ``value``."""
+        np = lazy_import("numpy")
+        empty = (self.n_rows + 7) // 8
+        if not isinstance(value, Hashable):
+            return np.zeros(empty, dtype=np.uint8)
+        key = (column, value)
+        cached = self._bitmaps.get(key)
+        if cached is not None:
+            self._bitmaps.move_to_end(key)
+            return cached
+        codes = self._codes.get(column)
+        matched = self._lookup.get(column, {}).get(value, [])
+        if codes is None or not matched:
+            bits = np.zeros(empty, dtype=np.uint8)
+        elif len(matched) == 1:
+            bits = np.packbits(codes == matched[0])
+        else:
+            bits = np.packbits(np.isin(codes, matched))
+        self._bitmaps[key] = bits
+        if len(self._bitmaps) > self._cache_size:
+            self._bitmaps.popitem(last=False)
+        return bits
+
+    def mask(self, filters: Mapping[str, Any]) -> "NDArray[Any]":
+        """Boolean mask of rows matching every filter."""
+        np = lazy_import("numpy")
+        bits = self._select(filters)
+        if bits is None:
+            return np.ones(self.n_rows, dtype=bool)
+        return np.unpackbits(bits, count=self.n_rows).astype(bool)
+
+    def _select(self, filters: Mapping[str, Any]) -> Optional["NDArray[Any]"]:
+        """AND of the filter bitmaps, or ``None`` when nothing is filtered."""
+        np = lazy_import("numpy")
+        selected = None
+        for column, value in filters.items():
+            bits = self.bitmap(column, value)
+            if selected is None:
+                selected = bits.copy()
+            else:
+                np.bitwise_and(selected, bits, out=selected)
+        return selected
+
+    def counts(self, filters: Mapping[str, Any]) -> Dict[Any, Tuple[int, int]]:
+        """``{group: (users, conversions)}`` for rows matching every filter."""
+        np = lazy_import("numpy")
+        selected = self._select(filters)
+        if selected is None:
+            binned = self._totals
+        else:
+            binned = [_popcount(np.bitwise_and(selected, cell)) for cell in self._cell_bits]
+        return {
+            g: (int(binned[2 * i] + binned[2 * i + 1]), int(binned[2 * i + 1]))
+            for i, g in enumerate(self.groups)
+        }
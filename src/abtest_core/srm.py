@@ -1,10 +1,14 @@
 """SRM (sample ratio mismatch) check using chi-square test."""
 from __future__ import annotations
 
-from typing import Dict
+import math
+from typing import TYPE_CHECKING, Any, Dict, Hashable, Iterable, Mapping, Optional, Sequence
 
 from .utils import lazy_import
 
+if TYPE_CHECKING:
+    from numpy.typing import NDArray
+
 
 class SrmCheckFailed(Exception):
     """Exception raised when SRM check fails."""
@@ -26,43 +30,205 @@ class SrmCheckFailed(Exception):
         }
 
 
-def srm_check(counts: Dict[str, int], alpha: float = 0.001) -> dict:
+def chi2_sf(x: Any, df: Any) -> "NDArray[Any]":
+    """Exact chi-square survival function for integer degrees of freedom.
+
+    Uses the closed-form finite series of the regularized upper incomplete
+    gamma function, evaluated in log space so large statistics do not
+    overflow. ``x`` and ``df`` broadcast against each other; the loop runs
+    ``max(df) / 2`` vectorized iterations.
+    """
+    np = lazy_import("numpy")
+    x = np.asarray(x, dtype=float)
+    df = np.asarray(df, dtype=int)
+    x, df = np.broadcast_arrays(x, df)
+    if np.any(df < 1):
+        raise ValueError("df must be >= 1")
+    half = np.maximum(x, 0.0) / 2.0
+    odd = (df % 2) == 1
+    n_terms = (df - 1) // 2 + ~odd
+    with np.errstate(divide="ignore"):
+        log_half = np.log(half)
+    # first term: e^{-x/2} for even df, e^{-x/2} sqrt(x/2) / Γ(3/2) for odd df
+    log_t = np.where(odd, -half + 0.5 * log_half - math.lgamma(1.5), -half)
+    total = np.where(odd, np.vectorize(math.erfc, otypes=[float])(np.sqrt(half)), 0.0)
+    for i in range(int(n_terms.max(initial=0))):
+        active = i < n_terms
+        total = total + np.where(active, np.exp(log_t), 0.0)
+        step = np.where(odd, i + 1.5, i + 1.0)
+        log_t = log_t + log_half - np.log(step)
+    return np.where(half > 0, np.clip(total, 0.0, 1.0), 1.0)
+
+
+def srm_check_batch(
+    counts: Any,
+    weights: Any = None,
+    alpha: float = 0.001,
+) -> Dict[str, "NDArray[Any]"]:
+    """Vectorized chi-square SRM check for many experiments at once.
+
+    Args:
+        counts: Matrix of observed user counts with one row per experiment and
+            one column per group.
+        weights: Expected allocation weights, either one row shared by every
+            experiment or a matrix matching ``counts``. Weights are normalized
+            per row and default to an equal split. Groups with zero weight are
+            excluded from the statistic and the degrees of freedom, which lets
+            experiments with fewer arms share a padded matrix.
+        alpha: Significance level for the chi-square test.
+
+    Returns:
+        Dictionary of arrays: ``chi2``, ``df``, ``p_value``, ``passed``,
+        ``expected`` and ``observed``.
+    """
+    np = lazy_import("numpy")
+    observed = np.atleast_2d(np.asarray(counts, dtype=float))
+    if observed.shape[1] < 2:
+        raise ValueError("at least two groups required")
+    if weights is None:
+        w = np.ones_like(observed)
+    else:
+        w = np.broadcast_to(np.asarray(weights, dtype=float), observed.shape)
+    if np.any(w < 0):
+        raise ValueError("weights must be non-negative")
+    active = w > 0
+    df = active.sum(axis=1) - 1
+    if np.any(df < 1):
+        raise ValueError("at least two groups with positive weight required")
+    totals = observed.sum(axis=1, keepdims=True)
+    expected = totals * w / w.sum(axis=1, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        terms = np.where(active & (expected > 0), (observed - expected) ** 2 / expected, 0.0)
+    stat = terms.sum(axis=1)
+    p_value = chi2_sf(stat, df)
+    return {
+        "chi2": stat,
+        "df": df,
+        "p_value": p_value,
+        "passed": p_value >= alpha,
+        "expected": expected,
+        "observed": observed.astype(np.int64),
+    }
+
+
+def srm_check(
+    counts: Dict[str, int],
+    alpha: float = 0.001,
+    weights: Optional[Mapping[str, float]] = None,
+) -> dict:
     """Perform chi-square SRM check for arbitrary groups.
 
     Args:
         counts: Mapping of group name to observed user count.
         alpha: Significance level for the chi-square test.
+        weights: Optional mapping of group name to expected allocation weight.
+            Defaults to an equal split.
 
     Returns:
         Dictionary with p-value, pass flag, expected and observed counts.
     """
     if not counts:
         raise ValueError("counts must not be empty")
-    total = sum(counts.values())
-    k = len(counts)
-    if k <= 1:
+    if len(counts) <= 1:
         raise ValueError("at least two groups required")
-
-    expected_count = total / k
-    expected = {g: expected_count for g in counts}
-    observed = {g: int(v) for g, v in counts.items()}
-    chi_sq = sum((observed[g] - expected[g]) ** 2 / expected[g] for g in counts)
-    try:
-        chi2 = lazy_import("scipy.stats").chi2
-    except Exception:  # pragma: no cover - scipy missing
-        import math as _math
-
-        class _Chi2:
-            @staticmethod
-            def cdf(x: float, df: int) -> float:
-                return 1 - _math.exp(-x / 2)
-
-        chi2 = _Chi2()
-    p_value = 1 - chi2.cdf(chi_sq, df=k - 1)
-    passed = p_value >= alpha
+    names = list(counts)
+    w = None if weights is None else [float(weights[g]) for g in names]
+    res = srm_check_batch([[counts[g] for g in names]], w, alpha=alpha)
     return {
-        "p_value": float(p_value),
-        "passed": bool(passed),
-        "expected": expected,
-        "observed": observed,
+        "p_value": float(res["p_value"][0]),
+        "passed": bool(res["passed"][0]),
+        "expected": {g: float(v) for g, v in zip(names, res["expected"][0])},
+        "observed": {g: int(counts[g]) for g in names},
     }
+
+
+class SrmMonitor:
+    """Streaming SRM state for many experiments.
+
+    Keeps one row of assignment counters per experiment and evaluates all of
+    them with a single :func:`srm_check_batch` call.
+    """
+
+    def __init__(
+        self,
+        groups: Sequence[str],
+        weights: Optional[Sequence[float]] = None,
+        alpha: float = 0.001,
+        capacity: int = 64,
+    ) -> None:
+        np = lazy_import("numpy")
+        if len(groups) < 2:
+            raise ValueError("at least two groups required")
+        self.groups = list(groups)
+        self.alpha = alpha
+        self._group_index = {g: i for i, g in enumerate(self.groups)}
+        self._default_weights = (
+            np.ones(len(self.groups)) if weights is None else np.asarray(weights, dtype=float)
+        )
+        self._rows: Dict[Hashable, int] = {}
+        self._counts = np.zeros((max(1, capacity), len(self.groups)), dtype=np.int64)
+        self._weights = np.tile(self._default_weights, (max(1, capacity), 1))
+
+    @property
+    def experiments(self) -> list:
+        return list(self._rows)
+
+    def _row(self, experiment: Hashable) -> int:
+        row = self._rows.get(experiment)
+        if row is None:
+            row = len(self._rows)
+            if row >= len(self._counts):
+                np = lazy_import("numpy")
+                grow = len(self._counts)
+                self._counts = np.vstack([self._counts, np.zeros_like(self._counts)])
+                self._weights = np.vstack([self._weights, np.tile(self._default_weights, (grow, 1))])
+            self._rows[experiment] = row
+        return row
+
+    def set_weights(self, experiment: Hashable, weights: Mapping[str, float]) -> None:
+        """Override expected allocation weights for ``experiment``."""
+        row = self._row(experiment)
+        self._weights[row] = [float(weights.get(g, 0.0)) for g in self.groups]
+
+    def record(self, experiment: Hashable, group: str, n: int = 1) -> None:
+        """Count ``n`` new assignments of ``experiment`` to ``group``."""
+        self._counts[self._row(experiment), self._group_index[group]] += int(n)
+
+    def record_batch(self, experiments: Iterable[Hashable], groups: Iterable[str]) -> None:
+        """Count a batch of assignment events given as parallel sequences."""
+        np = lazy_import("numpy")
+        exp_arr = np.asarray(list(experiments), dtype=object)
+        grp_arr = np.asarray(list(groups), dtype=object)
+        if exp_arr.shape != grp_arr.shape:
+            raise ValueError("experiments and groups must have the same length")
+        if exp_arr.size == 0:
+            return
+        uniq_exp, exp_codes = np.unique(exp_arr, return_inverse=True)
+        uniq_grp, grp_codes = np.unique(grp_arr, return_inverse=True)
+        rows = np.array([self._row(e) for e in uniq_exp])[exp_codes]
+        cols = np.array([self._group_index[g] for g in uniq_grp])[grp_codes]
+        np.add.at(self._counts, (rows, cols), 1)
+
+    def counts(self, experiment: Hashable) -> Dict[str, int]:
+        row = self._rows[experiment]
+        return {g: int(v) for g, v in zip(self.groups, self._counts[row])}
+
+    def check(self) -> Dict[Hashable, dict]:
+        """Return SRM results for every tracked experiment."""
+        n = len(self._rows)
+        if n == 0:
+            return {}
+        res = srm_check_batch(self._counts[:n], self._weights[:n], alpha=self.alpha)
+        out: Dict[Hashable, dict] = {}
+        for exp, row in self._rows.items():
+            out[exp] = {
+                "p_value": float(res["p_value"][row]),
+                "passed": bool(res["passed"][row]),
+                "expected": {g: float(v) for g, v in zip(self.groups, res["expected"][row])},
+                "observed": {g: int(v) for g, v in zip(self.groups, res["observed"][row])},
+            }
+        return out
+
+    def failed(self) -> list:
+        """Return experiments whose current counts fail the SRM check."""
+        return [exp for exp, res in self.check().items() if not res["passed"]]
@@ -1,10 +1,11 @@
 from __future__ import annotations
 
 import math
-from typing import TYPE_CHECKING, Any, Callable, Dict, Tuple
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Tuple
 
 from statistics import NormalDist
-from .utils import lazy_import
+from .sketch import QuantileSketch
+from .utils import ProgressCallback, check_cancelled, lazy_import
 
 if TYPE_CHECKING:
     from numpy.typing import NDArray
@@ -45,38 +46,71 @@ def welch_ttest(
     }
 
 
-def yuen_trimmed_mean_test(
-    a: "NDArray[Any]",
-    b: "NDArray[Any]",
-    trim: float = 0.2,
-    alpha: float = 0.05,
-    sided: str = "two",
-) -> Dict[str, object]:
+def _trimmed_moments(
+    x: "NDArray[Any]", trim: float, overwrite_input: bool = False
+) -> Tuple[float, float, int, int]:
+    """Trimmed mean and winsorized variance via selection.
+
+    ``np.partition`` places the two cut-off order statistics in O(n); the
+    untrimmed middle block is then a contiguous slice whose sums are taken
+    in place, and the winsorized tails are added back as ``g`` copies of
+    each cut-off without materializing them.
+    """
     np = lazy_import("numpy")
-    a = np.asarray(a)
-    b = np.asarray(b)
-    g1 = int(trim * len(a))
-    g2 = int(trim * len(b))
-    a_sorted = np.sort(a)
-    b_sorted = np.sort(b)
-    a_trim = a_sorted[g1: len(a) - g1] if g1 > 0 else a_sorted
-    b_trim = b_sorted[g2: len(b) - g2] if g2 > 0 else b_sorted
-    m1 = a_trim.mean()
-    m2 = b_trim.mean()
+    n = int(x.shape[0])
+    g = int(trim * n)
+    if n - 2 * g < 2:
+        raise ValueError("not enough observations after trimming")
+    if overwrite_input and x.dtype.kind == "f":
+        x.partition([g, n - g - 1])
+        part = x
+    else:
+        part = np.partition(np.asarray(x, dtype=float), [g, n - g - 1])
+    mid = part[g: n - g]
+    tmean = float(mid.mean())
+    lo = float(part[g]) - tmean
+    hi = float(part[n - g - 1]) - tmean
+    # center in place: ``part`` is a scratch buffer
+    mid -= tmean
+    ss = float(np.dot(mid, mid)) + g * (lo * lo + hi * hi)
+    dev = g * (lo + hi) / n
+    wvar = (ss - n * dev * dev) / (n - 1)
+    return tmean, wvar, n, n - 2 * g
+
+
+def _sketch_trimmed_moments(sketch: QuantileSketch, trim: float) -> Tuple[float, float, int, int]:
+    """Trimmed mean and winsorized variance estimated from a quantile sketch."""
+    np = lazy_import("numpy")
+    values, weights = sketch.weighted_items()
+    n = sketch.n
+    g = int(trim * n)
+    if n - 2 * g < 2:
+        raise ValueError("not enough observations after trimming")
+    scale = n / weights.sum()
+    upper = np.cumsum(weights) * scale
+    lower = upper - weights * scale
+    inside = np.clip(np.minimum(upper, n - g) - np.maximum(lower, g), 0.0, None)
+    tmean = float(np.dot(values, inside) / inside.sum())
+    if g > 0:
+        lo_cut, hi_cut = sketch.quantile([g / n, (n - g) / n])
+    else:
+        lo_cut, hi_cut = sketch.min, sketch.max
+    w = weights * scale
+    win = np.clip(values, lo_cut, hi_cut)
+    wmean = float(np.dot(win, w) / n)
+    wvar = float(np.dot((win - wmean) ** 2, w) / (n - 1))
+    return tmean, wvar, n, n - 2 * g
+
+
+def _yuen_result(
+    m1: float, wv1: float, n1: int, h1: int,
+    m2: float, wv2: float, n2: int, h2: int,
+    alpha: float, sided: str, notes: str,
+) -> Dict[str, object]:
     effect = m2 - m1
-    a_win = a_sorted.copy()
-    b_win = b_sorted.copy()
-    if g1 > 0:
-        a_win[:g1] = a_win[g1]
-        a_win[-g1:] = a_win[-g1 - 1]
-    if g2 > 0:
-        b_win[:g2] = b_win[g2]
-        b_win[-g2:] = b_win[-g2 - 1]
-    wv1 = np.var(a_win, ddof=1)
-    wv2 = np.var(b_win, ddof=1)
-    n1 = len(a_trim)
-    n2 = len(b_trim)
-    se = math.sqrt(wv1 / (n1 * (n1 - 1)) + wv2 / (n2 * (n2 - 1)))
+    d1 = (n1 - 1) * wv1 / (h1 * (h1 - 1))
+    d2 = (n2 - 1) * wv2 / (h2 * (h2 - 1))
+    se = math.sqrt(d1 + d2)
     t_stat = effect / se if se > 0 else 0.0
     if sided == "two":
         p_value = 2 * (1 - norm.cdf(abs(t_stat)))
@@ -94,16 +128,57 @@ def yuen_trimmed_mean_test(
         "p_value": float(p_value),
         "effect": float(effect),
         "ci": (float(ci[0]), float(ci[1])),
-        "notes": "yuen",
+        "notes": notes,
     }
 
 
+def yuen_trimmed_mean_test(
+    a: "NDArray[Any]",
+    b: "NDArray[Any]",
+    trim: float = 0.2,
+    alpha: float = 0.05,
+    sided: str = "two",
+    overwrite_input: bool = False,
+) -> Dict[str, object]:
+    """Yuen's test for the difference of trimmed means.
+
+    Runs in linear time with a single working buffer per group. With
+    ``overwrite_input=True`` float arrays are used as that buffer and no
+    copy is made at all; their contents are undefined afterwards.
+    """
+    np = lazy_import("numpy")
+    m1, wv1, n1, h1 = _trimmed_moments(np.asarray(a), trim, overwrite_input)
+    m2, wv2, n2, h2 = _trimmed_moments(np.asarray(b), trim, overwrite_input)
+    return _yuen_result(m1, wv1, n1, h1, m2, wv2, n2, h2, alpha, sided, "yuen")
+
+
+def yuen_from_sketches(
+    a: QuantileSketch,
+    b: QuantileSketch,
+    trim: float = 0.2,
+    alpha: float = 0.05,
+    sided: str = "two",
+) -> Dict[str, object]:
+    """Approximate Yuen test from per-group :class:`QuantileSketch` objects.
+
+    Suitable for inputs larger than memory: build each sketch in one pass
+    over chunks (or merge sketches from several workers) and test on the
+    retained weighted items. Accuracy is governed by the sketch ``k``.
+    """
+    m1, wv1, n1, h1 = _sketch_trimmed_moments(a, trim)
+    m2, wv2, n2, h2 = _sketch_trimmed_moments(b, trim)
+    return _yuen_result(m1, wv1, n1, h1, m2, wv2, n2, h2, alpha, sided, "yuen_sketch")
+
+
 def bootstrap_bca_ci(
     a: "NDArray[Any]",
     b: "NDArray[Any]",
     fn_effect: Callable[["NDArray[Any]", "NDArray[Any]"], float],
     alpha: float = 0.05,
     iters: int = 5000,
+    *,
+    cancel: Optional[Any] = None,
+    progress: Optional[ProgressCallback] = None,
 ) -> Tuple[float, float]:
     np = lazy_import("numpy")
     a = np.asarray(a)
@@ -111,7 +186,11 @@ def bootstrap_bca_ci(
     obs = fn_effect(a, b)
     boot = []
     n1, n2 = len(a), len(b)
-    for _ in range(iters):
+    for i in range(iters):
+        if i % 100 == 0:
+            check_cancelled(cancel)
+            if progress is not None:
+                progress(i, iters)
         sa = np.random.choice(a, n1, replace=True)
         sb = np.random.choice(b, n2, replace=True)
         boot.append(fn_effect(sa, sb))
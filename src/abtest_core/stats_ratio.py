@@ -1,11 +1,15 @@
 from __future__ import annotations
 
 import math
-from typing import Dict, Tuple
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, Tuple
 
 from statistics import NormalDist
 from .utils import lazy_import
 
+if TYPE_CHECKING:
+    from numpy.typing import NDArray
+
 norm = NormalDist()
 
 
@@ -81,3 +85,122 @@ def ratio_test(
         "ci": ci,
         "notes": note,
     }
+
+
+@dataclass
+class RatioAggregates:
+    """Sufficient statistics of a user-level ratio metric Σx / Σy.
+
+    ``x`` is the per-user numerator (e.g. revenue) and ``y`` the per-user
+    denominator (e.g. sessions). Fields may be scalars or arrays, one entry
+    per segment, and aggregates from separate chunks add up with ``+``.
+    """
+
+    n: Any
+    sx: Any
+    sy: Any
+    sxx: Any
+    syy: Any
+    sxy: Any
+
+    @classmethod
+    def from_arrays(
+        cls,
+        x: "NDArray[Any]",
+        y: "NDArray[Any]",
+        codes: "NDArray[Any] | None" = None,
+        n_codes: int | None = None,
+    ) -> "RatioAggregates":
+        """Reduce per-user values, optionally per integer segment ``codes``."""
+        np = lazy_import("numpy")
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        if x.shape != y.shape:
+            raise ValueError("numerator and denominator must have the same shape")
+        if codes is None:
+            return cls(int(x.size), float(x.sum()), float(y.sum()), float(x @ x), float(y @ y), float(x @ y))
+        codes = np.asarray(codes)
+        size = int(n_codes) if n_codes is not None else int(codes.max(initial=-1)) + 1
+
+        def _sum(w: Any) -> Any:
+            return np.bincount(codes, weights=w, minlength=size)
+
+        return cls(
+            np.bincount(codes, minlength=size),
+            _sum(x), _sum(y), _sum(x * x), _sum(y * y), _sum(x * y),
+        )
+
+    def __add__(self, other: "RatioAggregates") -> "RatioAggregates":
+        return RatioAggregates(
+            self.n + other.n,
+            self.sx + other.sx,
+            self.sy + other.sy,
+            self.sxx + other.sxx,
+            self.syy + other.syy,
+            self.sxy + other.sxy,
+        )
+
+    def ratio_and_variance(self) -> Tuple[Any, Any]:
+        """Return Σx/Σy and its delta-method variance."""
+        np = lazy_import("numpy")
+        n = np.asarray(self.n, dtype=float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mx = self.sx / n
+            my = self.sy / n
+            vx = (self.sxx - n * mx * mx) / (n - 1)
+            vy = (self.syy - n * my * my) / (n - 1)
+            cxy = (self.sxy - n * mx * my) / (n - 1)
+            ratio = mx / my
+            var = (vx - 2 * ratio * cxy + ratio * ratio * vy) / (n * my * my)
+        return ratio, np.maximum(var, 0.0)
+
+
+def ratio_delta_test(
+    agg1: RatioAggregates,
+    agg2: RatioAggregates,
+    alpha: float = 0.05,
+    sided: str = "two",
+) -> Dict[str, Any]:
+    """Delta-method test for user-level ratio metrics.
+
+    The effect is the relative lift ``R2 / R1`` of the group ratios
+    ``R = Σx / Σy``, tested on the log scale like :func:`ratio_test`; the
+    absolute difference ``R2 - R1`` and its CI are reported as well. Inputs
+    holding arrays (one entry per segment) produce array outputs.
+    """
+    np = lazy_import("numpy")
+    r1, v1 = agg1.ratio_and_variance()
+    r2, v2 = agg2.ratio_and_variance()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        effect = r2 / r1
+        se_log = np.sqrt(v1 / (r1 * r1) + v2 / (r2 * r2))
+        z_stat = np.where(se_log > 0, np.log(effect) / se_log, 0.0)
+    cdf = np.vectorize(norm.cdf, otypes=[float])
+    if sided == "two":
+        p_value = 2 * (1 - cdf(np.abs(z_stat)))
+    elif sided == "left":
+        p_value = cdf(z_stat)
+    elif sided == "right":
+        p_value = 1 - cdf(z_stat)
+    else:
+        raise ValueError("sided must be 'two', 'left', or 'right'")
+    z = norm.inv_cdf(1 - alpha / 2)
+    se_ratio = effect * se_log
+    diff = r2 - r1
+    se_diff = np.sqrt(v1 + v2)
+    out = {
+        "p_value": p_value,
+        "effect": effect,
+        "ci": (effect - z * se_ratio, effect + z * se_ratio),
+        "diff": diff,
+        "diff_ci": (diff - z * se_diff, diff + z * se_diff),
+        "ratio_a": r1,
+        "ratio_b": r2,
+        "notes": "delta_user_level",
+    }
+    if np.ndim(effect) == 0:
+        for key in ("p_value", "effect", "diff", "ratio_a", "ratio_b"):
+            out[key] = float(out[key])
+        out["ci"] = (float(out["ci"][0]), float(out["ci"][1]))
+        out["diff_ci"] = (float(out["diff_ci"][0]), float(out["diff_ci"][1]))
+    return out
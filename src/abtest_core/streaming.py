@@ -0,0 +1,332 @@
+"""Chunked two-group analysis over inputs larger than memory.
+
+:class:`StreamingAnalyzer` folds chunks of raw rows into per-group
+sufficient statistics and runs the same tests as
+:func:`abtest_core.engine.analyze_groups` on them:
+
+* binomial, continuous and ratio metrics keep count, mean and sum of
+  squared deviations, merged across chunks with Chan's update;
+* CUPED keeps a :class:`RegressionAdjustment` per group; theta is fitted on
+  the merged moments and each group's adjusted mean and variance follow
+  analytically, so rows are never revisited;
+* user-level ratios sum :class:`RatioAggregates`;
+* quantile metrics merge :class:`QuantileSketch` instances.
+
+Segments keep the same state per segment value. Options that need the raw
+rows (robust, bootstrap, Bayes, capping, sequential) are rejected.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from .cuped import RegressionAdjustment
+from .engine import AnalysisResult
+from .multiple import adjust_pvalues
+from .sketch import QuantileSketch
+from .stats_binomial import prop_diff_test
+from .stats_continuous import welch_ttest
+from .stats_quantile import quantile_test
+from .stats_ratio import RatioAggregates, ratio_delta_test, ratio_test
+from .types import AnalysisConfig, DataSchema
+from .utils import lazy_import
+from .validation import ValidationError
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from numpy.typing import NDArray
+
+_UNSUPPORTED = ("robust", "bootstrap", "use_bayes", "use_sequential")
+
+
+class _Moments:
+    """Count, mean and sum of squared deviations of the non-NaN values seen."""
+
+    __slots__ = ("n", "mean", "m2")
+
+    def __init__(self) -> None:
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, values: "NDArray[Any]") -> None:
+        np = lazy_import("numpy")
+        x = values[~np.isnan(values)]
+        if x.size:
+            mean = float(x.mean())
+            self.merge(int(x.size), mean, float(((x - mean) ** 2).sum()))
+
+    def merge(self, n: int, mean: float, m2: float) -> None:
+        if n == 0:
+            return
+        total = self.n + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta * delta * self.n * n / total
+        self.n = total
+
+    @property
+    def var(self) -> float:
+        return self.m2 / (self.n - 1) if self.n > 1 else float("nan")
+
+
+class _GroupState:
+    """Running statistics of one group within one cell (overall or segment)."""
+
+    __slots__ = ("rows", "moments", "partial", "adjust", "ratio", "sketch")
+
+    def __init__(self, sketch_k: int, sketch_seed: int = 0) -> None:
+        self.rows = 0
+        self.moments = _Moments()
+        # CUPED: rows lacking a covariate, which stay unadjusted
+        self.partial = _Moments()
+        self.adjust = RegressionAdjustment()
+        self.ratio: Optional[RatioAggregates] = None
+        self.sketch = QuantileSketch(k=sketch_k, seed=sketch_seed)
+
+
+class StreamingAnalyzer:
+    """Accumulate chunks of a two-group experiment and analyze them.
+
+    Chunks use the raw column names of ``schema``; ``config`` takes the same
+    options as :func:`~abtest_core.engine.analyze_groups`, with CUPED
+    covariates falling back to ``schema.preperiod_metric_col``.
+    """
+
+    def __init__(self, schema: DataSchema, config: AnalysisConfig) -> None:
+        enabled = [name for name in _UNSUPPORTED if getattr(config, name, False)]
+        if getattr(config, "cap_quantile", None) is not None:
+            enabled.append("cap_quantile")
+        if enabled:
+            raise ValidationError(
+                "unsupported_streaming_option",
+                "Опция недоступна при потоковом анализе",
+                f"Options need all rows in memory: {', '.join(enabled)}",
+                "Отключите эти опции или проанализируйте данные через analyze_groups",
+            )
+        self.schema = schema
+        self.config = config
+        pre_col = config.preperiod_metric_col or schema.preperiod_metric_col
+        self.covariates: List[str] = list(
+            getattr(config, "cuped_covariates", []) or ([pre_col] if pre_col else [])
+        )
+        self.user_ratio = (
+            config.metric_type == "ratio"
+            and bool(schema.numerator_col and schema.denominator_col)
+            and not schema.metric_col
+        )
+        self.groups: List[Hashable] = []
+        self._cells: Dict[Any, Tuple[_GroupState, _GroupState]] = {}
+
+    @property
+    def columns(self) -> List[str]:
+        """Columns to read from the source; everything else can be skipped."""
+        s = self.schema
+        cols = [s.group_col, s.metric_col, s.numerator_col, s.denominator_col]
+        if self.config.use_cuped:
+            cols += self.covariates
+        cols += list(self.config.segments or [])
+        return list(dict.fromkeys(c for c in cols if c))
+
+    @property
+    def _cuped_active(self) -> bool:
+        return (
+            self.config.use_cuped
+            and self.config.metric_type in ("continuous", "ratio")
+            and not self.user_ratio
+            and bool(self.covariates)
+        )
+
+    def _cell(self, key: Any) -> Tuple[_GroupState, _GroupState]:
+        cell = self._cells.get(key)
+        if cell is None:
+            k = int(getattr(self.config, "sketch_k", 1000))
+            seed = int(getattr(self.config, "sketch_seed", 0))
+            cell = self._cells[key] = (_GroupState(k, seed), _GroupState(k, seed))
+        return cell
+
+    def _group_codes(self, values: "NDArray[Any]") -> "NDArray[Any]":
+        np = lazy_import("numpy")
+        pd = lazy_import("pandas")
+        codes, uniques = pd.factorize(values)
+        if (codes < 0).any():
+            raise ValueError("group column contains missing values")
+        mapping = []
+        for u in uniques:
+            if u not in self.groups:
+                self.groups.append(u)
+            mapping.append(self.groups.index(u))
+        if len(self.groups) > 2:
+            raise ValueError("exactly two groups required")
+        return np.asarray(mapping, dtype=np.int64)[codes]
+
+    def update(self, chunk: "pd.DataFrame") -> "StreamingAnalyzer":
+        """Fold a chunk of raw rows into the running statistics."""
+        codes = self._group_codes(chunk[self.schema.group_col].to_numpy())
+        self._update_cell(None, chunk, codes)
+        for col in self.config.segments or []:
+            if col not in chunk.columns:
+                continue
+            for val, idx in chunk.groupby(col, sort=False).indices.items():
+                self._update_cell((col, val), chunk.iloc[idx], codes[idx])
+        return self
+
+    def _update_cell(self, key: Any, chunk: "pd.DataFrame", codes: "NDArray[Any]") -> None:
+        np = lazy_import("numpy")
+        s = self.schema
+        cell = self._cell(key)
+        if self.user_ratio:
+            num = chunk[s.numerator_col].to_numpy(dtype=float)
+            den = chunk[s.denominator_col].to_numpy(dtype=float)
+        else:
+            values = chunk[s.metric_col].to_numpy(dtype=float)
+        cuped = self._cuped_active and all(c in chunk.columns for c in self.covariates)
+        if cuped:
+            pre = chunk[self.covariates].to_numpy(dtype=float)
+            complete = ~np.isnan(pre).any(axis=1) & ~np.isnan(values)
+        for g, state in enumerate(cell):
+            mask = codes == g
+            state.rows += int(mask.sum())
+            if self.user_ratio:
+                part = RatioAggregates.from_arrays(num[mask], den[mask])
+                state.ratio = part if state.ratio is None else state.ratio + part
+                continue
+            if self.config.metric_type == "quantile":
+                x = values[mask]
+                state.sketch.update(x[~np.isnan(x)])
+                continue
+            state.moments.update(values[mask])
+            if cuped:
+                state.adjust.update(values[mask & complete], pre[mask & complete])
+                state.partial.update(values[mask & ~complete])
+
+    def _fit_cuped(self, cell: Tuple[_GroupState, _GroupState], notes: List[str]) -> Optional[Dict[str, Any]]:
+        """Fit theta on the pooled complete rows of ``cell``, or None if skipped."""
+        np = lazy_import("numpy")
+        if sum(state.adjust.n for state in cell) < 10:
+            notes.append("CUPED skipped: insufficient pre-period data")
+            return None
+        fit = RegressionAdjustment().merge(cell[0].adjust).merge(cell[1].adjust).fit()
+        # same R² < 0.01 cut-off as analyze_groups
+        if not np.isfinite(fit["variance_reduction_pct"]) or fit["variance_reduction_pct"] < 1.0:
+            notes.append("CUPED skipped: low correlation")
+            return None
+        theta = fit["theta"]
+        theta_txt = f"{theta[0]:.4g}" if len(theta) == 1 else "[" + ", ".join(f"{t:.4g}" for t in theta) + "]"
+        notes.append(f"CUPED theta={theta_txt}, variance reduction≈{fit['variance_reduction_pct']:.1f}%")
+        return fit
+
+    @staticmethod
+    def _adjusted(state: _GroupState, fit: Dict[str, Any]) -> _Moments:
+        """Moments of ``y - theta (x - mean_x)`` plus the unadjusted incomplete rows."""
+        theta, mean_x = fit["theta"], fit["mean_x"]
+        out = _Moments()
+        if state.adjust.n < 2:
+            # too few complete rows for covariances; leave the group unadjusted
+            out.merge(state.moments.n, state.moments.mean, state.moments.m2)
+            return out
+        m = state.adjust.moments()
+        n = state.adjust.n
+        var = m["var_y"] - 2 * theta @ m["cov_xy"] + theta @ m["cov_xx"] @ theta
+        out.merge(n, float(m["mean_y"] - theta @ (m["mean_x"] - mean_x)), float(var) * (n - 1))
+        out.merge(state.partial.n, state.partial.mean, state.partial.m2)
+        return out
+
+    def _test(
+        self,
+        cell: Tuple[_GroupState, _GroupState],
+        meta: Dict[str, Any],
+        fit: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[float, float, Tuple[float, float], List[str], Optional[Dict[str, Any]]]:
+        """Test one cell; ``fit`` reuses an existing CUPED theta instead of fitting."""
+        cfg = self.config
+        a, b = cell
+        notes: List[str] = []
+        if cfg.use_cuped and not self._cuped_active:
+            if self.user_ratio:
+                notes.append("CUPED skipped: not available for user-level ratio")
+            elif not self.covariates:
+                notes.append("CUPED skipped: pre-period column missing")
+            else:
+                notes.append(f"CUPED skipped: not available for {cfg.metric_type} metrics in streaming mode")
+        if self.user_ratio:
+            res = ratio_delta_test(a.ratio, b.ratio, alpha=cfg.alpha, sided=cfg.sided)
+            meta["ratio"] = {k: res[k] for k in ("ratio_a", "ratio_b", "diff", "diff_ci")}
+            notes.append(str(res["notes"]))
+        elif cfg.metric_type == "quantile":
+            q = float(getattr(cfg, "quantile", 0.5))
+            res = quantile_test(a.sketch, b.sketch, q=q, alpha=cfg.alpha, sided=cfg.sided)
+            meta["quantile"] = {"q": q, "value_a": res["quantile_a"], "value_b": res["quantile_b"]}
+            notes.append(str(res["notes"]))
+        else:
+            if self._cuped_active and fit is None:
+                fit = self._fit_cuped(cell, notes)
+            m1, m2 = (self._adjusted(a, fit), self._adjusted(b, fit)) if fit else (a.moments, b.moments)
+            if cfg.metric_type == "binomial":
+                res = prop_diff_test(
+                    int(round(m1.mean * m1.n)), m1.n, int(round(m2.mean * m2.n)), m2.n,
+                    alpha=cfg.alpha, sided=cfg.sided,
+                )
+                notes.append(str(res["method"]))
+            elif cfg.metric_type == "continuous":
+                res = welch_ttest(m1.mean, m1.var, m1.n, m2.mean, m2.var, m2.n, sided=cfg.sided, alpha=cfg.alpha)
+                notes.append(str(res["notes"]))
+            elif cfg.metric_type == "ratio":
+                res = ratio_test(
+                    m1.mean, m1.var, m1.n, m2.mean, m2.var, m2.n,
+                    alpha=cfg.alpha, sided=cfg.sided, fieller=cfg.use_fieller,
+                )
+                notes.append(str(res["notes"]))
+            else:
+                raise ValueError("unknown metric type")
+        ci_lo, ci_hi = res["ci"]  # type: ignore[misc]
+        return float(res["p_value"]), float(res["effect"]), (float(ci_lo), float(ci_hi)), notes, fit
+
+    def result(self) -> AnalysisResult:
+        """Analyze everything accumulated so far."""
+        if len(self.groups) != 2:
+            raise ValueError("exactly two groups required")
+        overall = self._cell(None)
+        meta: Dict[str, Any] = {"rows": sum(state.rows for state in overall)}
+        p_value, effect, ci, notes, fit = self._test(overall, meta)
+        segments: Optional[List[Dict[str, Any]]] = None
+        if self.config.segments:
+            segments, pvals = [], []
+            for col in self.config.segments:
+                vals = [key[1] for key in self._cells if key is not None and key[0] == col]
+                for val in sorted(vals):
+                    cell = self._cells[(col, val)]
+                    if not all(state.rows for state in cell):
+                        continue  # segment seen in one group only
+                    # like analyze_groups, segments reuse the overall CUPED adjustment
+                    p_seg, eff_seg, _, _, _ = self._test(cell, {}, fit)
+                    segments.append(
+                        {
+                            "segment": {"col": col, "val": val},
+                            "p_raw": p_seg,
+                            "effect": eff_seg,
+                            "n": sum(state.rows for state in cell),
+                        }
+                    )
+                    pvals.append(p_seg)
+            if segments:
+                for seg, adj in zip(segments, adjust_pvalues(pvals, self.config.multiple_testing)):
+                    seg["p_adj"] = float(adj)
+                notes.append(f"Multiple testing: {self.config.multiple_testing.upper()} on {len(pvals)} comparisons")
+        return AnalysisResult(
+            p_value=p_value,
+            effect=effect,
+            ci=ci,
+            method_notes=", ".join(notes),
+            meta=meta,
+            segments=segments,
+        )
+
+
+def analyze_chunks(
+    chunks: Iterable["pd.DataFrame"], schema: DataSchema, config: AnalysisConfig
+) -> AnalysisResult:
+    """Run :class:`StreamingAnalyzer` over an iterable of DataFrame chunks."""
+    analyzer = StreamingAnalyzer(schema, config)
+    for chunk in chunks:
+        analyzer.update(chunk)
+    return analyzer.result()
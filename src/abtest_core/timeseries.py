@@ -0,0 +1,239 @@
+"""Effect, CI, p-value and sequential boundary for every day of an experiment.
+
+Input is one row per group and period (day or hour) with the number of users
+and the metric sum, plus the sum of squares for continuous metrics. Each
+group's rows are scattered onto the sorted period axis and turned into running
+totals with ``np.cumsum``, so the statistics of every prefix come out of one
+vectorized pass instead of re-running the analysis per period. The tests match
+:func:`~abtest_core.stats_binomial.prop_diff_test` (pooled z, Newcombe–Wilson
+CI) and :func:`~abtest_core.stats_continuous.welch_ttest` on the same prefix,
+and every period is a look of a :func:`~abtest_core.sequential.make_plan` plan.
+"""
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from statistics import NormalDist
+from typing import TYPE_CHECKING, Any, Dict, Hashable, Optional
+
+from .sequential import make_plan
+from .utils import lazy_import
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from numpy.typing import NDArray
+
+norm = NormalDist()
+
+
+@dataclass
+class CumulativeSeries:
+    """Running comparison of ``treatment`` against ``control``, one entry per period.
+
+    ``n_*`` and ``mean_*`` are cumulative up to and including the period;
+    ``se`` is the standard error used by the test, ``threshold`` the nominal
+    p-value threshold of that look and ``bound`` the same boundary on the
+    effect scale (``|effect| >= bound`` rejects, two-sided). Statistics are
+    NaN until both groups have at least one user (two for continuous metrics).
+    """
+
+    dates: "NDArray[Any]"
+    control: Hashable
+    treatment: Hashable
+    n_control: "NDArray[Any]"
+    n_treatment: "NDArray[Any]"
+    mean_control: "NDArray[Any]"
+    mean_treatment: "NDArray[Any]"
+    effect: "NDArray[Any]"
+    lift: "NDArray[Any]"
+    se: "NDArray[Any]"
+    ci_low: "NDArray[Any]"
+    ci_high: "NDArray[Any]"
+    p_value: "NDArray[Any]"
+    threshold: "NDArray[Any]"
+    bound: "NDArray[Any]"
+    preset: str
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    @property
+    def stopped(self) -> "NDArray[Any]":
+        """Looks whose p-value crossed the sequential threshold."""
+        np = lazy_import("numpy")
+        with np.errstate(invalid="ignore"):
+            return self.p_value <= self.threshold
+
+    @property
+    def stop_look(self) -> Optional[int]:
+        """1-based first look that crossed the boundary, as in ``sequential_test``."""
+        np = lazy_import("numpy")
+        hits = np.flatnonzero(self.stopped)
+        return int(hits[0]) + 1 if hits.size else None
+
+    def to_frame(self) -> "pd.DataFrame":
+        pd = lazy_import("pandas")
+        cols = [
+            "n_control", "n_treatment", "mean_control", "mean_treatment", "effect", "lift",
+            "se", "ci_low", "ci_high", "p_value", "threshold", "bound",
+        ]
+        frame = pd.DataFrame({c: getattr(self, c) for c in cols})
+        frame.insert(0, "date", self.dates)
+        frame["stopped"] = self.stopped
+        return frame
+
+
+def _norm_sf(z: "NDArray[Any]") -> "NDArray[Any]":
+    np = lazy_import("numpy")
+    return 0.5 * np.vectorize(math.erfc, otypes=[float])(z / math.sqrt(2.0))
+
+
+def _p_values(z: "NDArray[Any]", sided: str) -> "NDArray[Any]":
+    np = lazy_import("numpy")
+    if sided == "two":
+        return np.minimum(1.0, 2.0 * _norm_sf(np.abs(z)))
+    if sided == "left":
+        return _norm_sf(-z)
+    if sided == "right":
+        return _norm_sf(z)
+    raise ValueError("sided must be 'two', 'left', or 'right'")
+
+
+def _wilson(x: "NDArray[Any]", n: "NDArray[Any]", z: float):
+    np = lazy_import("numpy")
+    p = x / n
+    denom = 1 + z ** 2 / n
+    centre = (p + z ** 2 / (2 * n)) / denom
+    margin = z * np.sqrt(p * (1 - p) / n + z ** 2 / (4 * n ** 2)) / denom
+    return np.maximum(0.0, centre - margin), np.minimum(1.0, centre + margin)
+
+
+def _daily_totals(data: Any, group_col: str, date_col: str, cols: Dict[str, Optional[str]]):
+    np = lazy_import("numpy")
+    dates, day = np.unique(np.asarray(data[date_col]), return_inverse=True)
+    groups = np.asarray(data[group_col])
+    totals: Dict[Hashable, Dict[str, Any]] = {}
+    for g in dict.fromkeys(groups.tolist()):
+        rows = groups == g
+        totals[g] = {
+            key: np.cumsum(
+                np.bincount(
+                    day[rows],
+                    weights=np.asarray(data[col], dtype=float)[rows],
+                    minlength=len(dates),
+                )
+            )
+            for key, col in cols.items()
+            if col is not None
+        }
+    return dates, totals
+
+
+def cumulative_series(
+    data: Any,
+    control: Optional[Hashable] = None,
+    treatment: Optional[Hashable] = None,
+    *,
+    group_col: str = "group",
+    date_col: str = "date",
+    users_col: str = "users",
+    sum_col: str = "conversions",
+    sumsq_col: Optional[str] = None,
+    alpha: float = 0.05,
+    sided: str = "two",
+    preset: str = "obf",
+    looks: Optional[int] = None,
+) -> CumulativeSeries:
+    """Cumulative test statistics of ``treatment`` vs ``control`` for every period.
+
+    Args:
+        data: DataFrame (or mapping of columns) with one row per group and
+            period, e.g. the output of :func:`plots.cumulative.bucket_conversions`.
+            Several rows for the same group and period are added up.
+        control, treatment: Group labels; default to the first two groups in
+            sorted order.
+        sumsq_col: Column with per-period sums of squared values. Without it
+            ``sum_col`` counts conversions and the binary test is used; with it
+            the metric is continuous and the Welch z-test is used.
+        alpha: Overall significance level for the CI and the sequential plan.
+        sided: ``"two"``, ``"left"`` or ``"right"``.
+        preset: Alpha-spending preset passed to ``make_plan`` (``"pocock"`` or ``"obf"``).
+        looks: Planned number of looks; defaults to the number of periods seen.
+            The thresholds of the first ``len(dates)`` looks of the plan are used.
+    """
+    np = lazy_import("numpy")
+    if sided not in ("two", "left", "right"):
+        raise ValueError("sided must be 'two', 'left', or 'right'")
+    dates, totals = _daily_totals(
+        data, group_col, date_col, {"n": users_col, "s": sum_col, "ss": sumsq_col}
+    )
+    labels = sorted(totals, key=str)
+    if control is None:
+        control = labels[0] if labels else None
+    if treatment is None:
+        rest = [g for g in labels if g != control]
+        treatment = rest[0] if rest else None
+    for g in (control, treatment):
+        if g not in totals:
+            raise ValueError(f"group {g!r} not found in data")
+    a, b = totals[control], totals[treatment]
+    k = len(dates)
+    if looks is None:
+        looks = k
+    if looks < k:
+        raise ValueError(f"looks={looks} is less than the {k} periods in data")
+
+    n1, n2 = a["n"], b["n"]
+    z_ci = norm.inv_cdf(1 - alpha / 2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ready = (n1 > 0) & (n2 > 0)
+        m1, m2 = a["s"] / n1, b["s"] / n2
+        effect = m2 - m1
+        if sumsq_col is None:
+            pooled = (a["s"] + b["s"]) / (n1 + n2)
+            se = np.sqrt(pooled * (1 - pooled) * (1 / n1 + 1 / n2))
+            lo1, hi1 = _wilson(a["s"], n1, z_ci)
+            lo2, hi2 = _wilson(b["s"], n2, z_ci)
+            ci_low, ci_high = lo2 - hi1, hi2 - lo1
+        else:
+            ready &= (n1 > 1) & (n2 > 1)
+            var1 = np.maximum(a["ss"] - a["s"] * m1, 0.0) / (n1 - 1)
+            var2 = np.maximum(b["ss"] - b["s"] * m2, 0.0) / (n2 - 1)
+            se = np.sqrt(var1 / n1 + var2 / n2)
+            crit = z_ci if sided == "two" else norm.inv_cdf(1 - alpha)
+            ci_low, ci_high = effect - crit * se, effect + crit * se
+        z = np.where(se > 0, effect / np.where(se > 0, se, 1.0), 0.0)
+        lift = effect / m1
+
+    nan = np.full(k, np.nan)
+    p_value = np.where(ready, _p_values(np.where(ready, z, 0.0), sided), nan)
+
+    plan = make_plan(looks, alpha, preset) if k else {"thresholds": [], "preset": preset}
+    threshold = np.asarray(plan["thresholds"][:k], dtype=float)
+    # the threshold is two-sided per look; one-sided tests compare the same p-value
+    tail = 2.0 if sided == "two" else 1.0
+    z_bound = np.array([norm.inv_cdf(1 - min(t / tail, 0.5)) if t > 0 else math.inf for t in threshold])
+    with np.errstate(invalid="ignore"):
+        bound = np.where(ready, z_bound * se, nan)
+
+    def masked(x):
+        return np.where(ready, x, nan)
+
+    return CumulativeSeries(
+        dates=dates,
+        control=control,
+        treatment=treatment,
+        n_control=n1.astype(np.int64),
+        n_treatment=n2.astype(np.int64),
+        mean_control=np.where(n1 > 0, m1, nan),
+        mean_treatment=np.where(n2 > 0, m2, nan),
+        effect=masked(effect),
+        lift=masked(lift),
+        se=masked(se),
+        ci_low=masked(ci_low),
+        ci_high=masked(ci_high),
+        p_value=p_value,
+        threshold=threshold,
+        bound=bound,
+        preset=plan["preset"],
+    )
@@ -14,7 +14,7 @@ except Exception:  # pragma: no cover - minimal stub
         def dict(self) -> dict:
             return self.__dict__.copy()
 
-MetricType = Literal["binomial", "continuous", "ratio"]
+MetricType = Literal["binomial", "continuous", "ratio", "quantile"]
 
 
 class DataSchema(BaseModel):
@@ -22,8 +22,11 @@ class DataSchema(BaseModel):
 
     user_id: Optional[str] = None
     group_col: str
-    metric_col: str
+    metric_col: Optional[str] = None
     preperiod_metric_col: Optional[str] = None
+    # user-level ratio metrics: per-user numerator and denominator columns
+    numerator_col: Optional[str] = None
+    denominator_col: Optional[str] = None
 
 
 class AnalysisConfig(BaseModel):
@@ -33,6 +36,7 @@ class AnalysisConfig(BaseModel):
     sided: Literal["two", "left", "right"] = "two"
     use_cuped: bool = False
     preperiod_metric_col: Optional[str] = None
+    cuped_covariates: list[str] = []  # overrides preperiod_metric_col when set
     use_sequential: bool = False
     sequential_preset: Optional[Literal["pocock", "obf"]] = None
     sequential_looks: int = 5
@@ -40,10 +44,16 @@ class AnalysisConfig(BaseModel):
     nan_policy: Literal["drop", "zero", "error"] = "drop"
     metric_type: MetricType
     segments: list[str] = []
-    multiple_testing: Literal["none", "holm", "by"] = "holm"
+    multiple_testing: Literal["none", "holm", "hochberg", "bh", "by"] = "holm"
     robust: bool = False
     bootstrap: bool = False
     use_fieller: bool = False
     use_bayes: bool = False
     bayes_rope: tuple[float, float] | None = None
     bayes_draws: int = 10000
+    quantile: float = 0.5  # for metric_type="quantile"
+    sketch_k: int = 1000  # accuracy of streaming quantile sketches
+    sketch_seed: int = 0  # compaction seed, so repeated analyses of the same data agree
+    cap_quantile: Optional[float] = None  # winsorize continuous metrics at this quantile
+    cap_on: Literal["control", "pooled"] = "control"
+    profile: bool = False  # return per-stage timings in AnalysisResult.meta["timings"]
@@ -1,8 +1,23 @@
 from __future__ import annotations
 
 import importlib
+from concurrent.futures import CancelledError
+from typing import Any, Callable, Optional
+
+# ``(completed, total)`` callback used by long-running loops
+ProgressCallback = Callable[[int, int], None]
 
 
 def lazy_import(name: str):
     """Import a module only when needed."""
     return importlib.import_module(name)
+
+
+def check_cancelled(cancel: Optional[Any]) -> None:
+    """Raise :class:`concurrent.futures.CancelledError` once ``cancel`` is set.
+
+    ``cancel`` is any object with an ``is_set()`` method, usually a
+    :class:`threading.Event`; ``None`` never cancels.
+    """
+    if cancel is not None and cancel.is_set():
+        raise CancelledError()
@@ -40,7 +40,24 @@ def validate_dataframe(
     Returns the validated (and possibly modified) dataframe.
     """
 
-    required = [schema.group_col, schema.metric_col]
+    numerator = getattr(schema, "numerator_col", None)
+    denominator = getattr(schema, "denominator_col", None)
+    if bool(numerator) != bool(denominator):
+        raise ValidationError(
+            "incomplete_ratio_schema",
+            "Для ratio-метрики нужны числитель и знаменатель",
+            "Both numerator_col and denominator_col must be set",
+            "Укажите обе колонки numerator_col и denominator_col в DataSchema",
+        )
+    value_cols = [c for c in (schema.metric_col, numerator, denominator) if c]
+    if not value_cols:
+        raise ValidationError(
+            "missing_metric",
+            "Не указана колонка метрики",
+            "DataSchema needs metric_col or numerator_col/denominator_col",
+            "Укажите metric_col или пару numerator_col/denominator_col",
+        )
+    required = [schema.group_col] + value_cols
     if schema.user_id:
         required.append(schema.user_id)
     if schema.preperiod_metric_col:
@@ -65,22 +82,23 @@ def validate_dataframe(
     if len(df) < 100:
         logger.warning("Dataframe has only %d rows", len(df))
 
-    if df[schema.metric_col].isna().any():
+    has_nan = df[value_cols].isna().any(axis=1)
+    if has_nan.any():
         if nan_policy == "error":
             raise ValidationError(
                 "nan_in_metric",
                 "В метрике обнаружены NaN",
-                f"Column '{schema.metric_col}' contains missing values",
+                f"Columns {value_cols} contain missing values",
                 "Выберите nan_policy='drop' или очистите данные",
             )
         if nan_policy == "drop":
             before = len(df)
-            df = df.dropna(subset=[schema.metric_col])
+            df = df.loc[~has_nan]
             removed = before - len(df)
             logger.info("Dropped %d rows due to NaN in metric column", removed)
         elif nan_policy == "zero":
-            count = df[schema.metric_col].isna().sum()
-            df[schema.metric_col] = df[schema.metric_col].fillna(0)
+            count = int(df[value_cols].isna().sum().sum())
+            df[value_cols] = df[value_cols].fillna(0)
             logger.info("Filled %d NaN values in metric column with zero", count)
 
     return df
@@ -1,7 +1,11 @@
 """Minimal Flask API exposing core analysis helpers."""
 
+import json
 import os
+import threading
 import time
+from typing import Any, Callable, Dict, Optional
+
 from flask import Flask, jsonify, request, g
 from flask_jwt_extended import (
     JWTManager,
@@ -21,8 +25,204 @@ from prometheus_client import (
     generate_latest,
     CONTENT_TYPE_LATEST,
 )
-from metrics import track_time
-from abtest_core import DataSchema, validate_dataframe, ValidationError
+from metrics import STAGE_DURATION, STAGE_ROWS, track_time
+from abtest_core import DataSchema, validate_dataframe, ValidationError, infer_metric_type
+from api.cache import ResultCache, cache_key
+from api.ingest import SUPPORTED, bad_payload, read_payload
+from api.jobs import JobQueue, JobStore
+
+_DATA_KEYS = (
+    "rows",
+    "columns",
+    "schema",
+    "nan_policy",
+    "aggregate",
+    "users_a",
+    "conv_a",
+    "users_b",
+    "conv_b",
+)
+
+
+def _jsonable(obj: Any) -> Any:
+    """Convert analysis output (NumPy scalars/arrays, tuples) to JSON types."""
+    if isinstance(obj, dict):
+        return {str(k): _jsonable(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_jsonable(v) for v in obj]
+    if hasattr(obj, "tolist"):
+        return _jsonable(obj.tolist())
+    return obj
+
+
+def _schema_frame(df: "pd.DataFrame", schema: DataSchema) -> "pd.DataFrame":
+    """Rename schema columns to the names expected by ``analyze_groups``."""
+    mapping = {
+        schema.group_col: "group",
+        schema.metric_col: "metric",
+        schema.numerator_col: "numerator",
+        schema.denominator_col: "denominator",
+    }
+    return df.rename(columns={k: v for k, v in mapping.items() if k})
+
+
+def _bad_options(field: str, details: str) -> ValidationError:
+    return ValidationError(
+        f"bad_{field}",
+        "Неверные параметры анализа",
+        f"{field}: {details}",
+        f"Проверьте поля {field}",
+    )
+
+
+def _options(model: Any, values: Any, field: str) -> Any:
+    """Build ``model`` from client-supplied ``values``, mapping errors to ``ValidationError``."""
+    if not isinstance(values, dict):
+        raise _bad_options(field, f"expected an object, got {type(values).__name__}")
+    try:
+        return model(**values)
+    except (TypeError, ValueError) as exc:  # pydantic errors are ValueErrors
+        raise _bad_options(field, str(exc)) from exc
+
+
+def validate_options(data: Dict[str, Any]) -> None:
+    """Check the ``schema`` and ``config`` of a payload before it is run or queued."""
+    if "schema" in data:
+        _options(DataSchema, data["schema"], "schema")
+    config = data.get("config") or {}
+    if not isinstance(config, dict):
+        raise _bad_options("config", f"expected an object, got {type(config).__name__}")
+    # metric_type may be left out and inferred from the data later
+    checked = _options(
+        AnalysisConfig,
+        {"metric_type": "continuous", "alpha": data.get("alpha", 0.05), **config},
+        "config",
+    )
+    if not 0 < checked.alpha < 1:
+        raise _bad_options("config", f"alpha must be in (0, 1), got {checked.alpha}")
+
+
+def analyze_payload(
+    data: Dict[str, Any], progress: Optional[Callable[[float], None]] = None
+) -> Dict[str, Any]:
+    """Run the analysis described by an ``/abtest`` or ``/jobs`` payload.
+
+    Payloads with ``users_a``/``conv_a``/``users_b``/``conv_b`` run the
+    binomial test on counts. Payloads with ``rows`` (or a ``columns``
+    mapping of column name to values) and a ``schema`` are analyzed in full
+    with ``analyze_groups``, configured by the optional ``config`` mapping
+    of ``AnalysisConfig`` fields, so bootstrap, Bayesian and segment options
+    are available. Raises ``ValidationError`` or ``SrmCheckFailed``.
+    """
+    report = progress or (lambda _p: None)
+    df = None
+    if ("rows" in data or "columns" in data) and "schema" in data:
+        df = pd.DataFrame(data["columns"] if "columns" in data else data["rows"])
+        schema = _options(DataSchema, data["schema"], "schema")
+        nan_policy = data.get("nan_policy", "drop")
+        df = validate_dataframe(df, schema, nan_policy=nan_policy)
+        report(0.1)
+
+    if df is not None and "users_a" not in data:
+        validate_options(data)
+        options = dict(data.get("config") or {})
+        options.setdefault("alpha", data.get("alpha", 0.05))
+        if "metric_type" not in options:
+            options["metric_type"] = (
+                infer_metric_type(df, schema.metric_col) if schema.metric_col else "ratio"
+            )
+        res = analyze_groups(_schema_frame(df, schema), _options(AnalysisConfig, options, "config"))
+        report(0.9)
+        return _jsonable(
+            {
+                "p_value": res.p_value,
+                "effect": res.effect,
+                "ci": res.ci,
+                "method_notes": res.method_notes,
+                "meta": res.meta,
+                "segments": res.segments,
+            }
+        )
+
+    users_a, conv_a = data["users_a"], data["conv_a"]
+    users_b, conv_b = data["users_b"], data["conv_b"]
+    df = pd.DataFrame(
+        {
+            "group": ["A"] * users_a + ["B"] * users_b,
+            "metric": [1] * conv_a + [0] * (users_a - conv_a) + [1] * conv_b + [0] * (users_b - conv_b),
+        }
+    )
+    config = AnalysisConfig(alpha=data.get("alpha", 0.05), metric_type="binomial")
+    res = analyze_groups(df, config)
+    report(0.9)
+    return {
+        "cr_a": conv_a / users_a,
+        "cr_b": conv_b / users_b,
+        "p_value_ab": res.p_value,
+        "effect": res.effect,
+        "ci": list(res.ci),
+        "method_notes": res.method_notes,
+    }
+
+
+def cache_parts(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Split a payload into the data and config parts that determine its result."""
+    parts = {k: data[k] for k in _DATA_KEYS if k in data}
+    if "_body_sha256" in data:
+        # binary bodies are addressed by the digest of the raw upload
+        parts["columns"] = data["_body_sha256"]
+    config = dict(data.get("config") or {})
+    config.setdefault("alpha", data.get("alpha", 0.05))
+    parts["config"] = config
+    return parts
+
+
+def request_payload() -> Dict[str, Any]:
+    """Decode the current request body according to its Content-Type."""
+    if request.mimetype in ("", "application/json") or request.mimetype.endswith("+json"):
+        return request.get_json(force=True)
+    params: Dict[str, Any] = {}
+    raw = request.headers.get("X-Abtest-Params") or request.args.get("params")
+    if raw:
+        try:
+            params = json.loads(raw)
+        except ValueError as exc:
+            raise bad_payload(exc) from exc
+        if not isinstance(params, dict):
+            raise bad_payload(TypeError("X-Abtest-Params must be a JSON object"))
+    return read_payload(
+        request.stream,
+        request.mimetype,
+        content_encoding=request.headers.get("Content-Encoding"),
+        params=params,
+    )
+
+
+def _job_view(job: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": job["id"],
+        "status": job["status"],
+        "progress": job["progress"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+        "result": job["result"],
+        "error": job["error"],
+    }
+
+
+def _job_not_found(job_id: str):
+    return (
+        jsonify(
+            {
+                "code": "job_not_found",
+                "title": "Задача не найдена",
+                "details": f"Job '{job_id}' does not exist",
+                "fix_hint": "Проверьте идентификатор задачи",
+            }
+        ),
+        404,
+    )
 
 
 def create_app() -> Flask:
@@ -58,15 +258,33 @@ def create_app() -> Flask:
         registry=registry,
     )
 
+    CACHE_COUNTER = Counter(
+        "analysis_cache_requests_total",
+        "Result cache lookups by outcome",
+        ["result"],
+        registry=registry,
+    )
+    # analysis stage histograms are process-wide; expose them here as well
+    registry.register(STAGE_DURATION)
+    registry.register(STAGE_ROWS)
+    result_cache = ResultCache(
+        maxsize=int(os.getenv("RESULT_CACHE_SIZE", "256")),
+        ttl=float(os.getenv("RESULT_CACHE_TTL", "3600")),
+        db_path=os.getenv("RESULT_CACHE_DB") or None,
+    )
+    app.extensions["result_cache"] = result_cache
+
     @app.before_request
     def start_timer():
         g._start_time = time.perf_counter()
 
     @app.after_request
     def record_metrics(response):
-        REQUEST_COUNTER.labels(request.path, request.method, response.status_code).inc()
+        # label by route template so /jobs/<job_id> does not explode cardinality
+        endpoint = request.url_rule.rule if request.url_rule is not None else request.path
+        REQUEST_COUNTER.labels(endpoint, request.method, response.status_code).inc()
         if hasattr(g, "_start_time"):
-            REQUEST_LATENCY.labels(request.path).observe(time.perf_counter() - g._start_time)
+            REQUEST_LATENCY.labels(endpoint).observe(time.perf_counter() - g._start_time)
         return response
 
     @app.route("/metrics")
@@ -105,41 +323,87 @@ def create_app() -> Flask:
     @jwt_required()
     @track_time
     def run_abtest():
-        data = request.get_json(force=True)
+        try:
+            data = request_payload()
+        except ValidationError as e:
+            return jsonify(e.to_dict()), 415 if e.code == "unsupported_media_type" else 400
+        try:
+            validate_options(data)
+        except ValidationError as e:
+            return jsonify(e.to_dict()), 400
+        key = cache_key(cache_parts(data))
+        # the key addresses the request content, so a matching tag is fresh
+        if key in request.if_none_match:
+            resp = app.response_class(status=304)
+            resp.set_etag(key)
+            CACHE_COUNTER.labels("not_modified").inc()
+            return resp
+        try:
+            result, source = result_cache.get_or_compute(key, lambda: analyze_payload(data))
+        except ValidationError as e:
+            return jsonify(e.to_dict()), 400
+        except SrmCheckFailed as e:
+            return jsonify(e.to_dict()), 400
+        CACHE_COUNTER.labels(source).inc()
+        resp = jsonify(result)
+        resp.set_etag(key)
+        resp.headers["X-Cache"] = source
+        return resp
+
+    job_lock = threading.Lock()
 
-        # Optional dataframe validation if raw rows are provided
-        if "rows" in data and "schema" in data:
-            df = pd.DataFrame(data["rows"])
-            schema = DataSchema(**data["schema"])
-            nan_policy = data.get("nan_policy", "drop")
-            try:
-                validate_dataframe(df, schema, nan_policy=nan_policy)
-            except ValidationError as e:
-                return jsonify(e.to_dict()), 400
+    def _job_queue() -> JobQueue:
+        # created on first use so apps that never queue jobs touch no DB
+        with job_lock:
+            queue = app.extensions.get("job_queue")
+            if queue is None:
+                store = JobStore(os.getenv("JOBS_DB", "jobs.db"))
+                queue = JobQueue(
+                    store,
+                    analyze_payload,
+                    workers=int(os.getenv("JOBS_WORKERS", "2")),
+                    default_timeout=float(os.getenv("JOBS_TIMEOUT", "300")),
+                    mp_context=os.getenv("JOBS_START_METHOD", "spawn"),
+                    registry=registry,
+                ).start()
+                app.extensions["job_queue"] = queue
+            return queue
 
+    @app.post("/jobs")
+    @jwt_required()
+    def submit_job():
         try:
-            users_a, conv_a = data["users_a"], data["conv_a"]
-            users_b, conv_b = data["users_b"], data["conv_b"]
-            df = pd.DataFrame(
-                {
-                    "group": ["A"] * users_a + ["B"] * users_b,
-                    "metric": [1] * conv_a + [0] * (users_a - conv_a) + [1] * conv_b + [0] * (users_b - conv_b),
-                }
-            )
-            config = AnalysisConfig(alpha=data.get("alpha", 0.05), metric_type="binomial")
-            res = analyze_groups(df, config)
-        except SrmCheckFailed as e:
+            data = request_payload()
+        except ValidationError as e:
+            return jsonify(e.to_dict()), 415 if e.code == "unsupported_media_type" else 400
+        try:
+            validate_options(data)
+        except ValidationError as e:
             return jsonify(e.to_dict()), 400
-        return jsonify(
-            {
-                "cr_a": conv_a / users_a,
-                "cr_b": conv_b / users_b,
-                "p_value_ab": res.p_value,
-                "effect": res.effect,
-                "ci": res.ci,
-                "method_notes": res.method_notes,
-            }
-        )
+        if "columns" in data:
+            # job payloads are persisted as JSON
+            data["columns"] = _jsonable(data["columns"])
+        timeout = data.pop("timeout", None)
+        job_id = _job_queue().submit(data, timeout=float(timeout) if timeout else None)
+        return jsonify({"id": job_id, "status": "queued"}), 202, {"Location": f"/jobs/{job_id}"}
+
+    @app.get("/jobs/<job_id>")
+    @jwt_required()
+    def get_job(job_id: str):
+        try:
+            job = _job_queue().store.get(job_id)
+        except KeyError:
+            return _job_not_found(job_id)
+        return jsonify(_job_view(job))
+
+    @app.delete("/jobs/<job_id>")
+    @jwt_required()
+    def cancel_job(job_id: str):
+        try:
+            status = _job_queue().cancel(job_id)
+        except KeyError:
+            return _job_not_found(job_id)
+        return jsonify({"id": job_id, "status": status}), 202
 
     @app.route("/spec", methods=["GET"])
     def spec():
@@ -175,8 +439,11 @@ def create_app() -> Flask:
                             "metrics": {"type": "integer"},
                             "alpha": {"type": "number"},
                             "force_run_when_srm_failed": {"type": "boolean"},
+                            "rows": {"type": "array", "items": {"type": "object"}},
+                            "columns": {"type": "object"},
+                            "schema": {"type": "object"},
+                            "config": {"type": "object"},
                         },
-                        "required": ["users_a", "conv_a", "users_b", "conv_b"],
                     },
                 }
             },
@@ -194,10 +461,25 @@ def create_app() -> Flask:
                 },
                 "/abtest": {
                     "post": {
-                        "requestBody": {"content": {"application/json": {"schema": {"$ref": "#/components/schemas/AbTestRequest"}}}},
+                        "requestBody": {
+                            "content": {
+                                "application/json": {"schema": {"$ref": "#/components/schemas/AbTestRequest"}},
+                                **{ctype: {"schema": {"type": "string", "format": "binary"}} for ctype in SUPPORTED},
+                            }
+                        },
                         "responses": {"200": {"description": "AB test result"}},
                     }
                 },
+                "/jobs": {
+                    "post": {
+                        "requestBody": {"content": {"application/json": {"schema": {"$ref": "#/components/schemas/AbTestRequest"}}}},
+                        "responses": {"202": {"description": "Job queued"}},
+                    }
+                },
+                "/jobs/{job_id}": {
+                    "get": {"responses": {"200": {"description": "Job status, progress and result"}, "404": {"description": "Unknown job"}}},
+                    "delete": {"responses": {"202": {"description": "Cancellation requested"}, "404": {"description": "Unknown job"}}},
+                },
                 "/metrics": {"get": {"responses": {"200": {"description": "Metrics"}}}},
             },
         }
@@ -0,0 +1,179 @@
+"""Content-addressed cache for analysis results.
+
+Keys are SHA-256 digests of a canonical JSON encoding of the request
+content together with a code version, so identical requests map to the
+same key across processes and restarts, and any change to the analysis
+code invalidates old entries. Results live in an in-process LRU tier and,
+optionally, a shared SQLite tier; both expire after ``ttl`` seconds.
+Concurrent requests for a key that is being computed wait for that single
+computation instead of repeating it.
+"""
+from __future__ import annotations
+
+import functools
+import hashlib
+import json
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+def _canonical(obj: Any) -> Any:
+    """Normalize values whose JSON form is not unique."""
+    if isinstance(obj, dict):
+        return {str(k): _canonical(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_canonical(v) for v in obj]
+    if isinstance(obj, float):
+        if math.isnan(obj):
+            return "NaN"
+        if obj.is_integer() and abs(obj) < 2 ** 53:
+            return int(obj)
+    return obj
+
+
+@functools.lru_cache(maxsize=1)
+def code_version() -> str:
+    """Digest of the ``abtest_core`` sources backing the analysis."""
+    import abtest_core
+
+    digest = hashlib.sha256()
+    for path in sorted(Path(abtest_core.__file__).parent.glob("*.py")):
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def cache_key(parts: Dict[str, Any], version: Optional[str] = None) -> str:
+    """Return the content address of ``parts`` for the given code version."""
+    body = json.dumps(
+        {"version": version or code_version(), "parts": _canonical(parts)},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+
+class _InFlight:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class ResultCache:
+    """Two-tier TTL cache with request coalescing.
+
+    Args:
+        maxsize: Number of entries kept in the in-process LRU tier.
+        ttl: Entry lifetime in seconds.
+        db_path: Optional SQLite file shared between processes.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 3600.0, db_path: Optional[str] = None):
+        self.maxsize = max(0, int(maxsize))
+        self.ttl = float(ttl)
+        self._lru: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, _InFlight] = {}
+        self._conn: Optional[sqlite3.Connection] = None
+        if db_path:
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS result_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+
+    def get(self, key: str) -> Tuple[Any, Optional[str]]:
+        """Return ``(value, tier)``; ``tier`` is ``None`` on a miss."""
+        now = time.time()
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._lru.move_to_end(key)
+                    return entry[1], "memory"
+                del self._lru[key]
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT value, expires_at FROM result_cache WHERE key=?", (key,)
+                ).fetchone()
+                if row is not None:
+                    if row[1] > now:
+                        value = json.loads(row[0])
+                        self._remember(key, value, row[1])
+                        return value, "disk"
+                    self._conn.execute("DELETE FROM result_cache WHERE key=?", (key,))
+                    self._conn.commit()
+        return None, None
+
+    def _remember(self, key: str, value: Any, expires_at: float) -> None:
+        if self.maxsize == 0:
+            return
+        self._lru[key] = (expires_at, value)
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.maxsize:
+            self._lru.popitem(last=False)
+
+    def set(self, key: str, value: Any) -> None:
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._remember(key, value, expires_at)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO result_cache(key, value, expires_at) VALUES(?,?,?)",
+                    (key, json.dumps(value), expires_at),
+                )
+                self._conn.commit()
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Tuple[Any, str]:
+        """Return the cached value or compute it once for all waiters.
+
+        The second element tells where the value came from: ``memory``,
+        ``disk``, ``computed`` or ``coalesced``. Exceptions raised by
+        ``compute`` propagate to every waiter and are not cached.
+        """
+        value, tier = self.get(key)
+        if tier is not None:
+            return value, tier
+        with self._lock:
+            pending = self._inflight.get(key)
+            owner = pending is None
+            if owner:
+                pending = self._inflight[key] = _InFlight()
+        if not owner:
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.value, "coalesced"
+        try:
+            pending.value = compute()
+            self.set(key, pending.value)
+            return pending.value, "computed"
+        except BaseException as exc:
+            pending.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            pending.done.set()
+
+    def purge_expired(self) -> int:
+        """Drop expired entries from both tiers; returns the number removed."""
+        now = time.time()
+        with self._lock:
+            stale = [k for k, (exp, _) in self._lru.items() if exp <= now]
+            for k in stale:
+                del self._lru[k]
+            removed = len(stale)
+            if self._conn is not None:
+                cur = self._conn.execute("DELETE FROM result_cache WHERE expires_at <= ?", (now,))
+                self._conn.commit()
+                removed += cur.rowcount
+        return removed
@@ -0,0 +1,229 @@
+"""Columnar and streaming request bodies for the analysis API.
+
+Besides JSON row lists the analysis endpoints accept:
+
+* ``application/vnd.apache.arrow.stream`` - an Arrow IPC stream. Record
+  batches are converted to NumPy without copying where the types allow it.
+  Analysis parameters may be stored under the ``abtest`` key of the Arrow
+  schema metadata.
+* ``application/msgpack`` - a map with ``columns`` (column name to list, or
+  to ``{"dtype": "<f8", "data": <bytes>}`` for raw little-endian buffers)
+  next to the usual ``schema``/``config`` keys.
+* ``application/x-ndjson`` - one JSON row per line, optionally with
+  ``Content-Encoding: gzip``. The body is decompressed and parsed in chunks
+  of ``chunk_rows`` lines.
+
+Parameters can also be sent as JSON in the ``X-Abtest-Params`` header or the
+``params`` query argument. When the parameters ask for ``aggregate`` and the
+schema has a ``user_id``, chunks are folded into per-user aggregates as they
+arrive, so event-level uploads never have to be materialized. Otherwise the
+chunks are joined one column at a time, so peak memory is the decoded columns
+plus one chunk and one column, not twice the body.
+
+``pyarrow`` and ``msgpack`` are optional; requests needing a missing library
+are rejected with ``unsupported_media_type``.
+"""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import io
+import itertools
+import json
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional
+
+import pandas as pd
+
+from abtest_core import DataSchema, ValidationError, aggregate_event_chunks
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+MSGPACK = "application/msgpack"
+NDJSON = "application/x-ndjson"
+SUPPORTED = (ARROW_STREAM, MSGPACK, "application/x-msgpack", NDJSON)
+
+_READ_SIZE = 1 << 20
+
+
+def _unsupported(details: str) -> ValidationError:
+    return ValidationError(
+        "unsupported_media_type",
+        "Формат тела запроса не поддерживается",
+        details,
+        f"Используйте application/json или один из форматов: {', '.join(SUPPORTED)}",
+    )
+
+
+def bad_payload(exc: BaseException) -> ValidationError:
+    """``bad_payload`` error for a body or parameters that fail to decode."""
+    return ValidationError(
+        "bad_payload",
+        "Не удалось разобрать тело запроса",
+        f"{type(exc).__name__}: {exc}",
+        "Проверьте формат данных, Content-Type и Content-Encoding",
+    )
+
+
+class _HashingReader(io.RawIOBase):
+    """File-like wrapper computing the SHA-256 of everything read."""
+
+    def __init__(self, stream: BinaryIO) -> None:
+        self._stream = stream
+        self.digest = hashlib.sha256()
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        data = self._stream.read(len(buffer))
+        n = len(data)
+        buffer[:n] = data
+        self.digest.update(data)
+        return n
+
+
+def _read_ndjson(lines: list[bytes]) -> "pd.DataFrame":
+    return pd.read_json(io.BytesIO(b"".join(lines)), lines=True, dtype=False, convert_dates=False)
+
+
+def _ndjson_chunks(stream: BinaryIO, chunk_rows: int) -> Iterator["pd.DataFrame"]:
+    lines: list[bytes] = []
+    for line in stream:
+        if line.strip():
+            lines.append(line)
+        if len(lines) >= chunk_rows:
+            yield _read_ndjson(lines)
+            lines = []
+    if lines:
+        yield _read_ndjson(lines)
+
+
+def _arrow_chunks(stream: BinaryIO, params: Dict[str, Any]) -> Iterator["pd.DataFrame"]:
+    try:
+        import pyarrow.ipc as ipc
+    except Exception:  # pragma: no cover - optional dependency
+        raise _unsupported("pyarrow is required for Arrow IPC bodies")
+    reader = ipc.open_stream(stream)
+    meta = reader.schema.metadata or {}
+    if b"abtest" in meta:
+        for key, value in json.loads(meta[b"abtest"]).items():
+            params.setdefault(key, value)
+    for batch in reader:
+        yield batch.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def _msgpack_columns(stream: BinaryIO, params: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        import msgpack
+    except Exception:  # pragma: no cover - optional dependency
+        raise _unsupported("msgpack is required for msgpack bodies")
+    import numpy as np
+
+    body = msgpack.unpackb(stream.read(), raw=False)
+    if not isinstance(body, dict) or not isinstance(body.get("columns"), dict):
+        raise ValidationError(
+            "bad_payload",
+            "Неверная структура msgpack",
+            "Expected a map with a 'columns' map",
+            "Передайте {'columns': {...}, 'schema': {...}}",
+        )
+    for key, value in body.items():
+        if key != "columns":
+            params.setdefault(key, value)
+    columns: Dict[str, Any] = {}
+    for name, col in body["columns"].items():
+        if isinstance(col, dict) and "data" in col:
+            columns[name] = np.frombuffer(col["data"], dtype=np.dtype(col.get("dtype", "<f8")))
+        else:
+            columns[name] = np.asarray(col)
+    return columns
+
+
+def _concat_columns(parts: Iterable["pd.DataFrame"]) -> Dict[str, Any]:
+    """Join decoded chunks into one array per column.
+
+    Each chunk is copied into per-column pieces and dropped as soon as it is
+    split, and each column's pieces are released right after that column is
+    concatenated. Peak memory is the decoded data plus one chunk and one
+    column, rather than every chunk plus a concatenated copy of all of them.
+    Columns missing from some chunks are filled with NaN, as in ``pd.concat``.
+    """
+    import numpy as np
+
+    pieces: Dict[str, List[Any]] = {}
+    rows = 0
+    for frame in parts:
+        n = len(frame)
+        for name in frame.columns:
+            if name not in pieces:
+                pieces[name] = [np.full(rows, np.nan)] if rows else []
+            # a copy, so no piece keeps the chunk's 2-D block alive
+            pieces[name].append(frame[name].to_numpy(copy=True))
+        for name, col in pieces.items():
+            if name not in frame.columns:
+                col.append(np.full(n, np.nan))
+        rows += n
+        del frame
+    columns: Dict[str, Any] = {}
+    for name in list(pieces):
+        chunks = pieces.pop(name)
+        columns[name] = chunks[0] if len(chunks) == 1 else np.concatenate(chunks)
+        del chunks
+    return columns
+
+
+def read_payload(
+    stream: BinaryIO,
+    content_type: str,
+    content_encoding: Optional[str] = None,
+    params: Optional[Dict[str, Any]] = None,
+    chunk_rows: int = 100_000,
+) -> Dict[str, Any]:
+    """Decode a binary request body into an analysis payload.
+
+    Returns a payload with a ``columns`` mapping of NumPy arrays in place of
+    ``rows``, plus ``_body_sha256`` - the digest of the raw body used as the
+    data part of the result-cache key.
+    """
+    payload: Dict[str, Any] = dict(params or {})
+    reader = _HashingReader(stream)
+    source: BinaryIO = io.BufferedReader(reader, _READ_SIZE)
+    if (content_encoding or "").lower() == "gzip":
+        source = gzip.GzipFile(fileobj=source, mode="rb")  # type: ignore[assignment]
+
+    if content_type not in SUPPORTED:
+        raise _unsupported(f"Content-Type '{content_type}' is not supported")
+    try:
+        if content_type == ARROW_STREAM:
+            chunks: Optional[Iterator["pd.DataFrame"]] = _arrow_chunks(source, payload)
+        elif content_type in (MSGPACK, "application/x-msgpack"):
+            chunks = None
+            columns = _msgpack_columns(source, payload)
+        else:
+            chunks = _ndjson_chunks(source, chunk_rows)
+
+        if chunks is not None:
+            # opening the stream fills params from Arrow metadata
+            first = next(chunks, None)
+            parts = itertools.chain([first] if first is not None else [], chunks)
+            if payload.get("aggregate") and "schema" in payload:
+                frame = aggregate_event_chunks(parts, DataSchema(**payload["schema"])).users
+                columns = {name: frame[name].to_numpy() for name in frame.columns}
+            else:
+                columns = _concat_columns(parts)
+        # drain anything left so the digest covers the whole body
+        while source.read(_READ_SIZE):
+            pass
+    except ValidationError:
+        raise
+    except Exception as exc:  # malformed body: bad JSON, gzip, msgpack or Arrow data
+        raise bad_payload(exc) from exc
+    if "schema" not in payload:
+        raise ValidationError(
+            "missing_schema",
+            "Не передана схема данных",
+            "Binary bodies need 'schema' in X-Abtest-Params, the params query argument or the body",
+            "Добавьте schema с group_col и metric_col",
+        )
+    payload["columns"] = columns
+    payload["_body_sha256"] = reader.digest.hexdigest()
+    return payload
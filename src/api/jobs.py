@@ -0,0 +1,344 @@
+"""Persistent job queue for long-running analysis requests.
+
+Jobs are stored in SQLite so their status survives API restarts and can be
+read by any API worker. A dispatcher thread claims queued jobs and runs each
+one in its own worker process, at most ``workers`` at a time. Running a job
+per process (rather than in a shared executor) lets the queue terminate a
+job on cancellation or when its timeout expires.
+"""
+from __future__ import annotations
+
+import json
+import multiprocessing
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional
+
+from migrations_runner import run_migrations
+
+ProgressCallback = Callable[[float], None]
+JobTarget = Callable[[Dict[str, Any], ProgressCallback], Dict[str, Any]]
+
+
+class JobStore:
+    """Thread-safe SQLite persistence for jobs.
+
+    ``migrate=False`` skips the schema upgrade; job processes use it to open
+    a database the dispatcher has already migrated.
+    """
+
+    def __init__(self, db_path: str, migrate: bool = True):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        if migrate:
+            run_migrations(db_path)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+
+    def create(self, kind: str, payload: Dict[str, Any], timeout: Optional[float] = None) -> str:
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs(id, kind, status, payload, progress, timeout, cancel_requested, created_at) "
+                "VALUES(?,?,?,?,?,?,?,?)",
+                (job_id, kind, "queued", json.dumps(payload), 0.0, timeout, 0, time.time()),
+            )
+            self._conn.commit()
+        return job_id
+
+    def get(self, job_id: str) -> Dict[str, Any]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id=?", (job_id,)).fetchone()
+        if row is None:
+            raise KeyError("Job not found")
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"]) if job["payload"] else None
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        job["error"] = json.loads(job["error"]) if job["error"] else None
+        job["cancel_requested"] = bool(job["cancel_requested"])
+        return job
+
+    def claim_next(self) -> Optional[Dict[str, Any]]:
+        """Atomically move the oldest queued job to ``running``."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id FROM jobs WHERE status='queued' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            cur = self._conn.execute(
+                "UPDATE jobs SET status='running', started_at=? WHERE id=? AND status='queued'",
+                (time.time(), row["id"]),
+            )
+            self._conn.commit()
+            if cur.rowcount == 0:
+                return None
+        return self.get(row["id"])
+
+    def set_progress(self, job_id: str, progress: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET progress=? WHERE id=? AND status='running'",
+                (min(max(float(progress), 0.0), 1.0), job_id),
+            )
+            self._conn.commit()
+
+    def finish(
+        self,
+        job_id: str,
+        status: str,
+        result: Optional[Dict[str, Any]] = None,
+        error: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status=?, result=?, error=?, finished_at=?, "
+                "progress=CASE WHEN ?='done' THEN 1.0 ELSE progress END WHERE id=?",
+                (
+                    status,
+                    json.dumps(result) if result is not None else None,
+                    json.dumps(error) if error is not None else None,
+                    time.time(),
+                    status,
+                    job_id,
+                ),
+            )
+            self._conn.commit()
+
+    def request_cancel(self, job_id: str) -> str:
+        """Cancel a queued job immediately or flag a running one.
+
+        Returns the job status after the request.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT status FROM jobs WHERE id=?", (job_id,)).fetchone()
+            if row is None:
+                raise KeyError("Job not found")
+            status = row["status"]
+            if status == "queued":
+                self._conn.execute(
+                    "UPDATE jobs SET status='cancelled', finished_at=?, cancel_requested=1 WHERE id=?",
+                    (time.time(), job_id),
+                )
+                status = "cancelled"
+            elif status == "running":
+                self._conn.execute("UPDATE jobs SET cancel_requested=1 WHERE id=?", (job_id,))
+            self._conn.commit()
+        return status
+
+    def cancel_requested(self, job_id: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT cancel_requested FROM jobs WHERE id=?", (job_id,)
+            ).fetchone()
+        return bool(row and row["cancel_requested"])
+
+    def count(self, status: str) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status=?", (status,)).fetchone()
+        return int(row[0])
+
+    def requeue_running(self) -> int:
+        """Return jobs left ``running`` by a previous process to the queue."""
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE jobs SET status='queued', started_at=NULL, progress=0 WHERE status='running'"
+            )
+            self._conn.commit()
+        return cur.rowcount
+
+
+def _worker_main(target: JobTarget, job_id: str, db_path: str, payload: Dict[str, Any], conn: Any) -> None:
+    """Entry point of a job process: run ``target`` and send back the outcome."""
+    store = JobStore(db_path, migrate=False)
+    try:
+        result = target(payload, lambda p: store.set_progress(job_id, p))
+        conn.send(("done", result))
+    except Exception as exc:  # report any failure to the dispatcher
+        to_dict = getattr(exc, "to_dict", None)
+        error = to_dict() if callable(to_dict) else {
+            "code": "job_failed",
+            "title": "Ошибка выполнения задачи",
+            "details": f"{type(exc).__name__}: {exc}",
+            "fix_hint": "Проверьте входные данные и повторите запрос",
+        }
+        conn.send(("failed", error))
+    finally:
+        conn.close()
+
+
+class JobQueue:
+    """Dispatch persisted jobs to a bounded set of worker processes.
+
+    Args:
+        store: Job persistence.
+        target: Picklable function ``(payload, progress) -> result``.
+        workers: Maximum number of jobs running at once.
+        default_timeout: Seconds a job may run when it sets no timeout.
+        poll_interval: Dispatcher loop period in seconds.
+        mp_context: :mod:`multiprocessing` start method for job processes.
+        registry: Optional Prometheus registry for queue metrics.
+        recover: Requeue jobs left ``running`` by a previous dispatcher on
+            start. Disable when several dispatchers share one database.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        target: JobTarget,
+        workers: int = 2,
+        default_timeout: float = 300.0,
+        poll_interval: float = 0.1,
+        mp_context: str = "spawn",
+        registry: Any = None,
+        recover: bool = True,
+    ) -> None:
+        self.store = store
+        self.target = target
+        self.workers = max(1, int(workers))
+        self.default_timeout = float(default_timeout)
+        self.poll_interval = poll_interval
+        self.recover = recover
+        self._ctx = multiprocessing.get_context(mp_context)
+        self._running: Dict[str, Dict[str, Any]] = {}
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._metrics = self._make_metrics(registry) if registry is not None else None
+
+    @staticmethod
+    def _make_metrics(registry: Any) -> Dict[str, Any]:
+        from prometheus_client import Counter, Gauge, Histogram
+
+        return {
+            "depth": Gauge("analysis_jobs_queued", "Jobs waiting in the queue", registry=registry),
+            "running": Gauge("analysis_jobs_running", "Jobs currently running", registry=registry),
+            "wait": Histogram(
+                "analysis_job_wait_seconds", "Time jobs spend queued before starting", registry=registry
+            ),
+            "duration": Histogram(
+                "analysis_job_seconds", "Job run time by final status", ["status"], registry=registry
+            ),
+            "total": Counter("analysis_jobs_total", "Finished jobs by status", ["status"], registry=registry),
+        }
+
+    def start(self) -> "JobQueue":
+        if self._thread is None or not self._thread.is_alive():
+            if self.recover:
+                self.store.requeue_running()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="job-dispatcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop dispatching; running jobs are terminated and requeued."""
+        self._stop.set()
+        self._wake.set()
+        if wait and self._thread is not None:
+            self._thread.join()
+        for slot in self._running.values():
+            slot["process"].terminate()
+            slot["process"].join()
+        self._running.clear()
+        self.store.requeue_running()
+
+    def submit(self, payload: Dict[str, Any], kind: str = "analysis", timeout: Optional[float] = None) -> str:
+        job_id = self.store.create(kind, payload, timeout)
+        self._wake.set()
+        return job_id
+
+    def cancel(self, job_id: str) -> str:
+        status = self.store.request_cancel(job_id)
+        self._wake.set()
+        return status
+
+    def _finish(self, job_id: str, status: str, result: Any = None, error: Any = None) -> None:
+        slot = self._running.pop(job_id)
+        slot["conn"].close()
+        self.store.finish(job_id, status, result=result, error=error)
+        if self._metrics is not None:
+            self._metrics["duration"].labels(status).observe(time.time() - slot["started"])
+            self._metrics["total"].labels(status).inc()
+
+    def _reap(self) -> None:
+        now = time.time()
+        for job_id, slot in list(self._running.items()):
+            conn, proc = slot["conn"], slot["process"]
+            # check liveness before the pipe: a worker that sends its result
+            # and exits in between must not be reported as crashed
+            alive = proc.is_alive()
+            if conn.poll():
+                try:
+                    status, value = conn.recv()
+                except EOFError:
+                    status, value = "failed", None
+                proc.join()
+                if status == "done":
+                    self._finish(job_id, "done", result=value)
+                else:
+                    self._finish(job_id, "failed", error=value)
+            elif not alive:
+                self._finish(
+                    job_id,
+                    "failed",
+                    error={
+                        "code": "job_crashed",
+                        "title": "Процесс задачи завершился аварийно",
+                        "details": f"Worker exited with code {proc.exitcode}",
+                        "fix_hint": "Повторите запрос или уменьшите объём данных",
+                    },
+                )
+            elif now > slot["deadline"] or self.store.cancel_requested(job_id):
+                proc.terminate()
+                proc.join()
+                if now > slot["deadline"]:
+                    self._finish(
+                        job_id,
+                        "timeout",
+                        error={
+                            "code": "job_timeout",
+                            "title": "Превышено время выполнения задачи",
+                            "details": f"Job exceeded {slot['timeout']:g} s",
+                            "fix_hint": "Увеличьте timeout или уменьшите объём данных",
+                        },
+                    )
+                else:
+                    self._finish(job_id, "cancelled")
+
+    def _launch(self, job: Dict[str, Any]) -> None:
+        parent, child = self._ctx.Pipe(duplex=False)
+        proc = self._ctx.Process(
+            target=_worker_main,
+            args=(self.target, job["id"], self.store.db_path, job["payload"], child),
+            daemon=True,
+        )
+        proc.start()
+        child.close()
+        timeout = float(job["timeout"] or self.default_timeout)
+        started = time.time()
+        self._running[job["id"]] = {
+            "process": proc,
+            "conn": parent,
+            "started": started,
+            "timeout": timeout,
+            "deadline": started + timeout,
+        }
+        if self._metrics is not None:
+            self._metrics["wait"].observe(max(0.0, (job["started_at"] or started) - job["created_at"]))
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            self._reap()
+            while len(self._running) < self.workers:
+                job = self.store.claim_next()
+                if job is None:
+                    break
+                self._launch(job)
+            if self._metrics is not None:
+                self._metrics["depth"].set(self.store.count("queued"))
+                self._metrics["running"].set(len(self._running))
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
@@ -1,15 +1,23 @@
 import argparse
+import csv
+import dataclasses
+import itertools
 import json
 import logging
 import logging.config
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
 from pathlib import Path
-from typing import List
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
 
 try:
     import yaml
 except Exception:  # pragma: no cover - optional dependency
     yaml = None  # type: ignore
 
+from abtest_core.utils import lazy_import
 from stats.ab_test import evaluate_abn_test
 
 logger = logging.getLogger(__name__)
@@ -33,6 +41,209 @@ def _run_analysis(args: argparse.Namespace) -> None:
             logger.info(f"{k}: {v}")
 
 
+_INT_FIELDS = ("users_a", "conv_a", "users_b", "conv_b", "users_c", "conv_c", "metrics")
+
+
+def _read_experiments(source: str, fmt: str) -> Iterator[Dict[str, Any]]:
+    """Stream experiment records from a JSONL or CSV file, or ``-`` for stdin."""
+    if fmt == "auto":
+        fmt = "csv" if source.lower().endswith(".csv") else "jsonl"
+    handle = sys.stdin if source == "-" else open(source, "r", encoding="utf-8", newline="")
+    try:
+        if fmt == "csv":
+            for row in csv.DictReader(handle):
+                yield {k: v for k, v in row.items() if v not in (None, "")}
+        else:
+            for lineno, line in enumerate(handle, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as exc:
+                    record = {"_error": {"code": type(exc).__name__, "details": f"line {lineno}: {exc}"}}
+                if not isinstance(record, dict):
+                    record = {"_error": {"code": "TypeError", "details": f"line {lineno}: expected a JSON object"}}
+                yield record
+    finally:
+        if handle is not sys.stdin:
+            handle.close()
+
+
+def _evaluate_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    kwargs: Dict[str, Any] = {k: int(float(record[k])) for k in _INT_FIELDS if k in record}
+    if "alpha" in record:
+        kwargs["alpha"] = float(record["alpha"])
+    force = record.get("force_run_when_srm_failed", False)
+    if isinstance(force, str):
+        force = force.strip().lower() in ("1", "true", "yes")
+    kwargs["force_run_when_srm_failed"] = bool(force)
+    return evaluate_abn_test(**kwargs)
+
+
+def _run_chunk(chunk: List[Tuple[int, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Worker entry point: evaluate a chunk of ``(index, record)`` pairs."""
+    out = []
+    for index, record in chunk:
+        item: Dict[str, Any] = {"index": index, "id": record.get("id", index)}
+        if "_error" in record:  # unreadable input line
+            item["error"] = record["_error"]
+            out.append(item)
+            continue
+        try:
+            item["result"] = _evaluate_record(record)
+        except Exception as exc:  # one bad experiment must not stop the batch
+            to_dict = getattr(exc, "to_dict", None)
+            item["error"] = to_dict() if callable(to_dict) else {
+                "code": type(exc).__name__,
+                "details": str(exc),
+            }
+        out.append(item)
+    return out
+
+
+def _chunks(records: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Tuple[int, Dict[str, Any]]]]:
+    it = enumerate(records)
+    while True:
+        chunk = list(itertools.islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _batch_results(
+    chunks: Iterator[List[Tuple[int, Dict[str, Any]]]], workers: int, ordered: bool
+) -> Iterator[Dict[str, Any]]:
+    """Yield per-experiment results, holding at most ``4 * workers`` chunks.
+
+    Chunks in flight and, in ``ordered`` mode, finished chunks waiting for an
+    earlier one both count, so one slow chunk cannot buffer the whole input.
+    """
+    if workers <= 1:
+        for chunk in chunks:
+            yield from _run_chunk(chunk)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending: Dict[Future, int] = {}
+        done_chunks: Dict[int, List[Dict[str, Any]]] = {}
+        next_chunk = 0
+        submitted = 0
+        exhausted = False
+        while pending or not exhausted:
+            while not exhausted and len(pending) + len(done_chunks) < 4 * workers:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    exhausted = True
+                    break
+                pending[pool.submit(_run_chunk, chunk)] = submitted
+                submitted += 1
+            if not pending:
+                break
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                seq = pending.pop(fut)
+                if ordered:
+                    done_chunks[seq] = fut.result()
+                else:
+                    yield from fut.result()
+            while next_chunk in done_chunks:
+                yield from done_chunks.pop(next_chunk)
+                next_chunk += 1
+
+
+def _run_batch(args: argparse.Namespace) -> None:
+    """Analyze many experiments in one process pool, streaming JSONL results."""
+    workers = args.workers if args.workers is not None else (os.cpu_count() or 1)
+    records = _read_experiments(args.source, args.input_format)
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    # the console log handler writes to stdout; keep it out of the JSONL stream
+    moved = []
+    if out is sys.stdout:
+        for handler in logging.getLogger().handlers:
+            if isinstance(handler, logging.StreamHandler) and getattr(handler, "stream", None) is sys.stdout:
+                handler.setStream(sys.stderr)
+                moved.append(handler)
+    start = time.perf_counter()
+    n = errors = 0
+    try:
+        for item in _batch_results(_chunks(records, args.chunk_size), workers, args.order == "input"):
+            out.write(json.dumps(item, ensure_ascii=False) + "\n")
+            n += 1
+            errors += "error" in item
+        out.flush()
+        elapsed = time.perf_counter() - start
+        logger.info(
+            json.dumps(
+                {
+                    "experiments": n,
+                    "errors": errors,
+                    "workers": workers,
+                    "seconds": round(elapsed, 3),
+                    "per_second": round(n / elapsed, 1) if elapsed > 0 else None,
+                }
+            )
+        )
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        for handler in moved:
+            handler.setStream(sys.stdout)
+
+
+def _json_arg(value: str) -> Dict[str, Any]:
+    """Parse an inline JSON object or ``@path`` to a JSON file."""
+    if value.startswith("@"):
+        with open(value[1:], "r", encoding="utf-8") as f:
+            return json.load(f)
+    return json.loads(value)
+
+
+def _read_table_chunks(source: str, fmt: str, columns: List[str], chunk_rows: int) -> Iterator[Any]:
+    """Yield DataFrame chunks of at most ``chunk_rows`` rows holding only ``columns``."""
+    if fmt == "auto":
+        fmt = "parquet" if source.lower().endswith((".parquet", ".pq")) else "csv"
+    if fmt == "parquet":
+        pq = lazy_import("pyarrow.parquet")
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunk_rows, columns=columns):
+            yield batch.to_pandas()
+    else:
+        pd = lazy_import("pandas")
+        yield from pd.read_csv(sys.stdin if source == "-" else source, usecols=columns, chunksize=chunk_rows)
+
+
+def _analyze_file(args: argparse.Namespace) -> None:
+    """Analyze a raw CSV/Parquet export chunk by chunk with bounded memory."""
+    core = lazy_import("abtest_core")
+    schema = core.DataSchema(**_json_arg(args.schema))
+    cfg = {"alpha": 0.05, **_json_arg(args.config)}
+    # the columns to read do not depend on the metric type
+    probe = core.StreamingAnalyzer(schema, core.AnalysisConfig(**{"metric_type": "continuous", **cfg}))
+    columns = probe.columns
+    if args.aggregate and schema.user_id:
+        columns = list(dict.fromkeys([schema.user_id] + columns))
+    start = time.perf_counter()
+    chunks = _read_table_chunks(args.source, args.input_format, columns, args.chunk_rows)
+    if args.aggregate:
+        # event rows -> one row per user; the user table is far smaller than the export
+        values = {schema.user_id, schema.group_col, schema.metric_col, schema.numerator_col, schema.denominator_col}
+        carry = [c for c in columns if c not in values]
+        chunks = iter([core.aggregate_event_chunks(chunks, schema, carry=carry, max_rows=args.chunk_rows).users])
+    if "metric_type" not in cfg and not schema.metric_col:
+        raise ValueError("metric_type is required when the schema has no metric_col")
+    first = next(chunks, None)
+    if first is None or first.empty:
+        raise SystemExit(f"analyze-file: {args.source} has no data rows")
+    if "metric_type" not in cfg:
+        cfg["metric_type"] = core.infer_metric_type(first, schema.metric_col)
+    chunks = itertools.chain([first], chunks)
+    analyzer = core.StreamingAnalyzer(schema, core.AnalysisConfig(**cfg))
+    for chunk in chunks:
+        analyzer.update(chunk)
+    result = dataclasses.asdict(analyzer.result())
+    result["groups"] = analyzer.groups
+    result["meta"]["seconds"] = round(time.perf_counter() - start, 3)
+    logger.info(json.dumps(result, ensure_ascii=False, default=lambda o: o.tolist() if hasattr(o, "tolist") else str(o)))
+
+
 def main(argv: List[str] | None = None) -> None:
     cfg_path = Path(__file__).resolve().parents[1] / "logging.yaml"
     if cfg_path.exists() and yaml is not None:
@@ -60,7 +271,50 @@ def main(argv: List[str] | None = None) -> None:
     )
     pa.set_defaults(func=_run_analysis)
 
+    pb = subparsers.add_parser("run-batch", help="Analyze many experiments in parallel")
+    pb.add_argument("--source", default="-", help="JSONL or CSV file with one experiment per line; '-' for stdin")
+    pb.add_argument(
+        "--input-format",
+        choices=["auto", "jsonl", "csv"],
+        default="auto",
+        help="Input format (auto: by file extension, JSONL for stdin)",
+    )
+    pb.add_argument("--output", default="-", help="JSONL results file; '-' for stdout")
+    pb.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count; 1 runs in-process)")
+    pb.add_argument("--chunk-size", type=int, default=64, help="Experiments per worker task")
+    pb.add_argument(
+        "--order",
+        choices=["input", "completed"],
+        default="input",
+        help="Emit results in input order or as they complete",
+    )
+    pb.set_defaults(func=_run_batch)
+
+    pf = subparsers.add_parser("analyze-file", help="Analyze a raw CSV/Parquet export in bounded-size chunks")
+    pf.add_argument("--source", required=True, help="CSV or Parquet file; '-' reads CSV from stdin")
+    pf.add_argument(
+        "--input-format",
+        choices=["auto", "csv", "parquet"],
+        default="auto",
+        help="Input format (auto: by file extension)",
+    )
+    pf.add_argument("--schema", required=True, help="DataSchema as JSON or @file.json")
+    pf.add_argument(
+        "--config",
+        default="{}",
+        help="AnalysisConfig as JSON or @file.json (alpha defaults to 0.05, metric_type is inferred)",
+    )
+    pf.add_argument("--chunk-rows", type=int, default=500_000, help="Rows read per chunk")
+    pf.add_argument(
+        "--aggregate",
+        action="store_true",
+        help="Rows are events: aggregate them per schema.user_id before the analysis",
+    )
+    pf.set_defaults(func=_analyze_file)
+
     args = parser.parse_args(argv)
+    if getattr(args, "aggregate", False) and not _json_arg(args.schema).get("user_id"):
+        pf.error("--aggregate needs a user_id in --schema")
     if hasattr(args, "func"):
         args.func(args)
     else:
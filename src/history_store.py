@@ -0,0 +1,233 @@
+"""Compact storage for analysis history and session states.
+
+Common result fields (p-value, effect, confidence interval, winner) are kept in
+typed ``history`` columns so the table can be read without parsing JSON. Text
+longer than :data:`INLINE_LIMIT` bytes is compressed into a BLOB column; for
+``history`` a truncated copy stays in ``result`` so listing and full-text search
+keep working. Compression uses zstd when ``zstandard`` is installed and zlib
+otherwise; :func:`decompress` recognises both from the frame header.
+
+:class:`RetentionPolicy` and :func:`maintain` drop old rows, compress legacy
+payloads and run ``VACUUM`` once enough pages are free.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+INLINE_LIMIT = 4096
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# first matching key wins; A/B/n results report the A vs B comparison
+_P_KEYS = ("p_value", "p_value_ab")
+_EFFECT_KEYS = ("effect", "effect_ab", "uplift", "uplift_ab")
+_CI_KEYS = ("ci", "ci_ab")
+
+
+def _zstd():
+    try:
+        import zstandard  # type: ignore
+    except ImportError:
+        return None
+    return zstandard
+
+
+def compress(text: str) -> bytes:
+    data = text.encode("utf-8")
+    zstd = _zstd()
+    if zstd is not None:
+        return zstd.ZstdCompressor(level=9).compress(data)
+    return zlib.compress(data, 9)
+
+
+def decompress(blob: bytes) -> str:
+    blob = bytes(blob)
+    if blob[:4] == _ZSTD_MAGIC:
+        zstd = _zstd()
+        if zstd is None:
+            raise RuntimeError("zstandard is required to read this payload")
+        return zstd.ZstdDecompressor().decompress(blob).decode("utf-8")
+    return zlib.decompress(blob).decode("utf-8")
+
+
+def pack(text: str, limit: int = INLINE_LIMIT) -> Tuple[str, Optional[bytes]]:
+    """Return ``(inline_text, blob)``: the text itself, or its head plus the compressed whole."""
+    if len(text.encode("utf-8")) <= limit:
+        return text, None
+    return text[: limit // 4], compress(text)
+
+
+def unpack(text: Optional[str], blob: Optional[bytes]) -> str:
+    return decompress(blob) if blob is not None else text or ""
+
+
+def _number(value: Any) -> Optional[float]:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return float(value)
+
+
+def summarize(content: Any) -> Dict[str, Any]:
+    """Structured history columns for a result; unknown fields are ``None``."""
+    out: Dict[str, Any] = dict.fromkeys(("p_value", "effect", "ci_low", "ci_high", "winner"))
+    if not isinstance(content, Mapping):
+        return out
+    out["p_value"] = next((_number(content[k]) for k in _P_KEYS if _number(content.get(k)) is not None), None)
+    out["effect"] = next((_number(content[k]) for k in _EFFECT_KEYS if _number(content.get(k)) is not None), None)
+    for key in _CI_KEYS:
+        ci = content.get(key)
+        if isinstance(ci, (list, tuple)) and len(ci) == 2:
+            out["ci_low"], out["ci_high"] = _number(ci[0]), _number(ci[1])
+            break
+    winner = content.get("winner")
+    out["winner"] = None if winner is None else str(winner)
+    return out
+
+
+def insert_history(conn: sqlite3.Connection, timestamp: str, test: str, content: Any) -> Tuple[int, str]:
+    """Insert an analysis result and return ``(id, result_text)``; the caller commits."""
+    if isinstance(content, Mapping):
+        text = json.dumps(content, ensure_ascii=False, default=str)
+    else:
+        text = str(content).replace("<pre>", "").replace("</pre>", "")
+    inline, blob = pack(text)
+    fields = summarize(content)
+    cur = conn.execute(
+        "INSERT INTO history(timestamp,test,result,payload,p_value,effect,ci_low,ci_high,winner) "
+        "VALUES(?,?,?,?,?,?,?,?,?)",
+        (timestamp, test, inline, blob, fields["p_value"], fields["effect"],
+         fields["ci_low"], fields["ci_high"], fields["winner"]),
+    )
+    return cur.lastrowid, inline
+
+
+def history_rows(conn: sqlite3.Connection):
+    """Yield ``(timestamp, test, full_result)`` in insertion order, for exports."""
+    for ts, test, result, payload in conn.execute(
+        "SELECT timestamp, test, result, payload FROM history ORDER BY id"
+    ):
+        yield ts, test, unpack(result, payload)
+
+
+def insert_state(conn: sqlite3.Connection, payload: Mapping[str, Any], timestamp: str) -> int:
+    """Insert a session state, compressing large ones; the caller commits."""
+    inline, blob = pack(json.dumps(payload, ensure_ascii=False))
+    cur = conn.execute(
+        "INSERT INTO session_states(payload, data, timestamp) VALUES(?,?,?)",
+        (None if blob is not None else inline, blob, timestamp),
+    )
+    return cur.lastrowid
+
+
+def load_state(conn: sqlite3.Connection, state_id: int) -> Optional[Dict[str, Any]]:
+    row = conn.execute("SELECT payload, data FROM session_states WHERE id=?", (state_id,)).fetchone()
+    if row is None:
+        return None
+    try:
+        data = json.loads(unpack(*row))
+    except Exception as e:
+        logger.debug("history_store: unreadable session state %s: %s", state_id, e)
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+@dataclass
+class RetentionPolicy:
+    """Limits applied by :func:`maintain`; ``None`` disables a limit."""
+
+    max_rows: Optional[int] = None
+    max_age_days: Optional[float] = None
+    vacuum_free_ratio: float = 0.25
+    vacuum_min_pages: int = 256
+
+    @classmethod
+    def from_config(cls, cfg: Any) -> "RetentionPolicy":
+        def opt(key: str, cast):
+            value = cfg.get(key)
+            return None if value in (None, "") else cast(value)
+
+        policy = cls(max_rows=opt("history_max_rows", int), max_age_days=opt("history_max_age_days", float))
+        ratio = opt("history_vacuum_free_ratio", float)
+        if ratio is not None:
+            policy.vacuum_free_ratio = ratio
+        return policy
+
+
+def apply_retention(conn: sqlite3.Connection, policy: RetentionPolicy, now: Optional[datetime] = None) -> int:
+    """Delete history rows beyond the policy limits; return how many.
+
+    Saved session states are left alone: they are restored explicitly by id,
+    and their count has nothing to do with how many results are kept.
+    """
+    deleted = 0
+    if policy.max_age_days is not None:
+        cutoff = ((now or datetime.now()) - timedelta(days=policy.max_age_days)).isoformat(timespec="seconds")
+        # only ISO timestamps compare correctly as text; older free-form ones are kept
+        deleted += conn.execute(
+            "DELETE FROM history WHERE timestamp GLOB '[0-9][0-9][0-9][0-9]-*' AND timestamp < ?",
+            (cutoff,),
+        ).rowcount
+    if policy.max_rows is not None:
+        deleted += conn.execute(
+            "DELETE FROM history WHERE id <= (SELECT id FROM history ORDER BY id DESC LIMIT 1 OFFSET ?)",
+            (policy.max_rows,),
+        ).rowcount
+    conn.commit()
+    return deleted
+
+
+def compress_legacy(conn: sqlite3.Connection, batch: int = 500) -> int:
+    """Move oversized rows written before compression into the BLOB columns."""
+    moved = 0
+    rows = conn.execute(
+        "SELECT id, result FROM history WHERE payload IS NULL AND length(CAST(result AS BLOB)) > ? LIMIT ?",
+        (INLINE_LIMIT, batch),
+    ).fetchall()
+    for rec_id, result in rows:
+        inline, blob = pack(result)
+        conn.execute("UPDATE history SET result=?, payload=? WHERE id=?", (inline, blob, rec_id))
+    moved += len(rows)
+    rows = conn.execute(
+        "SELECT id, payload FROM session_states WHERE data IS NULL AND length(CAST(payload AS BLOB)) > ? LIMIT ?",
+        (INLINE_LIMIT, batch),
+    ).fetchall()
+    conn.executemany(
+        "UPDATE session_states SET payload=NULL, data=? WHERE id=?",
+        [(compress(payload), state_id) for state_id, payload in rows],
+    )
+    moved += len(rows)
+    conn.commit()
+    return moved
+
+
+def vacuum_if_fragmented(conn: sqlite3.Connection, policy: RetentionPolicy) -> bool:
+    """Run ``VACUUM`` when free pages exceed the policy ratio; return whether it ran."""
+    pages = conn.execute("PRAGMA page_count").fetchone()[0]
+    free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    if pages < policy.vacuum_min_pages or free < pages * policy.vacuum_free_ratio:
+        return False
+    conn.commit()
+    conn.execute("VACUUM")
+    return True
+
+
+def maintain(conn: sqlite3.Connection, policy: RetentionPolicy) -> Dict[str, Any]:
+    """Apply retention, compress legacy payloads and vacuum if worthwhile."""
+    stats = {
+        "deleted": apply_retention(conn, policy),
+        "compressed": compress_legacy(conn),
+        "vacuumed": vacuum_if_fragmented(conn, policy),
+    }
+    try:
+        conn.execute("PRAGMA optimize")
+    except sqlite3.DatabaseError as e:
+        logger.debug("history_store: PRAGMA optimize failed: %s", e)
+    return stats
@@ -21,6 +21,8 @@ except Exception:  # pragma: no cover - fallback stub
             return self
         def inc(self, amount=1):
             pass
+        def observe(self, amount):
+            pass
         def time(self):
             return _Timer()
 
@@ -32,16 +34,18 @@ except Exception:  # pragma: no cover - fallback stub
 
 import functools
 
-def _get_or_create(metric_cls, name: str, documentation: str, labelnames: list[str]):
+from abtest_core.profiling import add_listener
+
+def _get_or_create(metric_cls, name: str, documentation: str, labelnames: list[str], **kwargs):
     """Return existing Prometheus metric or create a new one."""
     registry = globals().get("REGISTRY")
     if not registry:
-        return metric_cls(name, documentation, labelnames)
+        return metric_cls(name, documentation, labelnames, **kwargs)
     try:
         metric = registry._names_to_collectors.get(name)  # type: ignore[attr-defined]
         if metric:
             return metric
-        return metric_cls(name, documentation, labelnames)
+        return metric_cls(name, documentation, labelnames, **kwargs)
     except Exception:
         return registry._names_to_collectors.get(name)  # type: ignore[attr-defined]
 
@@ -70,3 +74,29 @@ def track_time(func):
             return func(*args, **kwargs)
 
     return wrapper
+
+
+STAGE_DURATION = _get_or_create(
+    Histogram,
+    "analysis_stage_seconds",
+    "Time spent in analyze_groups stages",
+    ["stage"],
+)
+
+STAGE_ROWS = _get_or_create(
+    Histogram,
+    "analysis_stage_rows",
+    "Input rows processed by analyze_groups stages",
+    ["stage"],
+    buckets=(1e2, 1e3, 1e4, 1e5, 1e6, 1e7, 1e8, float("inf")),
+)
+
+
+def observe_stage(stage: str, seconds: float, attrs: dict) -> None:
+    """Profiling listener feeding STAGE_DURATION and STAGE_ROWS."""
+    STAGE_DURATION.labels(stage).observe(seconds)
+    if "n" in attrs:
+        STAGE_ROWS.labels(stage).observe(attrs["n"])
+
+
+add_listener(observe_stage)
@@ -19,6 +19,31 @@ def _get_db_path(conn: sqlite3.Connection) -> str:
         return ""
 
 
+# columns added by revision 0004; JSON results are backfilled once
+_STRUCTURED_COLUMNS = {
+    "history": [
+        ("p_value", "REAL"),
+        ("effect", "REAL"),
+        ("ci_low", "REAL"),
+        ("ci_high", "REAL"),
+        ("winner", "TEXT"),
+        ("payload", "BLOB"),
+    ],
+    "session_states": [("data", "BLOB")],
+}
+
+_BACKFILL = """
+UPDATE history SET
+    p_value = coalesce(json_extract(result, '$.p_value'), json_extract(result, '$.p_value_ab')),
+    effect = coalesce(json_extract(result, '$.effect'), json_extract(result, '$.effect_ab'),
+                      json_extract(result, '$.uplift'), json_extract(result, '$.uplift_ab')),
+    ci_low = coalesce(json_extract(result, '$.ci[0]'), json_extract(result, '$.ci_ab[0]')),
+    ci_high = coalesce(json_extract(result, '$.ci[1]'), json_extract(result, '$.ci_ab[1]')),
+    winner = json_extract(result, '$.winner')
+WHERE json_valid(result) AND json_type(result) = 'object'
+"""
+
+
 def run_migrations(db: Union[str, sqlite3.Connection]) -> None:
     """Upgrade DB schema to the latest revision.
 
@@ -37,9 +62,11 @@ def run_migrations(db: Union[str, sqlite3.Connection]) -> None:
     try:
         from alembic.config import Config
         from alembic import command
-
+    except ImportError:
+        Config = None  # type: ignore
+    try:
         cfg_path = Path(__file__).resolve().parent.parent / "alembic.ini"
-        if cfg_path.exists():
+        if Config is not None and cfg_path.exists():
             cfg = Config(str(cfg_path))
             cfg.set_main_option("script_location", str(cfg_path.parent / "alembic"))
             cfg.set_main_option("sqlalchemy.url", f"sqlite:///{path}")
@@ -55,6 +82,7 @@ def run_migrations(db: Union[str, sqlite3.Connection]) -> None:
 
     # Fallback direct table creation
     cur = conn.cursor()
+    backfill = False
     cur.execute(
         """
         CREATE TABLE IF NOT EXISTS flags (
@@ -83,6 +111,66 @@ def run_migrations(db: Union[str, sqlite3.Connection]) -> None:
         )
         """
     )
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            status TEXT NOT NULL,
+            payload TEXT,
+            result TEXT,
+            error TEXT,
+            progress REAL NOT NULL DEFAULT 0,
+            timeout REAL,
+            cancel_requested INTEGER NOT NULL DEFAULT 0,
+            created_at REAL NOT NULL,
+            started_at REAL,
+            finished_at REAL
+        )
+        """
+    )
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS ix_jobs_status_created ON jobs(status, created_at)"
+    )
+    cur.execute("CREATE INDEX IF NOT EXISTS ix_history_timestamp ON history(timestamp)")
+    cur.execute("CREATE INDEX IF NOT EXISTS ix_history_test ON history(test)")
+    has_fts = cur.execute(
+        "SELECT 1 FROM sqlite_master WHERE name='history_fts'"
+    ).fetchone()
+    if not has_fts:
+        try:
+            cur.executescript(
+                """
+                CREATE VIRTUAL TABLE history_fts USING fts5(
+                    test, result, content='history', content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2'
+                );
+                CREATE TRIGGER history_fts_ai AFTER INSERT ON history BEGIN
+                    INSERT INTO history_fts(rowid, test, result) VALUES (new.id, new.test, new.result);
+                END;
+                CREATE TRIGGER history_fts_ad AFTER DELETE ON history BEGIN
+                    INSERT INTO history_fts(history_fts, rowid, test, result)
+                    VALUES ('delete', old.id, old.test, old.result);
+                END;
+                CREATE TRIGGER history_fts_au AFTER UPDATE ON history BEGIN
+                    INSERT INTO history_fts(history_fts, rowid, test, result)
+                    VALUES ('delete', old.id, old.test, old.result);
+                    INSERT INTO history_fts(rowid, test, result) VALUES (new.id, new.test, new.result);
+                END;
+                INSERT INTO history_fts(history_fts) VALUES ('rebuild');
+                """
+            )
+        except sqlite3.OperationalError as e:
+            logger.debug("migrations_runner: FTS5 unavailable, history search uses LIKE: %s", e)
+    for table, columns in _STRUCTURED_COLUMNS.items():
+        existing = {row[1] for row in cur.execute(f"PRAGMA table_info({table})")}
+        for name, type_ in columns:
+            if name not in existing:
+                cur.execute(f"ALTER TABLE {table} ADD COLUMN {name} {type_}")
+                if table == "history" and name == "p_value":
+                    backfill = True
+    if backfill:
+        cur.execute(_BACKFILL)
     conn.commit()
     if not isinstance(db, sqlite3.Connection):
         conn.close()
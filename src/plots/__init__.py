@@ -7,6 +7,7 @@ import plotly.graph_objects as go
 from stats.ab_test import norm
 
 from stats.ab_test import required_sample_size, bayesian_analysis, pocock_alpha_curve
+from abtest_core.utils import check_cancelled
 
 
 def plot_bayesian_posterior(alpha_prior, beta_prior, users_a, conv_a, users_b, conv_b):
@@ -65,13 +66,23 @@ def plot_power_curve(p1, alpha, power):
     return fig
 
 
-def plot_bootstrap_distribution(users_a, conv_a, users_b, conv_b, iterations=5000):
-    """Возвращает Plotly-гистограмму бутстрап-разницы (B−A)."""
+def plot_bootstrap_distribution(users_a, conv_a, users_b, conv_b, iterations=5000, *, cancel=None, progress=None):
+    """Возвращает Plotly-гистограмму бутстрап-разницы (B−A).
+
+    ``cancel`` и ``progress`` проверяются между пачками по 1000 итераций.
+    """
     cr_a = conv_a / users_a
     cr_b = conv_b / users_b
-    samp_a = np.random.binomial(users_a, cr_a, size=iterations) / users_a
-    samp_b = np.random.binomial(users_b, cr_b, size=iterations) / users_b
-    diffs = samp_b - samp_a
+    parts = []
+    for start in range(0, iterations, 1000):
+        check_cancelled(cancel)
+        size = min(1000, iterations - start)
+        samp_a = np.random.binomial(users_a, cr_a, size=size) / users_a
+        samp_b = np.random.binomial(users_b, cr_b, size=size) / users_b
+        parts.append(samp_b - samp_a)
+        if progress is not None:
+            progress(start + size, iterations)
+    diffs = np.concatenate(parts)
 
     fig = go.Figure()
     fig.add_trace(go.Histogram(x=diffs, nbinsx=50, histnorm='probability', hovertemplate='%{x:.2%}<br>%{y:.1%}<extra></extra>'))
@@ -1,3 +1,14 @@
+"""Cumulative conversion curves built from time-bucketed aggregates.
+
+Rows are reduced to conversions and observations per group and time bucket
+(daily or hourly) before the cumulative sums are taken, so the figure depends
+on the number of buckets, not rows. Series longer than ``max_points`` are
+downsampled with LTTB or min-max, and long traces use ``Scattergl``.
+:func:`plot_cumulative_effect` draws the effect, CI, p-value and sequential
+boundaries of every bucket from the same aggregates via
+:func:`abtest_core.timeseries.cumulative_series`.
+"""
+
 from __future__ import annotations
 
 try:
@@ -5,11 +16,61 @@ try:
 except Exception as e:  # pragma: no cover - optional dependency
     raise ImportError("pandas is required for cumulative plots") from e
 
+import numpy as np
 import plotly.graph_objects as go
 
+from abtest_core.timeseries import cumulative_series
+
+from .downsample import lttb, minmax
+
+# traces with more points than this are drawn with WebGL
+GL_THRESHOLD = 1000
+_FREQS = {"D": "D", "d": "D", "day": "D", "H": "h", "h": "h", "hour": "h"}
+
+
+def bucket_conversions(data: pd.DataFrame, freq: str = "D") -> pd.DataFrame:
+    """Conversions and observations per ``group`` and ``date`` bucket.
+
+    Returns a frame with ``group``, ``date``, ``conversions`` and ``users``
+    columns sorted by group and date.
+    """
+    if freq not in _FREQS:
+        raise ValueError(f"freq должен быть одним из: {', '.join(sorted(_FREQS))}")
+    dates = data["date"]
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        try:
+            dates = pd.to_datetime(dates)
+        except Exception as e:
+            raise ValueError("Колонка date должна быть датой") from e
+    buckets = dates.dt.floor(_FREQS[freq])
+    grouped = data["conversion"].groupby([data["group"], buckets], sort=True)
+    out = grouped.agg(["sum", "count"]).reset_index()
+    out.columns = ["group", "date", "conversions", "users"]
+    return out
+
+
+def _reduce(x: np.ndarray, y: np.ndarray, max_points: int, method: str) -> np.ndarray:
+    if method == "lttb":
+        return lttb(x.astype("int64"), y, max_points)
+    if method == "minmax":
+        return minmax(y, max_points)
+    raise ValueError("method должен быть 'lttb' или 'minmax'")
+
 
-def plot_cumulative_conversion(data: pd.DataFrame) -> go.Figure:
-    """Return cumulative conversion curve by group using Plotly."""
+def plot_cumulative_conversion(
+    data: pd.DataFrame,
+    freq: str = "D",
+    max_points: int = 2000,
+    method: str = "lttb",
+) -> go.Figure:
+    """Return cumulative conversion curve by group using Plotly.
+
+    Args:
+        data: Rows with ``date``, ``group`` and ``conversion`` columns.
+        freq: Bucket size, ``"D"`` (daily) or ``"h"`` (hourly).
+        max_points: Upper bound on points per group trace (at least 4).
+        method: Downsampling for longer series, ``"lttb"`` or ``"minmax"``.
+    """
     required = {"date", "group", "conversion"}
     missing = required - set(data.columns)
     if missing:
@@ -18,26 +79,22 @@ def plot_cumulative_conversion(data: pd.DataFrame) -> go.Figure:
     if len(data) < 100:
         raise ValueError("Недостаточно данных для построения графика (минимум 100 строк)")
 
-    df = data.copy()
-    df = df.sort_values("date")
-
-    if not pd.api.types.is_datetime64_any_dtype(df["date"]):
-        try:
-            df["date"] = pd.to_datetime(df["date"])
-        except Exception as e:
-            raise ValueError("Колонка date должна быть датой") from e
-
-    df["conv_cum"] = df.groupby("group")["conversion"].cumsum()
-    df["obs_cum"] = df.groupby("group").cumcount() + 1
-    df["cr"] = df["conv_cum"] / df["obs_cum"]
+    agg = bucket_conversions(data, freq)
+    max_points = max(int(max_points), 4)
 
     fig = go.Figure()
-    for grp, gdf in df.groupby("group"):
+    for grp, gdf in agg.groupby("group", sort=True):
+        x = gdf["date"].to_numpy()
+        cr = (gdf["conversions"].cumsum() / gdf["users"].cumsum()).to_numpy(dtype=float)
+        if len(x) > max_points:
+            keep = _reduce(x, cr, max_points, method)
+            x, cr = x[keep], cr[keep]
+        trace = go.Scattergl if len(x) > GL_THRESHOLD else go.Scatter
         fig.add_trace(
-            go.Scatter(
-                x=gdf["date"],
-                y=gdf["cr"],
-                mode="lines+markers",
+            trace(
+                x=x,
+                y=cr,
+                mode="lines" if len(x) > 200 else "lines+markers",
                 name=str(grp),
             )
         )
@@ -52,3 +109,75 @@ def plot_cumulative_conversion(data: pd.DataFrame) -> go.Figure:
     )
 
     return fig
+
+
+def plot_cumulative_effect(
+    data: pd.DataFrame,
+    control=None,
+    treatment=None,
+    freq: str = "D",
+    alpha: float = 0.05,
+    preset: str = "obf",
+    looks: int | None = None,
+    max_points: int = 2000,
+) -> go.Figure:
+    """Return effect with CI, p-value and sequential boundaries over time.
+
+    Args:
+        data: Rows with ``date``, ``group`` and ``conversion`` columns.
+        control, treatment: Groups to compare; default to the first two.
+        freq: Bucket size, ``"D"`` (daily) or ``"h"`` (hourly); every bucket is a look.
+        alpha: Significance level for the CI and the alpha-spending plan.
+        preset: ``"obf"`` or ``"pocock"`` boundaries.
+        looks: Planned number of looks; defaults to the number of buckets.
+        max_points: Upper bound on points per trace (at least 4).
+    """
+    required = {"date", "group", "conversion"}
+    missing = required - set(data.columns)
+    if missing:
+        raise ValueError(f"Отсутствуют обязательные колонки: {', '.join(sorted(missing))}")
+
+    series = cumulative_series(
+        bucket_conversions(data, freq),
+        control,
+        treatment,
+        alpha=alpha,
+        preset=preset,
+        looks=looks,
+    )
+    max_points = max(int(max_points), 4)
+    keep = np.flatnonzero(~np.isnan(series.effect))
+    if len(keep) > max_points:
+        keep = keep[lttb(keep, series.effect[keep], max_points)]
+    x = series.dates[keep]
+    trace = go.Scattergl if len(x) > GL_THRESHOLD else go.Scatter
+    bound = series.bound[keep]
+    label = f"{series.treatment} − {series.control}"
+
+    fig = go.Figure()
+    fig.add_trace(trace(x=x, y=series.ci_high[keep], mode="lines", line=dict(width=0), showlegend=False))
+    fig.add_trace(
+        trace(
+            x=x,
+            y=series.ci_low[keep],
+            mode="lines",
+            line=dict(width=0),
+            fill="tonexty",
+            name=f"{1 - alpha:.0%} CI",
+        )
+    )
+    fig.add_trace(trace(x=x, y=series.effect[keep], mode="lines", name=label))
+    fig.add_trace(trace(x=x, y=bound, mode="lines", line=dict(dash="dash"), name=f"{series.preset} boundary"))
+    fig.add_trace(trace(x=x, y=-bound, mode="lines", line=dict(dash="dash"), showlegend=False))
+    fig.add_trace(trace(x=x, y=series.p_value[keep], mode="lines", yaxis="y2", name="p-value"))
+
+    fig.update_layout(
+        title="Cumulative Effect",
+        xaxis_title="Date",
+        yaxis_title="Effect",
+        yaxis2=dict(title="p-value", overlaying="y", side="right", range=[0, 1]),
+        hovermode="x unified",
+        margin=dict(l=40, r=40, t=50, b=40),
+    )
+
+    return fig
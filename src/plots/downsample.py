@@ -0,0 +1,58 @@
+"""Reduce long series to a bounded number of points before plotting.
+
+Both reducers return sorted indices into the input, always keeping the first
+and last points, so several aligned arrays can be sliced with the same result.
+Budgets too small for the method keep just those two points.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+
+def lttb(x, y, n_out: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: keep the visually dominant point per bucket.
+
+    ``x`` must be numeric and increasing (convert datetimes with
+    ``.astype("int64")``).
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        return np.array([0, n - 1])
+    edges = np.floor(np.linspace(1, n - 1, n_out - 1)).astype(np.int64)
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            nxt = slice(edges[i + 1], edges[i + 2])
+        else:
+            nxt = slice(n - 1, n)
+        avg_x, avg_y = x[nxt].mean(), y[nxt].mean()
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+
+def minmax(y, n_out: int) -> np.ndarray:
+    """Keep the minimum and maximum of each of ``n_out // 2`` equal-width index bins."""
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 4:
+        return np.array([0, n - 1])
+    n_bins = (n_out - 2) // 2
+    bins = np.arange(n) * n_bins // n
+    order = np.lexsort((y, bins))
+    starts = np.flatnonzero(np.r_[True, bins[order][1:] != bins[order][:-1]])
+    ends = np.r_[starts[1:], n] - 1
+    return np.unique(np.r_[0, order[starts], order[ends], n - 1])
@@ -1,43 +1,85 @@
-"""Utility to automatically load optional plugins."""
+"""Lazy registry of optional plugins.
+
+Plugins are declared in ``plugins/manifest.json``::
+
+    {"plugins": {"bayesian": {"module": "plugins.bayesian",
+                              "provides": ["bayesian_analysis"]}}}
+
+Reading the registry never imports plugin code: a plugin module is imported
+on the first :func:`get_plugin` call for it and cached, including failed
+imports, which are logged once. Without a manifest every module in
+``plugins/`` is registered under its file name, still imported lazily.
+"""
 import importlib
+import json
 import logging
 import os
 import sys
 from types import ModuleType
-from typing import Dict
+from typing import Any, Dict, List, Optional
 
 ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 PLUGIN_DIR = os.path.join(ROOT_DIR, 'plugins')
+MANIFEST = os.path.join(PLUGIN_DIR, 'manifest.json')
 
 if ROOT_DIR not in sys.path:
     sys.path.insert(0, ROOT_DIR)
 
-_loaded: Dict[str, ModuleType] = {}
+_loaded: Dict[str, Optional[ModuleType]] = {}
+_registry: Optional[Dict[str, Dict[str, Any]]] = None
 logger = logging.getLogger(__name__)
 
 
-def load_plugins() -> None:
-    """Import all plugin modules from :mod:`plugins` if available."""
-    if not os.path.isdir(PLUGIN_DIR):
-        return
-    for fname in os.listdir(PLUGIN_DIR):
-        if not fname.endswith('.py') or fname.startswith('_'):
-            continue
-        name = fname[:-3]
-        mod_name = f'plugins.{name}'
-        if name in _loaded:
-            continue
+def _read_registry() -> Dict[str, Dict[str, Any]]:
+    global _registry
+    if _registry is not None:
+        return _registry
+    entries: Dict[str, Dict[str, Any]] = {}
+    if os.path.isfile(MANIFEST):
         try:
-            mod = importlib.import_module(mod_name)
-        except Exception as exc:  # pragma: no cover - optional plugins may fail
-            logger.warning("Failed to import plugin %s: %s", mod_name, exc)
-            continue
-        _loaded[name] = mod
+            with open(MANIFEST, 'r', encoding='utf-8') as f:
+                declared = json.load(f).get('plugins', {})
+        except (OSError, ValueError) as exc:
+            logger.warning("Failed to read plugin manifest %s: %s", MANIFEST, exc)
+            declared = {}
+        for name, entry in declared.items():
+            entries[name] = {'module': f'plugins.{name}', **entry}
+    elif os.path.isdir(PLUGIN_DIR):
+        for fname in sorted(os.listdir(PLUGIN_DIR)):
+            if fname.endswith('.py') and not fname.startswith('_'):
+                entries[fname[:-3]] = {'module': f'plugins.{fname[:-3]}'}
+    _registry = entries
+    return entries
+
+
+def available_plugins() -> List[str]:
+    """Names of registered plugins; does not import them."""
+    return sorted(_read_registry())
+
+
+def plugin_info(name: str) -> Optional[Dict[str, Any]]:
+    """Manifest entry of plugin ``name`` or ``None`` if it is not registered."""
+    entry = _read_registry().get(name)
+    return dict(entry) if entry is not None else None
 
 
 def get_plugin(name: str) -> ModuleType | None:
-    """Return loaded plugin module by ``name``."""
-    return _loaded.get(name)
+    """Return plugin module ``name``, importing it on first use."""
+    if name in _loaded:
+        return _loaded[name]
+    entry = _read_registry().get(name)
+    if entry is None:
+        return None
+    try:
+        mod: Optional[ModuleType] = importlib.import_module(entry['module'])
+    except Exception as exc:  # pragma: no cover - optional plugins may fail
+        logger.warning("Failed to import plugin %s: %s", entry['module'], exc)
+        mod = None
+    _loaded[name] = mod
+    return mod
 
 
-load_plugins()
+def load_plugins() -> None:
+    """Import every registered plugin now, e.g. to surface errors at startup."""
+    for name in available_plugins():
+        get_plugin(name)
@@ -1,7 +1,8 @@
+import functools
 import math
 import types
 # ruff: noqa: E402, E401, E702
-from typing import List, Optional
+from typing import Dict, List, Mapping, Optional, Sequence
 import logging
 import os
 import sys
@@ -15,31 +16,63 @@ if SRC_DIR not in sys.path:
 from metrics import track_time
 import plugin_loader
 from abtest_core.srm import srm_check, SrmCheckFailed
+from abtest_core.cuped import RegressionAdjustment, estimate_theta
+from abtest_core.utils import ProgressCallback, check_cancelled
 
 logger = logging.getLogger(__name__)
 
-try:
-    import numpy as np
-except Exception:
-    np = types.SimpleNamespace(
-        linspace=lambda a,b,n:[a+(b-a)*i/(n-1) for i in range(n)],
-        random=types.SimpleNamespace(binomial=lambda *a,**k:[0], randint=lambda a,b=None:0, random=lambda:0.0),
-        argmax=lambda arr:max(range(len(arr)), key=lambda i: arr[i]),
-        trapz=lambda y,x: sum((y[i]+y[i+1])*(x[i+1]-x[i])/2 for i in range(len(y)-1))
-    )
-try:
-    from scipy.stats import norm, beta, chi2
-except Exception:
-    import statistics, math as _math
-    class _Norm:
-        ppf=staticmethod(lambda p: statistics.NormalDist().inv_cdf(p))
-        cdf=staticmethod(lambda x: statistics.NormalDist().cdf(x))
-    class _Beta:
-        pdf=staticmethod(lambda *a,**k: None)
-        cdf=staticmethod(lambda *a,**k: None)
-    class _Chi2:
-        cdf=staticmethod(lambda x, df: 1 - _math.exp(-x/2))
-    norm=_Norm(); beta=_Beta(); chi2=_Chi2()
+def _load_numpy():
+    try:
+        import numpy
+    except Exception:
+        return types.SimpleNamespace(
+            linspace=lambda a,b,n:[a+(b-a)*i/(n-1) for i in range(n)],
+            random=types.SimpleNamespace(binomial=lambda *a,**k:[0], randint=lambda a,b=None:0, random=lambda:0.0),
+            argmax=lambda arr:max(range(len(arr)), key=lambda i: arr[i]),
+            trapz=lambda y,x: sum((y[i]+y[i+1])*(x[i+1]-x[i])/2 for i in range(len(y)-1))
+        )
+    return numpy
+
+
+@functools.lru_cache(maxsize=1)
+def _load_distributions():
+    try:
+        from scipy.stats import norm, beta, chi2
+    except Exception:
+        import statistics, math as _math
+        class _Norm:
+            ppf=staticmethod(lambda p: statistics.NormalDist().inv_cdf(p))
+            cdf=staticmethod(lambda x: statistics.NormalDist().cdf(x))
+        class _Beta:
+            pdf=staticmethod(lambda *a,**k: None)
+            cdf=staticmethod(lambda *a,**k: None)
+        class _Chi2:
+            cdf=staticmethod(lambda x, df: 1 - _math.exp(-x/2))
+        norm=_Norm(); beta=_Beta(); chi2=_Chi2()
+    return {"norm": norm, "beta": beta, "chi2": chi2}
+
+
+class _Deferred:
+    """Stand-in resolving to the real object on first attribute access.
+
+    Keeps NumPy and SciPy (about a second of imports) off the import path of
+    the CLI and API workers until a function actually needs them.
+    """
+
+    def __init__(self, load):
+        self._load = load
+        self._target = None
+
+    def __getattr__(self, name):
+        if self._target is None:
+            self._target = self._load()
+        return getattr(self._target, name)
+
+
+np = _Deferred(_load_numpy)
+norm = _Deferred(lambda: _load_distributions()["norm"])
+beta = _Deferred(lambda: _load_distributions()["beta"])
+chi2 = _Deferred(lambda: _load_distributions()["chi2"])
 
 from webhooks import send_webhook
 
@@ -181,33 +214,53 @@ def _evaluate_abn_test(
     return res
 
 
-_bayes_plug = plugin_loader.get_plugin("bayesian")
-
-
 @track_time
 def bayesian_analysis(alpha_prior: float, beta_prior: float, users_a: int, conv_a: int, users_b: int, conv_b: int):
     """Bayesian A/B analysis delegated to plugin if available."""
+    _bayes_plug = plugin_loader.get_plugin("bayesian")
     if _bayes_plug and hasattr(_bayes_plug, "bayesian_analysis"):
         return _bayes_plug.bayesian_analysis(alpha_prior, beta_prior, users_a, conv_a, users_b, conv_b)
     raise ImportError("Bayesian analysis plugin not available")
 
 
 @track_time
-def run_aa_simulation(baseline: float, total_users: int, alpha: float, num_sim: int = 1000) -> float:
-    """A/A симуляция, возвращает фактический FPR."""
+def run_aa_simulation(
+    baseline: float,
+    total_users: int,
+    alpha: float,
+    num_sim: int = 1000,
+    *,
+    batch_size: int = 250,
+    cancel=None,
+    progress: Optional[ProgressCallback] = None,
+) -> float:
+    """A/A симуляция, возвращает фактический FPR.
+
+    Симуляции идут пачками по ``batch_size``: между пачками проверяется
+    ``cancel`` (:class:`threading.Event`) и вызывается ``progress(done, total)``.
+    """
+    if num_sim <= 0:
+        raise ValueError("Количество симуляций должно быть >0")
     ua = total_users // 2
     ub = total_users - ua
 
-    ca = np.random.binomial(ua, baseline, size=num_sim)
-    cb = np.random.binomial(ub, baseline, size=num_sim)
-
-    cr_a = ca / ua
-    cr_b = cb / ub
-    pooled = (ca + cb) / (ua + ub)
-    se = np.sqrt(pooled * (1 - pooled) * (1 / ua + 1 / ub))
-    z = np.divide(cr_b - cr_a, se, out=np.zeros_like(cr_a, dtype=float), where=se > 0)
-    p_vals = 2 * (1 - norm.cdf(np.abs(z)))
-    return float(np.mean(p_vals < alpha))
+    rejected = 0
+    for start in range(0, num_sim, batch_size):
+        check_cancelled(cancel)
+        size = min(batch_size, num_sim - start)
+        ca = np.random.binomial(ua, baseline, size=size)
+        cb = np.random.binomial(ub, baseline, size=size)
+
+        cr_a = ca / ua
+        cr_b = cb / ub
+        pooled = (ca + cb) / (ua + ub)
+        se = np.sqrt(pooled * (1 - pooled) * (1 / ua + 1 / ub))
+        z = np.divide(cr_b - cr_a, se, out=np.zeros_like(cr_a, dtype=float), where=se > 0)
+        p_vals = 2 * (1 - norm.cdf(np.abs(z)))
+        rejected += int(np.sum(p_vals < alpha))
+        if progress is not None:
+            progress(start + size, num_sim)
+    return rejected / num_sim
 
 
 @track_time
@@ -343,16 +396,33 @@ def calculate_roi(rpu: float, cost: float, budget: float, baseline_cr: float, up
 
 def cuped_adjustment(x: List[float], covariate: List[float]):
     """Return CUPED-adjusted metric array."""
-    x = [float(v) for v in x]
-    c = [float(v) for v in covariate]
-    mean_x = sum(x) / len(x)
-    mean_c = sum(c) / len(c)
-    cov = sum((xi - mean_x) * (ci - mean_c) for xi, ci in zip(x, c)) / (len(x) - 1)
-    var_c = sum((ci - mean_c) ** 2 for ci in c) / (len(c) - 1)
-    if var_c == 0:
-        return x
-    theta = cov / var_c
-    return [xi - theta * ci for xi, ci in zip(x, c)]
+    x = np.asarray(x, dtype=float)
+    c = np.asarray(covariate, dtype=float)
+    theta = estimate_theta(c, x)["theta"]
+    return x - theta * c
+
+
+def cuped_adjust_groups(
+    metrics: Mapping[str, Sequence[float]],
+    covariates: Mapping[str, Sequence[float]],
+) -> Dict[str, "np.ndarray"]:
+    """CUPED-adjust per-group metric arrays with one pooled theta.
+
+    Theta is estimated once on all groups together and the covariate is
+    centered on the pooled mean, so group differences are preserved while
+    variance shrinks. Returns adjusted float arrays keyed like ``metrics``.
+    """
+    names = [g for g in metrics if g in covariates]
+    adjuster = RegressionAdjustment()
+    for g in names:
+        adjuster.update(metrics[g], covariates[g])
+    if adjuster.n < 2:
+        return {g: np.asarray(metrics[g], dtype=float) for g in names}
+    fit = adjuster.fit()
+    return {
+        g: adjuster.transform(metrics[g], covariates[g], fit["theta"], fit["mean_x"])
+        for g in names
+    }
 
 
 def pocock_alpha_curve(alpha: float, looks: int):
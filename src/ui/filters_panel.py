@@ -1,7 +1,10 @@
-"""UI panel for dataset filtering and live metric updates."""
+"""UI panel for dataset filtering and live metric updates.
 
-from typing import Any, Dict, List
-import re
+Counts come from a :class:`abtest_core.slicing.SliceIndex` built once over the
+records, so each filter change costs a few bitmap ANDs rather than a rescan.
+"""
+
+from typing import Any, Dict, List, Tuple
 
 from abtest_core.utils import lazy_import
 
@@ -38,6 +41,7 @@ except Exception:  # pragma: no cover - allow running tests without PyQt
         return None
 
 from utils import segment_data
+from .widgets import Debouncer
 
 
 class FiltersPanel(QWidget):
@@ -46,14 +50,15 @@ class FiltersPanel(QWidget):
     metrics_updated = pyqtSignal(dict)
 
     def __init__(
-        self, records: List[Dict[str, Any]], parent: QWidget | None = None
+        self, records: Any, parent: QWidget | None = None
     ) -> None:
         super().__init__(parent)
         self._records = records
-        try:  # Optional dependency used for query filtering
-            pd = lazy_import("pandas")
-        except Exception:  # pragma: no cover - allow running without pandas
-            pd = None  # type: ignore
+        try:  # slicing needs NumPy and pandas; plain records are scanned without them
+            slicing = lazy_import("abtest_core.slicing")
+            self._index = slicing.SliceIndex(records)
+        except ImportError:  # pragma: no cover - pandas missing
+            self._index = None
 
         self.device_combo = QComboBox()
         self.country_combo = QComboBox()
@@ -67,26 +72,22 @@ class FiltersPanel(QWidget):
         self.utm_edit.setPlaceholderText("utm_campaign")
         self.trait_edit.setPlaceholderText("custom trait=value")
 
-        if pd is not None and hasattr(pd, "DataFrame"):
-            try:
-                self._df = pd.DataFrame(records)  # type: ignore[attr-defined]
-            except Exception:  # pragma: no cover - fall back if malformed
-                self._df = None
-        else:  # pragma: no cover - pandas missing
-            self._df = None
-
         self._init_values()
         self._build_ui()
         self._connect_signals()
         self._recalculate()
 
     def _init_values(self) -> None:
-        devices = sorted(
-            {r.get("device", "") for r in self._records if r.get("device")}
-        )
-        countries = sorted(
-            {r.get("country", "") for r in self._records if r.get("country")}
-        )
+        if self._index is not None:
+            devices = sorted(str(v) for v in self._index.values("device") if v != "")
+            countries = sorted(str(v) for v in self._index.values("country") if v != "")
+        else:
+            devices = sorted(
+                {r.get("device", "") for r in self._records if r.get("device")}
+            )
+            countries = sorted(
+                {r.get("country", "") for r in self._records if r.get("country")}
+            )
         self.device_combo.addItems(devices)
         self.country_combo.addItems(countries)
 
@@ -108,45 +109,16 @@ class FiltersPanel(QWidget):
         layout.addWidget(row("Trait", self.trait_edit))
 
     def _connect_signals(self) -> None:
+        # the signals pass the new text; _recalculate reads every widget itself
+        self._recalc_debounce = Debouncer(lambda *_: self._recalculate(), 150, self)
         for combo in (self.device_combo, self.country_combo):
             if hasattr(combo, "currentTextChanged"):
-                combo.currentTextChanged.connect(self._recalculate)  # type: ignore
+                combo.currentTextChanged.connect(self._recalc_debounce)  # type: ignore
         for edit in (self.utm_edit, self.trait_edit):
             if hasattr(edit, "textChanged"):
-                edit.textChanged.connect(self._recalculate)  # type: ignore
-
-    def _apply_df_filters(self, filters: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Return ``records`` subset using ``pandas.DataFrame.query``."""
-
-        if self._df is None or not filters:
-            return self._records
-
-        conditions = []
-        local_vars: Dict[str, Any] = {}
-        for i, (key, value) in enumerate(filters.items()):
-            if key not in self._df.columns:
-                continue
-            if not re.fullmatch(r"\w+", key):
-                continue
-            if isinstance(value, str) and re.search(r"[\"';]", value):
-                # basic sanitation for unsafe characters
-                continue
-            var = f"val{i}"
-            local_vars[var] = value
-            conditions.append(f"`{key}` == @{var}")
-
-        if not conditions:
-            return self._records
-
-        query_str = " and ".join(conditions)
-        try:
-            df_subset = self._df.query(query_str, local_dict=local_vars)
-        except Exception:  # pragma: no cover - invalid query
-            return []
-        return df_subset.to_dict("records")
+                edit.textChanged.connect(self._recalc_debounce)  # type: ignore
 
-    # ----- metric calculations -----
-    def _recalculate(self) -> None:
+    def _filters(self) -> Dict[str, Any]:
         filters: Dict[str, Any] = {}
         dev = self.device_combo.currentText()
         if dev:
@@ -164,25 +136,32 @@ class FiltersPanel(QWidget):
             val = val.strip()
             if key and val:
                 filters[key] = val
+        return filters
 
-        if self._df is not None:
-            subset = self._apply_df_filters(filters)
+    # ----- metric calculations -----
+    def _recalculate(self) -> None:
+        filters = self._filters()
+        if self._index is not None:
+            counts = self._index.counts(filters)
         else:
-            subset = segment_data(self._records, **filters)
-
-        stats = self._calc_metrics(subset)
+            counts = self._count_records(segment_data(self._records, **filters))
+        stats = self._calc_metrics(counts)
         if callable(self.metrics_updated):
             self.metrics_updated.emit(stats)  # type: ignore
 
-    def _calc_metrics(self, subset: List[Dict[str, Any]]) -> Dict[str, Any]:
+    @staticmethod
+    def _count_records(subset: List[Dict[str, Any]]) -> Dict[Any, Tuple[int, int]]:
+        counts: Dict[Any, Tuple[int, int]] = {}
+        for r in subset:
+            users, conv = counts.get(r.get("group"), (0, 0))
+            counts[r.get("group")] = (users + 1, conv + bool(r.get("converted")))
+        return counts
+
+    def _calc_metrics(self, counts: Dict[Any, Tuple[int, int]]) -> Dict[str, Any]:
         stats_mod = lazy_import("stats.ab_test")
         evaluate_abn_test = stats_mod.evaluate_abn_test
-        group_a = [r for r in subset if r.get("group") == "A"]
-        group_b = [r for r in subset if r.get("group") == "B"]
-        users_a = len(group_a)
-        users_b = len(group_b)
-        conv_a = sum(1 for r in group_a if r.get("converted"))
-        conv_b = sum(1 for r in group_b if r.get("converted"))
+        users_a, conv_a = counts.get("A", (0, 0))
+        users_b, conv_b = counts.get("B", (0, 0))
         if users_a and users_b:
             res = evaluate_abn_test(users_a, conv_a, users_b, conv_b)
         else:
@@ -0,0 +1,434 @@
+"""Lazily paged Qt table model over the ``history`` table.
+
+Rows are fetched in pages with keyset pagination (``WHERE (key, id) > (?, ?)
+LIMIT ?``) over the ``history`` indexes, so opening the window costs one page
+regardless of how many analyses are stored. Filtering goes through the
+``history_fts`` full-text index when SQLite has FTS5, and ``LIKE`` otherwise.
+Inserts and deletes update the loaded rows in place instead of re-reading the
+table, and :class:`InlineChartDelegate` paints the result bar directly instead
+of creating a widget per row.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import sqlite3
+import zlib
+from datetime import datetime
+from enum import IntEnum, IntFlag
+from typing import Any, Iterable, List, Optional, Sequence, Set, Tuple
+
+try:
+    from PySide6.QtCore import QAbstractTableModel, QModelIndex, QRect, Qt
+    from PySide6.QtGui import QColor
+    from PySide6.QtWidgets import QStyledItemDelegate
+except Exception:
+    try:
+        from PyQt6.QtCore import QAbstractTableModel, QModelIndex, QRect, Qt
+        from PyQt6.QtGui import QColor
+        from PyQt6.QtWidgets import QStyledItemDelegate
+    except Exception:  # pragma: no cover - allow running tests without Qt
+
+        class QModelIndex:  # type: ignore
+            def __init__(self, row: int = -1, column: int = -1) -> None:
+                self._row = row
+                self._column = column
+
+            def row(self) -> int:
+                return self._row
+
+            def column(self) -> int:
+                return self._column
+
+            def isValid(self) -> bool:
+                return self._row >= 0 and self._column >= 0
+
+        class _Signal:
+            def connect(self, *a: Any, **k: Any) -> None:
+                pass
+
+            def emit(self, *a: Any, **k: Any) -> None:
+                pass
+
+        class QAbstractTableModel:  # type: ignore
+            dataChanged = _Signal()
+
+            def __init__(self, parent: Any = None) -> None:
+                pass
+
+            def index(self, row: int, column: int, parent: Any = None) -> QModelIndex:
+                return QModelIndex(row, column)
+
+            def beginResetModel(self) -> None:
+                pass
+
+            def endResetModel(self) -> None:
+                pass
+
+            def beginInsertRows(self, *a: Any) -> None:
+                pass
+
+            def endInsertRows(self) -> None:
+                pass
+
+            def beginRemoveRows(self, *a: Any) -> None:
+                pass
+
+            def endRemoveRows(self) -> None:
+                pass
+
+        class Qt:  # type: ignore
+            class ItemDataRole(IntEnum):
+                DisplayRole = 0
+                EditRole = 2
+                ToolTipRole = 3
+                CheckStateRole = 10
+                UserRole = 256
+
+            class CheckState(IntEnum):
+                Unchecked = 0
+                Checked = 2
+
+            class ItemFlag(IntFlag):
+                ItemIsSelectable = 1
+                ItemIsUserCheckable = 16
+                ItemIsEnabled = 32
+
+            class Orientation(IntEnum):
+                Horizontal = 1
+                Vertical = 2
+
+            class SortOrder(IntEnum):
+                AscendingOrder = 0
+                DescendingOrder = 1
+
+        QRect = QColor = None  # type: ignore
+
+        class QStyledItemDelegate:  # type: ignore
+            def __init__(self, parent: Any = None) -> None:
+                pass
+
+
+HEADERS = ["✓", "Дата", "Тест", "Результат", "⇵"]
+CHART_ROLE = int(Qt.ItemDataRole.UserRole) + 1
+# sortable columns; the checkbox and chart columns sort by insertion order
+_SORT_KEYS = {1: "timestamp", 2: "test", 3: "result"}
+
+
+_TOKEN = re.compile(r"\w+")
+
+
+def fts_query(text: str) -> str:
+    """FTS5 query matching rows that contain every word of ``text`` as a prefix."""
+    return " ".join(f'"{t}"*' for t in _TOKEN.findall(text))
+
+
+def format_timestamp(ts: Optional[str]) -> str:
+    try:
+        return datetime.fromisoformat(ts or "").strftime("%d.%m.%Y %H:%M")
+    except Exception:
+        return ts or ""
+
+
+def result_text(result: Optional[str]) -> str:
+    """Render a stored result: JSON objects as ``key: value`` pairs, other text as is."""
+    try:
+        data = json.loads(result or "")
+    except Exception:
+        return result or ""
+    if isinstance(data, dict):
+        return ", ".join(f"{k}: {v}" for k, v in data.items())
+    return result or ""
+
+
+def chart_value(result: Optional[str]) -> int:
+    """Bar length in percent: ``1 - p`` when the result has a p-value, else a stable hash."""
+    try:
+        data = json.loads(result or "")
+    except Exception:
+        data = None
+    if isinstance(data, dict):
+        for key, val in data.items():
+            if "p_value" in str(key) and isinstance(val, (int, float)) and 0 <= val <= 1:
+                return int(round((1 - val) * 100))
+    return zlib.crc32((result or "").encode("utf-8")) % 100
+
+
+class _Row:
+    __slots__ = ("id", "key", "timestamp", "test", "text", "chart")
+
+    def __init__(
+        self,
+        rec_id: int,
+        key: Any,
+        ts: Optional[str],
+        test: Optional[str],
+        result: Optional[str],
+        p_value: Optional[float] = None,
+    ) -> None:
+        self.id = rec_id
+        self.key = key
+        self.timestamp = format_timestamp(ts)
+        self.test = test or ""
+        self.text = result_text(result)
+        # the structured column saves parsing the JSON result again
+        if p_value is not None and 0 <= p_value <= 1:
+            self.chart = int(round((1 - p_value) * 100))
+        else:
+            self.chart = chart_value(result)
+
+
+class HistoryTableModel(QAbstractTableModel):
+    """Checkable, sortable view of ``history`` loaded ``page_size`` rows at a time."""
+
+    def __init__(self, conn: sqlite3.Connection, page_size: int = 200, parent: Any = None) -> None:
+        super().__init__(parent)
+        self.conn = conn
+        self.page_size = page_size
+        self._rows: List[_Row] = []
+        self._checked: Set[int] = set()
+        self._exhausted = False
+        self._sort_col = "id"
+        self._descending = False
+        self._filter = ""
+        self._fts: Optional[bool] = None
+
+    # ----- paging -----
+
+    def _has_fts(self) -> bool:
+        if self._fts is None:
+            row = self.conn.execute("SELECT 1 FROM sqlite_master WHERE name='history_fts'").fetchone()
+            self._fts = row is not None
+        return self._fts
+
+    def _filter_clause(self) -> Tuple[str, List[Any]]:
+        """Condition for the current filter, or ``("", [])`` without one."""
+        if not self._filter:
+            return "", []
+        if self._has_fts() and _TOKEN.search(self._filter):
+            sub = "SELECT rowid FROM history_fts WHERE history_fts MATCH ?"
+            args: List[Any] = [fts_query(self._filter)]
+            if self._sort_col == "id":
+                # FTS5 yields rowids in order, so bound and limit the match itself
+                order = "DESC" if self._descending else "ASC"
+                if self._rows:
+                    sub += " AND rowid < ?" if self._descending else " AND rowid > ?"
+                    args.append(self._rows[-1].id)
+                sub += f" ORDER BY rowid {order} LIMIT ?"
+                args.append(self.page_size)
+            return f"id IN ({sub})", args
+        escaped = self._filter.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        pattern = f"%{escaped}%"
+        return "(test LIKE ? ESCAPE '\\' OR result LIKE ? ESCAPE '\\')", [pattern, pattern]
+
+    def _after_clause(self, last: _Row) -> Tuple[str, List[Any]]:
+        """Keyset condition for rows after ``last``; NULL keys sort first ascending."""
+        col = self._sort_col
+        if col == "id":
+            return ("id < ?" if self._descending else "id > ?"), [last.id]
+        if self._descending:
+            if last.key is None:
+                return f"({col} IS NULL AND id < ?)", [last.id]
+            return f"(({col}, id) < (?, ?) OR {col} IS NULL)", [last.key, last.id]
+        if last.key is None:
+            return f"(({col} IS NULL AND id > ?) OR {col} IS NOT NULL)", [last.id]
+        return f"({col}, id) > (?, ?)", [last.key, last.id]
+
+    def _fetch_page(self) -> List[_Row]:
+        col = self._sort_col
+        order = "DESC" if self._descending else "ASC"
+        where, params = [], []
+        if self._rows:
+            clause, args = self._after_clause(self._rows[-1])
+            where.append(clause)
+            params += args
+        clause, args = self._filter_clause()
+        if clause:
+            where.append(clause)
+            params += args
+        sql = f"SELECT id, timestamp, test, result, p_value, {col} FROM history"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {col} {order}" + ("" if col == "id" else f", id {order}") + " LIMIT ?"
+        params.append(self.page_size)
+        rows = self.conn.execute(sql, params).fetchall()
+        return [_Row(rec_id, k, ts, test, res, p) for rec_id, ts, test, res, p, k in rows]
+
+    def canFetchMore(self, parent: Any = None) -> bool:
+        if parent is not None and parent.isValid():
+            return False
+        return not self._exhausted
+
+    def fetchMore(self, parent: Any = None) -> None:
+        if not self.canFetchMore(parent):
+            return
+        page = self._fetch_page()
+        if len(page) < self.page_size:
+            self._exhausted = True
+        if page:
+            start = len(self._rows)
+            self.beginInsertRows(QModelIndex(), start, start + len(page) - 1)
+            self._rows.extend(page)
+            self.endInsertRows()
+
+    def reload(self) -> None:
+        """Drop loaded rows and fetch the first page again."""
+        self.beginResetModel()
+        self._rows = []
+        self._exhausted = False
+        self.endResetModel()
+        self.fetchMore()
+
+    def fetch_all(self) -> None:
+        while self.canFetchMore():
+            self.fetchMore()
+
+    def set_filter(self, text: str) -> None:
+        """Show only rows whose test name or result contains ``text``."""
+        text = text.strip()
+        if text != self._filter:
+            self._filter = text
+            self.reload()
+
+    # ----- incremental updates -----
+
+    def _sort_tuple(self, row: _Row) -> Tuple[Any, ...]:
+        # SQLite orders NULL before any value
+        return (row.key is not None, row.key if row.key is not None else 0, row.id)
+
+    def _position(self, row: _Row) -> int:
+        """Index that keeps the loaded rows ordered, by binary search."""
+        target = self._sort_tuple(row)
+        lo, hi = 0, len(self._rows)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            current = self._sort_tuple(self._rows[mid])
+            before = current > target if self._descending else current < target
+            if before:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _matches_filter(self, test: Optional[str], result: Optional[str]) -> bool:
+        if not self._filter:
+            return True
+        if self._has_fts() and _TOKEN.search(self._filter):
+            # prefix match of every term, as in fts_query()
+            words = _TOKEN.findall(f"{test or ''} {result or ''}".lower())
+            return all(any(w.startswith(t) for w in words) for t in _TOKEN.findall(self._filter.lower()))
+        needle = self._filter.lower()
+        return needle in (test or "").lower() or needle in (result or "").lower()
+
+    def append_record(
+        self, rec_id: int, timestamp: str, test: str, result: str, p_value: Optional[float] = None
+    ) -> None:
+        """Show a freshly inserted ``history`` row without re-reading the table."""
+        if not self._matches_filter(test, result):
+            return
+        key = {"id": rec_id, "timestamp": timestamp, "test": test, "result": result}[self._sort_col]
+        row = _Row(rec_id, key, timestamp, test, result, p_value)
+        pos = self._position(row)
+        if pos == len(self._rows) and not self._exhausted:
+            return  # beyond the loaded pages; keyset paging will reach it
+        self.beginInsertRows(QModelIndex(), pos, pos)
+        self._rows.insert(pos, row)
+        self.endInsertRows()
+
+    def remove_ids(self, ids: Iterable[int]) -> None:
+        """Drop rows already deleted from the database, one contiguous block at a time."""
+        wanted = set(ids)
+        rows = [r for r, row in enumerate(self._rows) if row.id in wanted]
+        self._checked -= wanted
+        while rows:
+            end = rows.pop()
+            start = end
+            while rows and rows[-1] == start - 1:
+                start = rows.pop()
+            self.beginRemoveRows(QModelIndex(), start, end)
+            del self._rows[start : end + 1]
+            self.endRemoveRows()
+
+    def record_id(self, row: int) -> Optional[int]:
+        return self._rows[row].id if 0 <= row < len(self._rows) else None
+
+    def checked_ids(self) -> List[int]:
+        return [row.id for row in self._rows if row.id in self._checked]
+
+    # ----- Qt model interface -----
+
+    def rowCount(self, parent: Any = None) -> int:
+        if parent is not None and parent.isValid():
+            return 0
+        return len(self._rows)
+
+    def columnCount(self, parent: Any = None) -> int:
+        if parent is not None and parent.isValid():
+            return 0
+        return len(HEADERS)
+
+    def headerData(self, section: int, orientation: Any, role: Any = Qt.ItemDataRole.DisplayRole) -> Any:
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return HEADERS[section]
+        return None
+
+    def data(self, index: Any, role: Any = Qt.ItemDataRole.DisplayRole) -> Any:
+        if not index.isValid() or index.row() >= len(self._rows):
+            return None
+        row = self._rows[index.row()]
+        col = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            return (None, row.timestamp, row.test, row.text, None)[col]
+        if role == Qt.ItemDataRole.ToolTipRole and col == 3:
+            return row.text
+        if role == Qt.ItemDataRole.CheckStateRole and col == 0:
+            return Qt.CheckState.Checked if row.id in self._checked else Qt.CheckState.Unchecked
+        if role == Qt.ItemDataRole.UserRole and col == 0:
+            return row.id
+        if role == CHART_ROLE and col == 4:
+            return row.chart
+        return None
+
+    def setData(self, index: Any, value: Any, role: Any = Qt.ItemDataRole.EditRole) -> bool:
+        if role != Qt.ItemDataRole.CheckStateRole or index.column() != 0 or not index.isValid():
+            return False
+        rec_id = self._rows[index.row()].id
+        if value in (Qt.CheckState.Checked, Qt.CheckState.Checked.value):
+            self._checked.add(rec_id)
+        else:
+            self._checked.discard(rec_id)
+        self.dataChanged.emit(index, index, [role])
+        return True
+
+    def flags(self, index: Any) -> Any:
+        flags = Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+        if index.isValid() and index.column() == 0:
+            flags |= Qt.ItemFlag.ItemIsUserCheckable
+        return flags
+
+    def sort(self, column: int, order: Any = Qt.SortOrder.AscendingOrder) -> None:
+        self._sort_col = _SORT_KEYS.get(column, "id")
+        self._descending = order == Qt.SortOrder.DescendingOrder
+        self.reload()
+
+
+class InlineChartDelegate(QStyledItemDelegate):
+    """Paint :data:`CHART_ROLE` as a horizontal bar, replacing per-row progress widgets."""
+
+    def paint(self, painter: Any, option: Any, index: Any) -> None:
+        value = index.data(CHART_ROLE)
+        if value is None:
+            super().paint(painter, option, index)
+            return
+        rect = option.rect.adjusted(4, 6, -4, -6)
+        painter.save()
+        painter.fillRect(rect, QColor("#3c3f41"))
+        painter.fillRect(QRect(rect.x(), rect.y(), int(rect.width() * value / 100), rect.height()), QColor("#4caf50"))
+        painter.restore()
+
+
+def selected_ids(model: HistoryTableModel, rows: Sequence[Any]) -> List[int]:
+    """Record IDs of the selected row indexes plus every checked row."""
+    ids = [model.record_id(idx.row()) for idx in rows]
+    return list(dict.fromkeys([i for i in ids if i is not None] + model.checked_ids()))
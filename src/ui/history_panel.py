@@ -2,14 +2,15 @@
 
 from __future__ import annotations
 
-import json
 import sqlite3
 from datetime import datetime
 from typing import Any, Dict, List
 import logging
 
+import history_store
 from migrations_runner import run_migrations
 from utils.config import config
+from .history_model import HistoryTableModel, InlineChartDelegate, selected_ids
 
 logger = logging.getLogger(__name__)
 
@@ -21,9 +22,10 @@ try:
         QPushButton,
         QTableWidget,
         QTableWidgetItem,
+        QTableView,
         QMessageBox,
     )
-    from PyQt6.QtCore import Qt, QDateTime, pyqtSignal
+    from PyQt6.QtCore import Qt, pyqtSignal
 except Exception:  # pragma: no cover - allow running tests without PyQt
     QWidget = type("QWidget", (), {"__init__": lambda self, *a, **k: None})
     QVBoxLayout = QHBoxLayout = type(
@@ -36,7 +38,7 @@ except Exception:  # pragma: no cover - allow running tests without PyQt
             "setContentsMargins": lambda *a, **k: None,
         },
     )
-    QPushButton = QTableWidget = QTableWidgetItem = QMessageBox = type(
+    QPushButton = QTableWidget = QTableWidgetItem = QTableView = QMessageBox = type(
         "Widget",
         (),
         {
@@ -62,16 +64,12 @@ except Exception:  # pragma: no cover - allow running tests without PyQt
             "rowCount": lambda *a, **k: 0,
             "currentRow": lambda *a, **k: 0,
             "selectRow": lambda *a, **k: None,
+            "setModel": lambda *a, **k: None,
+            "setItemDelegateForColumn": lambda *a, **k: None,
+            "setSelectionBehavior": lambda *a, **k: None,
+            "SelectionBehavior": type("SelectionBehavior", (), {"SelectRows": 1}),
         },
     )
-
-    class DummyDt:
-        def toString(self) -> str:
-            return ""
-
-    QDateTime = type(
-        "QDateTime", (), {"currentDateTime": staticmethod(lambda: DummyDt())}
-    )
     Qt = type("Qt", (), {"ItemDataRole": type("IDR", (), {"UserRole": 0})})
     def pyqtSignal(*a, **k):  # type: ignore
         def _sig(*args, **kw):
@@ -104,6 +102,11 @@ class HistoryPanel(QWidget):
             self.table.setHorizontalHeaderLabels(["Timestamp", "Test", "Result"])
         if hasattr(self.table, "setSortingEnabled"):
             self.table.setSortingEnabled(True)
+        self.history_model = HistoryTableModel(self.conn)
+        self.history_view = QTableView()
+        self.history_view.setModel(self.history_model)
+        self.history_view.setItemDelegateForColumn(4, InlineChartDelegate(self.history_view))
+        self.history_view.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
 
         if hasattr(self.undo_button, "clicked"):
             self.undo_button.clicked.connect(self.undo_state)  # type: ignore
@@ -122,6 +125,7 @@ class HistoryPanel(QWidget):
         hl.addWidget(self.delete_button)
         layout.addLayout(hl)
         layout.addWidget(self.table)
+        layout.addWidget(self.history_view)
 
         self.load_states()
         self.load_history()
@@ -129,73 +133,44 @@ class HistoryPanel(QWidget):
     # ----- database -----
 
     def load_states(self) -> None:
+        """List saved states; payloads are read only when a state is loaded."""
         c = self.conn.cursor()
-        c.execute("SELECT id, payload, timestamp FROM session_states ORDER BY id")
-        rows = c.fetchall()
-        self._states = [{"id": i, "payload": p, "timestamp": ts} for i, p, ts in rows]
+        c.execute("SELECT id, timestamp FROM session_states ORDER BY id")
+        self._states = []
         if hasattr(self.table, "setRowCount"):
             self.table.setRowCount(0)
-        for row in self._states:
-            if hasattr(self.table, "insertRow"):
-                r = self.table.rowCount()
-                self.table.insertRow(r)
-                item = QTableWidgetItem(row["timestamp"])
-                if hasattr(item, "setData"):
-                    item.setData(Qt.ItemDataRole.UserRole, row["id"])
-                self.table.setItem(r, 0, item)
+        for state_id, ts in c.fetchall():
+            self._append_state(state_id, ts)
         if self._states:
             self._load_state(len(self._states) - 1)
 
+    def _append_state(self, state_id: int, timestamp: str) -> None:
+        self._states.append({"id": state_id, "timestamp": timestamp})
+        if hasattr(self.table, "insertRow"):
+            r = self.table.rowCount()
+            self.table.insertRow(r)
+            item = QTableWidgetItem(timestamp)
+            if hasattr(item, "setData"):
+                item.setData(Qt.ItemDataRole.UserRole, state_id)
+            self.table.setItem(r, 0, item)
+
     def load_history(self) -> None:
-        """Load analysis history table."""
-        c = self.conn.cursor()
-        c.execute("SELECT id, timestamp, test, result FROM history ORDER BY id")
-        rows = c.fetchall()
-        if hasattr(self.table, "setRowCount"):
-            self.table.setRowCount(0)
-        for rec_id, ts, test_name, res in rows:
-            if hasattr(self.table, "insertRow"):
-                r = self.table.rowCount()
-                self.table.insertRow(r)
-                try:
-                    ts_fmt = datetime.fromisoformat(ts).strftime("%d.%m.%Y %H:%M")
-                except Exception:
-                    ts_fmt = ts
-                item_ts = QTableWidgetItem(ts_fmt)
-                if hasattr(item_ts, "setData"):
-                    item_ts.setData(Qt.ItemDataRole.UserRole, rec_id)
-                self.table.setItem(r, 0, item_ts)
-                self.table.setItem(r, 1, QTableWidgetItem(test_name))
-                try:
-                    res_dict = json.loads(res)
-                    res_text = ", ".join(f"{k}: {v}" for k, v in res_dict.items())
-                except Exception:
-                    res_text = res
-                self.table.setItem(r, 2, QTableWidgetItem(res_text))
+        """Load the first page of the analysis history; more pages load on scroll."""
+        self.history_model.reload()
 
     def add_state(self, payload: Dict[str, Any]) -> None:
-        ts = ""
-        try:
-            ts = QDateTime.currentDateTime().toString()
-        except Exception as e:
-            logger.debug("history_panel: failed to format timestamp: %s", e)
-        c = self.conn.cursor()
-        c.execute(
-            "INSERT INTO session_states(payload, timestamp) VALUES(?,?)",
-            (json.dumps(payload), ts),
-        )
+        """Save a state and make it current without re-reading the others."""
+        ts = datetime.now().isoformat(timespec="seconds")
+        state_id = history_store.insert_state(self.conn, payload, ts)
         self.conn.commit()
-        self.load_states()
+        self._append_state(state_id, ts)
+        self._load_state(len(self._states) - 1)
 
     def _load_state(self, index: int) -> None:
         if index < 0 or index >= len(self._states):
             return
         self._index = index
-        payload = self._states[index]["payload"]
-        try:
-            data = json.loads(payload)
-        except Exception:
-            data = {}
+        data = history_store.load_state(self.conn, self._states[index]["id"]) or {}
         if hasattr(self.state_loaded, "emit"):
             self.state_loaded.emit(data)  # type: ignore
         elif callable(self.state_loaded):
@@ -243,39 +218,19 @@ class HistoryPanel(QWidget):
             if st["id"] == state_id:
                 self._load_state(idx)
                 return
-        c = self.conn.cursor()
-        row = c.execute(
-            "SELECT id, payload, timestamp FROM session_states WHERE id=?",
-            (state_id,),
+        row = self.conn.execute(
+            "SELECT id, timestamp FROM session_states WHERE id=?", (state_id,)
         ).fetchone()
         if row:
-            self._states.append({"id": row[0], "payload": row[1], "timestamp": row[2]})
-            if hasattr(self.table, "insertRow"):
-                r = self.table.rowCount()
-                self.table.insertRow(r)
-                item = QTableWidgetItem(row[2])
-                if hasattr(item, "setData"):
-                    item.setData(Qt.ItemDataRole.UserRole, row[0])
-                self.table.setItem(r, 0, item)
+            self._append_state(row[0], row[1])
             self._load_state(len(self._states) - 1)
 
     def _on_delete_selected(self) -> None:
-        rows = self.table.selectionModel().selectedRows()
-        if not rows:
+        ids = selected_ids(self.history_model, self.history_view.selectionModel().selectedRows())
+        if not ids:
             QMessageBox.warning(self, self.tr("Ошибка"), self.tr("Ничего не выбрано"))
             return
-        indexes = sorted((idx.row() for idx in rows), reverse=True)
-        ids = []
-        for row in indexes:
-            item = self.table.item(row, 0)
-            if item is not None:
-                val = item.data(Qt.ItemDataRole.UserRole)
-                if val is not None:
-                    ids.append((val,))
-        if ids:
-            c = self.conn.cursor()
-            c.executemany("DELETE FROM history WHERE id=?", ids)
-            self.conn.commit()
-        for row in indexes:
-            self.table.removeRow(row)
-        self.load_history()
+        c = self.conn.cursor()
+        c.executemany("DELETE FROM history WHERE id=?", [(i,) for i in ids])
+        self.conn.commit()
+        self.history_model.remove_ids(ids)
@@ -0,0 +1,162 @@
+"""Background execution of GUI computations with progress and cancellation.
+
+:class:`TaskRunner` runs a function on :class:`QThreadPool` and hands its
+result back to callbacks on the UI thread: the worker emits signals of the
+runner, which lives on the UI thread, so Qt queues the delivery there. Every
+task has a key, such as ``"analyze"`` or ``"plot"``. Submitting a key again
+sets the cancel token of the running task and discards its result when it
+arrives, so a double click never shows stale output.
+
+Task functions take ``(cancel, progress)``: a :class:`threading.Event` that
+long loops pass to :func:`abtest_core.utils.check_cancelled`, and a
+``progress(done, total)`` callback. Without Qt the task runs synchronously.
+"""
+
+from __future__ import annotations
+
+import itertools
+import logging
+import threading
+from concurrent.futures import CancelledError
+from typing import Any, Callable, Dict, List, Optional
+
+from abtest_core.utils import ProgressCallback
+
+try:
+    from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+except Exception:
+    try:
+        from PyQt6.QtCore import QObject, QRunnable, QThreadPool
+        from PyQt6.QtCore import pyqtSignal as Signal
+    except Exception:  # pragma: no cover - allow running tests without Qt
+        QObject = QRunnable = QThreadPool = Signal = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+TaskFn = Callable[[threading.Event, ProgressCallback], Any]
+
+
+class _Pending:
+    __slots__ = ("generation", "cancel", "on_result", "on_error", "on_progress")
+
+    def __init__(self, generation, cancel, on_result, on_error, on_progress) -> None:
+        self.generation = generation
+        self.cancel = cancel
+        self.on_result = on_result
+        self.on_error = on_error
+        self.on_progress = on_progress
+
+
+if QRunnable is not None:
+
+    class _Job(QRunnable):
+        def __init__(self, runner: "TaskRunner", key: str, generation: int, fn: TaskFn, cancel: threading.Event) -> None:
+            super().__init__()
+            self._runner = runner
+            self._key = key
+            self._generation = generation
+            self._fn = fn
+            self._cancel = cancel
+
+        def run(self) -> None:
+            runner, key, gen = self._runner, self._key, self._generation
+
+            def progress(done: int, total: int) -> None:
+                runner._progress.emit(key, gen, int(done), int(total))
+
+            try:
+                result = self._fn(self._cancel, progress)
+            except BaseException as e:  # delivered to on_error on the UI thread
+                runner._failed.emit(key, gen, e)
+            else:
+                runner._finished.emit(key, gen, result)
+
+
+class TaskRunner(QObject if QObject is not None else object):  # type: ignore[misc]
+    """Run keyed tasks off the UI thread and deliver only the latest result per key."""
+
+    if Signal is not None:
+        _progress = Signal(str, int, int, int)
+        _finished = Signal(str, int, object)
+        _failed = Signal(str, int, object)
+
+    def __init__(self, parent: Any = None, pool: Any = None) -> None:
+        if QObject is not None:
+            super().__init__(parent)
+            self._pool = pool or QThreadPool.globalInstance()
+            self._progress.connect(self._deliver_progress)
+            self._finished.connect(self._deliver_result)
+            self._failed.connect(self._deliver_error)
+        else:
+            self._pool = None
+        self._pending: Dict[str, _Pending] = {}
+        self._generations = itertools.count(1)
+
+    def submit(
+        self,
+        key: str,
+        fn: TaskFn,
+        on_result: Callable[[Any], None],
+        on_error: Optional[Callable[[BaseException], None]] = None,
+        on_progress: Optional[ProgressCallback] = None,
+    ) -> threading.Event:
+        """Start ``fn`` under ``key``, superseding a task already running under it."""
+        self.cancel(key)
+        cancel = threading.Event()
+        gen = next(self._generations)
+        self._pending[key] = _Pending(gen, cancel, on_result, on_error, on_progress)
+        if self._pool is not None:
+            self._pool.start(_Job(self, key, gen, fn, cancel))
+            return cancel
+
+        def progress(done: int, total: int) -> None:
+            self._deliver_progress(key, gen, done, total)
+
+        try:
+            result = fn(cancel, progress)
+        except BaseException as e:
+            self._deliver_error(key, gen, e)
+        else:
+            self._deliver_result(key, gen, result)
+        return cancel
+
+    def cancel(self, key: Optional[str] = None) -> None:
+        """Cancel the task under ``key``, or every task; their results are dropped."""
+        keys = list(self._pending) if key is None else [key]
+        for k in keys:
+            task = self._pending.pop(k, None)
+            if task is not None:
+                task.cancel.set()
+
+    def running(self) -> List[str]:
+        return list(self._pending)
+
+    # ----- delivery on the UI thread -----
+
+    def _current(self, key: str, gen: int) -> Optional[_Pending]:
+        task = self._pending.get(key)
+        return task if task is not None and task.generation == gen else None
+
+    def _deliver_progress(self, key: str, gen: int, done: int, total: int) -> None:
+        task = self._current(key, gen)
+        if task is not None and task.on_progress is not None:
+            task.on_progress(done, total)
+
+    def _deliver_result(self, key: str, gen: int, result: Any) -> None:
+        task = self._current(key, gen)
+        if task is None:
+            return  # superseded or cancelled
+        del self._pending[key]
+        task.on_result(result)
+
+    def _deliver_error(self, key: str, gen: int, error: BaseException) -> None:
+        task = self._current(key, gen)
+        if task is None:
+            return
+        del self._pending[key]
+        if isinstance(error, CancelledError):
+            return
+        if task.on_error is not None:
+            task.on_error(error)
+        else:
+            logger.error("task %s failed: %s", key, error, exc_info=error)
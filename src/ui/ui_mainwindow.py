@@ -12,9 +12,6 @@ try:
         QSlider,
         QDoubleSpinBox,
         QTabWidget,
-        QTableWidget,
-        QTableWidgetItem,
-        QProgressBar,
         QMessageBox,
         QFileDialog,
         QTextBrowser,
@@ -47,9 +44,6 @@ except Exception:
         QSlider,
         QDoubleSpinBox,
         QTabWidget,
-        QTableWidget,
-        QTableWidgetItem,
-        QProgressBar,
         QMessageBox,
         QFileDialog,
         QTextBrowser,
@@ -85,6 +79,37 @@ except Exception:
             def clearMessage(self):
                 pass
 
+            def addPermanentWidget(self, *a, **k):
+                pass
+
+try:
+    from PySide6.QtWidgets import QTableView
+except Exception:
+    try:
+        from PyQt6.QtWidgets import QTableView
+    except Exception:  # pragma: no cover - optional
+        class QTableView:  # type: ignore
+            class SelectionBehavior:
+                SelectRows = 1
+
+            def __init__(self, *a, **k):
+                self._model = None
+
+            def setModel(self, model):
+                self._model = model
+
+            def model(self):
+                return self._model
+
+            def setItemDelegateForColumn(self, *a, **k):
+                pass
+
+            def setSelectionBehavior(self, *a, **k):
+                pass
+
+            def setSortingEnabled(self, *a, **k):
+                pass
+
 try:
     from PySide6.QtGui import QIcon
 except Exception:
@@ -136,11 +161,14 @@ except Exception:
                 return func
             return _slot
 
-from .widgets import with_help_label
+from .widgets import Debouncer, with_help_label
+from .history_model import HistoryTableModel, InlineChartDelegate, selected_ids
+from .tasks import TaskRunner
 from .login import LoginDialog
 import utils
 from pathlib import Path
 from migrations_runner import run_migrations
+import history_store
 import logging
 import sqlite3
 import os
@@ -151,10 +179,13 @@ from typing import Dict
 import json
 import urllib.request
 from utils.net import urlopen_checked
-from abtest_core.utils import lazy_import
+from abtest_core.utils import check_cancelled, lazy_import
 
 logger = logging.getLogger(__name__)
 
+# task key shared by every handler that renders into results_text
+RESULTS_TASK = "results"
+
 try:
     from plugins.bayesian import bayesian_analysis  # for tests monkeypatch
 except Exception:
@@ -493,6 +524,8 @@ class ABTestWindow(QMainWindow):
 
         # Инициализируем историю
         self._init_history_db()
+        # Анализы и графики считаются в пуле потоков
+        self._tasks = TaskRunner(self)
         # Создаём виджеты
         self._prepare_widgets()
         # Строим интерфейс
@@ -510,6 +543,7 @@ class ABTestWindow(QMainWindow):
     def closeEvent(self, event):
         """Ensure database connection is closed on exit."""
         try:
+            self._tasks.cancel()
             self.conn.close()
         finally:
             super().closeEvent(event)
@@ -520,106 +554,43 @@ class ABTestWindow(QMainWindow):
         path = self._config.get("history_db", "history.db")
         self.conn = sqlite3.connect(path)
         run_migrations(self.conn)
+        # retention, legacy compression and VACUUM run once per start
+        self._retention = history_store.RetentionPolicy.from_config(self._config)
+        try:
+            history_store.maintain(self.conn, self._retention)
+        except sqlite3.DatabaseError as e:
+            logger.warning("history maintenance failed: %s", e)
 
     def load_history(self):
-        c = self.conn.cursor()
-        c.execute("SELECT id,timestamp,test,result FROM history ORDER BY id")
-        rows = c.fetchall()
-        table = self.history_table
-        table.setRowCount(len(rows))
-        for r, (rec_id, ts, test, res) in enumerate(rows):
-            chk = QTableWidgetItem()
-            chk.setCheckState(Qt.CheckState.Unchecked)
-            chk.setData(Qt.ItemDataRole.UserRole, rec_id)
-            table.setItem(r, 0, chk)
-            try:
-                ts_fmt = datetime.fromisoformat(ts).strftime("%d.%m.%Y %H:%M")
-            except Exception:
-                ts_fmt = ts
-            table.setItem(r, 1, QTableWidgetItem(ts_fmt))
-            table.setItem(r, 2, QTableWidgetItem(test))
-            try:
-                res_dict = json.loads(res)
-                res_text = ", ".join(f"{k}: {v}" for k, v in res_dict.items())
-            except Exception:
-                res_text = res
-            table.setItem(r, 3, QTableWidgetItem(res_text))
-            pb = self._build_inline_chart(res_text)
-            table.setCellWidget(r, 4, pb)
+        self.history_model.reload()
 
     def _add_history(self, name, content):
         ts = datetime.now().isoformat(timespec="seconds")
-        if isinstance(content, dict):
-            db_res = json.dumps(content, ensure_ascii=False)
-            display_res = ", ".join(f"{k}: {v}" for k, v in content.items())
-        else:
-            db_res = str(content).replace("<pre>", "").replace("</pre>", "")
-            display_res = db_res
-        c = self.conn.cursor()
-        c.execute(
-            "INSERT INTO history(timestamp,test,result) VALUES(?,?,?)",
-            (ts, name, db_res),
-        )
+        rec_id, db_res = history_store.insert_history(self.conn, ts, name, content)
         self.conn.commit()
-        rec_id = c.lastrowid
-        r = self.history_table.rowCount()
-        self.history_table.insertRow(r)
-        chk = QTableWidgetItem()
-        chk.setCheckState(Qt.CheckState.Unchecked)
-        chk.setData(Qt.ItemDataRole.UserRole, rec_id)
-        self.history_table.setItem(r, 0, chk)
-        try:
-            ts_fmt = datetime.fromisoformat(ts).strftime("%d.%m.%Y %H:%M")
-        except Exception:
-            ts_fmt = ts
-        self.history_table.setItem(r, 1, QTableWidgetItem(ts_fmt))
-        self.history_table.setItem(r, 2, QTableWidgetItem(name))
-        self.history_table.setItem(r, 3, QTableWidgetItem(display_res))
-        pb = self._build_inline_chart(display_res)
-        self.history_table.setCellWidget(r, 4, pb)
+        p_value = history_store.summarize(content)["p_value"]
+        self.history_model.append_record(rec_id, ts, name, db_res, p_value)
 
     def _on_delete_selected(self):
-        """Delete currently selected rows from history."""
-        rows = self.history_table.selectionModel().selectedRows()
-        if not rows:
+        """Delete selected or checked rows from history."""
+        ids = selected_ids(self.history_model, self.history_table.selectionModel().selectedRows())
+        if not ids:
             QMessageBox.warning(self, self.tr("Ошибка"), self.tr("Ничего не выбрано"))
             return
-        ids = []
-        indexes = sorted((idx.row() for idx in rows), reverse=True)
-        for row in indexes:
-            item = self.history_table.item(row, 0)
-            if item is not None:
-                ids.append(item.data(Qt.ItemDataRole.UserRole))
-        if ids:
-            c = self.conn.cursor()
-            c.executemany("DELETE FROM history WHERE id=?", [(i,) for i in ids])
-            self.conn.commit()
-        for row in indexes:
-            self.history_table.removeRow(row)
-        self.load_history()
+        c = self.conn.cursor()
+        c.executemany("DELETE FROM history WHERE id=?", [(i,) for i in ids])
+        self.conn.commit()
+        self.history_model.remove_ids(ids)
+        history_store.vacuum_if_fragmented(self.conn, self._retention)
 
     def _clear_all_history(self):
         self.conn.cursor().execute("DELETE FROM history")
         self.conn.commit()
-        self.history_table.setRowCount(0)
+        history_store.vacuum_if_fragmented(self.conn, self._retention)
+        self.history_model.reload()
 
     def _filter_history(self, text):
-        text = text.lower()
-        for r in range(self.history_table.rowCount()):
-            show = False
-            for c in range(1, self.history_table.columnCount() - 1):
-                item = self.history_table.item(r, c)
-                if item and text in item.text().lower():
-                    show = True
-                    break
-            self.history_table.setRowHidden(r, not show)
-
-    def _build_inline_chart(self, text):
-        pb = QProgressBar()
-        pb.setRange(0, 100)
-        pb.setTextVisible(False)
-        pb.setValue(abs(hash(text)) % 100)
-        return pb
+        self.history_model.set_filter(text)
 
     def _export_history_csv(self):
         path, _ = QFileDialog.getSaveFileName(
@@ -627,14 +598,11 @@ class ABTestWindow(QMainWindow):
         )
         if not path:
             return
-        c = self.conn.cursor()
-        c.execute("SELECT timestamp,test,result FROM history ORDER BY id")
-        rows = c.fetchall()
         try:
             with open(path, "w", newline="", encoding="utf-8") as f:
                 w = csv.writer(f)
                 w.writerow(["Timestamp", "Test", "Result"])
-                w.writerows(rows)
+                w.writerows(history_store.history_rows(self.conn))
             QMessageBox.information(self, "Success", f"Saved to {path}")
         except Exception as e:
             show_error(self, str(e))
@@ -645,14 +613,11 @@ class ABTestWindow(QMainWindow):
         )
         if not path:
             return
-        c = self.conn.cursor()
-        c.execute("SELECT timestamp, test, result FROM history ORDER BY id")
-        rows = c.fetchall()
         try:
             with open(path, "w", encoding="utf-8") as f:
                 f.write("| Timestamp | Test | Result |\n")
                 f.write("|---|---|---|\n")
-                for ts, test, result in rows:
+                for ts, test, result in history_store.history_rows(self.conn):
                     f.write(f"| {ts} | {test} | {result} |\n")
             QMessageBox.information(self, "Success", f"Saved to {path}")
         except Exception as e:
@@ -847,14 +812,17 @@ class ABTestWindow(QMainWindow):
         self.clear_button.setStatusTip(self.tr("Clear results"))
 
         # История
-        self.history_table = QTableWidget(0, 5)
-        self.history_table.setHorizontalHeaderLabels(
-            ["✓", "Дата", "Тест", "Результат", "⇵"]
-        )
+        self.history_model = HistoryTableModel(self.conn)
+        self.history_table = QTableView()
+        self.history_table.setModel(self.history_model)
+        self.history_table.setItemDelegateForColumn(4, InlineChartDelegate(self.history_table))
+        self.history_table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
         self.history_table.setSortingEnabled(True)
         self.history_filter = QLineEdit()
         self.history_filter.setPlaceholderText(self.tr("Filter history"))
-        self.history_filter.textChanged.connect(self._filter_history)
+        # one indexed query per pause in typing, not per keystroke
+        self._history_filter_debounce = Debouncer(self._filter_history, 250, self)
+        self.history_filter.textChanged.connect(self._history_filter_debounce)
         self.delete_button = QPushButton()
         self.delete_button.clicked.connect(self._on_delete_selected)
         self.delete_button.setToolTip(self.tr("Delete selected history rows"))
@@ -871,6 +839,9 @@ class ABTestWindow(QMainWindow):
         self.setCentralWidget(cw)
         self.status = QStatusBar()
         self.setStatusBar(self.status)
+        self.cancel_task_button = QPushButton(self.tr("Cancel"))
+        self.cancel_task_button.clicked.connect(self._cancel_tasks)
+        self.status.addPermanentWidget(self.cancel_task_button)
         ml = QVBoxLayout(cw)
 
         # Вкладки
@@ -1309,6 +1280,40 @@ class ABTestWindow(QMainWindow):
 
     # ————— Обработчики —————
 
+    # ————— Фоновые задачи —————
+
+    def _run_task(self, key, fn, on_result, label=None, on_error=None):
+        """Run ``fn(cancel, progress)`` on the thread pool; ``on_result`` runs on the UI thread.
+
+        Submitting another task under the same ``key`` cancels this one and drops its result;
+        every task that renders into ``results_text`` uses ``RESULTS_TASK``, so only the newest
+        analysis of any kind is shown.
+        """
+        status = getattr(self, "status", None)
+
+        def progress(done, total):
+            if status is not None and total:
+                status.showMessage(f"{label or key}: {done}/{total}")
+
+        def finished(result):
+            if status is not None:
+                status.clearMessage()
+            on_result(result)
+
+        def failed(error):
+            if status is not None:
+                status.clearMessage()
+            if on_error is not None:
+                on_error(error)
+            else:
+                show_error(self, str(error))
+
+        return self._tasks.submit(key, fn, finished, failed, progress)
+
+    def _cancel_tasks(self):
+        self._tasks.cancel()
+        self.status.showMessage(self.tr("Cancelled"), 3000)
+
     def calculate_sample_size(self):
         try:
             stats_mod = lazy_import("stats.ab_test")
@@ -1327,6 +1332,8 @@ class ABTestWindow(QMainWindow):
                 f"{self.tr('Size/group')}: {n}\n"
                 f"{self.tr('MDE')}: {mde:.2%}</pre>"
             )
+            # a running analysis must not overwrite this result
+            self._tasks.cancel(RESULTS_TASK)
             self.results_text.setHtml(html)
             self._add_history("Sample Size", html)
         except Exception as e:
@@ -1336,7 +1343,7 @@ class ABTestWindow(QMainWindow):
         try:
             stats_mod = lazy_import("stats.ab_test")
             evaluate_abn_test = stats_mod.evaluate_abn_test
-            cuped_adjustment = stats_mod.cuped_adjustment
+            cuped_adjust_groups = stats_mod.cuped_adjust_groups
             ua, ca = int(self.users_A_var.text()), int(self.conv_A_var.text())
             ub, cb = int(self.users_B_var.text()), int(self.conv_B_var.text())
             uc, cc = int(self.users_C_var.text()), int(self.conv_C_var.text())
@@ -1366,54 +1373,127 @@ class ABTestWindow(QMainWindow):
                     return
                 force = True
 
-            if hasattr(self, "metric_a") and hasattr(self, "covariate_a"):
-                adj = cuped_adjustment(self.metric_a, self.covariate_a)
-                ca = int(round(sum(adj)))
-                ua = len(adj)
-            if hasattr(self, "metric_b") and hasattr(self, "covariate_b"):
-                adj = cuped_adjustment(self.metric_b, self.covariate_b)
-                cb = int(round(sum(adj)))
-                ub = len(adj)
-            if hasattr(self, "metric_c") and hasattr(self, "covariate_c"):
-                adj = cuped_adjustment(self.metric_c, self.covariate_c)
-                cc = int(round(sum(adj)))
-                uc = len(adj)
-
             alpha = self.alpha_slider.value() / 100
-            res = evaluate_abn_test(
-                ua,
-                ca,
-                ub,
-                cb,
-                uc if uc > 0 else None,
-                cc if uc > 0 else None,
-                alpha=alpha,
-                force_run_when_srm_failed=force,
-            )
-            html = (
-                f"<pre>{self.tr('A')} {res['cr_a']:.2%} ({ca}/{ua})\n"
-                f"{self.tr('B')} {res['cr_b']:.2%} ({cb}/{ub})\n"
-                f"{self.tr('C')} {res['cr_c']:.2%} ({cc}/{uc})\n\n"
-                f"{self.tr('P(A vs B)')}={res['p_value_ab']:.4f}\n"
-                f"{self.tr('Winner')}: {res['winner']}</pre>"
-            )
-            self.results_text.setHtml(html)
-            self._add_history(f"A/B/n ({self.lang})", res)
+            arrays = {
+                g: (getattr(self, f"metric_{g}"), getattr(self, f"covariate_{g}"))
+                for g in ("a", "b", "c")
+                if hasattr(self, f"metric_{g}") and hasattr(self, f"covariate_{g}")
+            }
+            if "a" in arrays and "b" in arrays:
+                analyze_cuped = self._analyze_cuped_arrays
+
+                def compute_cuped(cancel, progress):
+                    adjusted = cuped_adjust_groups(
+                        {g: m for g, (m, _) in arrays.items()},
+                        {g: c for g, (_, c) in arrays.items()},
+                    )
+                    return adjusted, analyze_cuped(adjusted, alpha)
+
+                def render_cuped(out):
+                    adjusted, res = out
+                    lines = [
+                        f"{self.tr(g.upper())} {res[f'mean_{g}']:.4g} (n={res[f'n_{g}']})"
+                        for g in adjusted
+                    ]
+                    labels = {"b": self.tr("P(A vs B)"), "c": self.tr("P(A vs C)")}
+                    for g in [k for k in labels if k in adjusted]:
+                        lo, hi = res[f"ci_a{g}"]
+                        lines.append(
+                            f"{labels[g]}={res[f'p_value_a{g}']:.4f}, "
+                            f"Δ={res[f'effect_a{g}']:.4g} [{lo:.4g}; {hi:.4g}]"
+                        )
+                    lines.append(f"{self.tr('Winner')}: {res['winner']}")
+                    lines.append(res["method_notes"])
+                    self.results_text.setHtml("<pre>" + "\n".join(lines) + "</pre>")
+                    self._add_history(f"A/B/n CUPED ({self.lang})", res)
+
+                self._run_task(RESULTS_TASK, compute_cuped, render_cuped)
+                return
+
+            def compute(cancel, progress):
+                return evaluate_abn_test(
+                    ua,
+                    ca,
+                    ub,
+                    cb,
+                    uc if uc > 0 else None,
+                    cc if uc > 0 else None,
+                    alpha=alpha,
+                    force_run_when_srm_failed=force,
+                )
+
+            def render(res):
+                html = (
+                    f"<pre>{self.tr('A')} {res['cr_a']:.2%} ({ca}/{ua})\n"
+                    f"{self.tr('B')} {res['cr_b']:.2%} ({cb}/{ub})\n"
+                    f"{self.tr('C')} {res['cr_c']:.2%} ({cc}/{uc})\n\n"
+                    f"{self.tr('P(A vs B)')}={res['p_value_ab']:.4f}\n"
+                    f"{self.tr('Winner')}: {res['winner']}</pre>"
+                )
+                self.results_text.setHtml(html)
+                self._add_history(f"A/B/n ({self.lang})", res)
+
+            self._run_task(RESULTS_TASK, compute, render)
         except Exception as e:
             show_error(self, str(e))
 
     _on_analyze_abn = _on_analyze
 
+    @staticmethod
+    def _analyze_cuped_arrays(adjusted, alpha):
+        """Compare CUPED-adjusted per-user arrays against group ``a``.
+
+        Each comparison runs :func:`abtest_core.analyze_groups` as a
+        continuous metric with a Bonferroni-split alpha when a third group is
+        present.
+        """
+        np = lazy_import("numpy")
+        pd = lazy_import("pandas")
+        core = lazy_import("abtest_core")
+        others = [g for g in ("b", "c") if g in adjusted]
+        alpha_adj = alpha / len(others)
+        res = {"method_notes": "", "winner": "A"}
+        for g, values in adjusted.items():
+            res[f"mean_{g}"] = float(np.mean(values))
+            res[f"n_{g}"] = int(len(values))
+        config = core.AnalysisConfig(alpha=alpha_adj, metric_type="continuous")
+        significant = []
+        for g in others:
+            a, b = adjusted["a"], adjusted[g]
+            df = pd.DataFrame(
+                {
+                    "group": np.repeat(np.array(["A", g.upper()]), [len(a), len(b)]),
+                    "metric": np.concatenate([a, b]),
+                }
+            )
+            out = core.analyze_groups(df, config)
+            res[f"p_value_a{g}"] = out.p_value
+            res[f"effect_a{g}"] = out.effect
+            res[f"ci_a{g}"] = out.ci
+            res[f"significant_a{g}"] = out.p_value < alpha_adj
+            res["method_notes"] = f"CUPED (pooled theta), {out.method_notes}"
+            if res[f"significant_a{g}"] and out.effect > 0:
+                significant.append((out.effect, g.upper()))
+        if significant:
+            res["winner"] = max(significant)[1]
+        return res
+
+    def _show_figure(self, fig):
+        self._last_fig = fig
+        w = PlotWindow(self)
+        w.display_plot(fig)
+
     def _on_plot_confidence_intervals(self):
         try:
             from plots import plot_confidence_intervals
             ua, ca = int(self.users_A_var.text()), int(self.conv_A_var.text())
             ub, cb = int(self.users_B_var.text()), int(self.conv_B_var.text())
             alpha = self.alpha_slider.value() / 100
-            fig = plot_confidence_intervals(ua, ca, ub, cb, alpha)
-            self._last_fig = fig
-            w = PlotWindow(self)
-            w.display_plot(fig)
+            self._run_task(
+                "plot",
+                lambda cancel, progress: plot_confidence_intervals(ua, ca, ub, cb, alpha),
+                self._show_figure,
+            )
         except Exception as e:
             show_error(self, str(e))
 
@@ -1423,10 +1503,11 @@ class ABTestWindow(QMainWindow):
             p1 = self.baseline_slider.value() / 1000
             alpha = self.alpha_slider.value() / 100
             pw = self.power_slider.value() / 100
-            fig = plot_power_curve(p1, alpha, pw)
-            self._last_fig = fig
-            w = PlotWindow(self)
-            w.display_plot(fig)
+            self._run_task(
+                "plot",
+                lambda cancel, progress: plot_power_curve(p1, alpha, pw),
+                self._show_figure,
+            )
         except Exception as e:
             show_error(self, str(e))
 
@@ -1434,17 +1515,23 @@ class ABTestWindow(QMainWindow):
         try:
             from plots import plot_alpha_spending
             alpha = self.alpha_slider.value() / 100
-            fig = plot_alpha_spending(alpha, looks=5)
-            self._last_fig = fig
-            if self.alpha_plot_view:
-                import plotly.io as pio
-
-                html = pio.to_html(fig, full_html=False, include_plotlyjs="cdn")
-                self.alpha_plot_view.setHtml(html)
-                self.alpha_plot_view.setVisible(True)
-            else:
-                w = PlotWindow(self)
-                w.display_plot(fig)
+
+            def render(fig):
+                self._last_fig = fig
+                if self.alpha_plot_view:
+                    import plotly.io as pio
+
+                    html = pio.to_html(fig, full_html=False, include_plotlyjs="cdn")
+                    self.alpha_plot_view.setHtml(html)
+                    self.alpha_plot_view.setVisible(True)
+                else:
+                    self._show_figure(fig)
+
+            self._run_task(
+                "plot",
+                lambda cancel, progress: plot_alpha_spending(alpha, looks=5),
+                render,
+            )
         except Exception as e:
             show_error(self, str(e))
 
@@ -1453,10 +1540,14 @@ class ABTestWindow(QMainWindow):
             from plots import plot_bootstrap_distribution
             ua, ca = int(self.users_A_var.text()), int(self.conv_A_var.text())
             ub, cb = int(self.users_B_var.text()), int(self.conv_B_var.text())
-            fig = plot_bootstrap_distribution(ua, ca, ub, cb)
-            self._last_fig = fig
-            w = PlotWindow(self)
-            w.display_plot(fig)
+            self._run_task(
+                "plot",
+                lambda cancel, progress: plot_bootstrap_distribution(
+                    ua, ca, ub, cb, cancel=cancel, progress=progress
+                ),
+                self._show_figure,
+                label=self.tr("Bootstrap"),
+            )
         except Exception as e:
             show_error(self, str(e))
 
@@ -1466,19 +1557,28 @@ class ABTestWindow(QMainWindow):
             ub, cb = int(self.users_B_var.text()), int(self.conv_B_var.text())
             a0 = self.prior_alpha_spin.value()
             b0 = self.prior_beta_spin.value()
-            try:
-                prob, x, pa, pb = bayesian_analysis(a0, b0, ua, ca, ub, cb)
-            except Exception as e:
-                QMessageBox.critical(self, self.tr("Bayes Error"), str(e))
-                return
             tr = getattr(self, "tr", lambda x: x)
-            html = f"<pre>{tr('P(B>A)')} = {prob:.2%}</pre>"
-            self.results_text.setHtml(html)
-            self._add_history("Bayesian Analysis", html)
-            fig = plot_bayesian_posterior(a0, b0, ua, ca, ub, cb)
-            self._last_fig = fig
-            w = PlotWindow(self)
-            w.display_plot(fig)
+
+            def compute(cancel, progress):
+                prob, x, pa, pb = bayesian_analysis(a0, b0, ua, ca, ub, cb)
+                check_cancelled(cancel)
+                return prob, plot_bayesian_posterior(a0, b0, ua, ca, ub, cb)
+
+            def render(out):
+                prob, fig = out
+                html = f"<pre>{tr('P(B>A)')} = {prob:.2%}</pre>"
+                self.results_text.setHtml(html)
+                self._add_history("Bayesian Analysis", html)
+                self._last_fig = fig
+                w = PlotWindow(self)
+                w.display_plot(fig)
+
+            self._run_task(
+                RESULTS_TASK,
+                compute,
+                render,
+                on_error=lambda e: QMessageBox.critical(self, tr("Bayes Error"), str(e)),
+            )
         except Exception as e:
             QMessageBox.critical(self, self.tr("Error"), str(e))
 
@@ -1489,14 +1589,24 @@ class ABTestWindow(QMainWindow):
             p = self.baseline_slider.value() / 1000
             n = int(self.users_A_var.text()) + int(self.users_B_var.text())
             alpha = self.alpha_slider.value() / 100
-            fpr = run_aa_simulation(p, n, alpha)
-            html = (
-                f"<pre>{self.tr('Exp FPR')}: {alpha:.1%}, "
-                f"{self.tr('Actual FPR')}: {fpr:.1%}</pre>"
+
+            def render(fpr):
+                html = (
+                    f"<pre>{self.tr('Exp FPR')}: {alpha:.1%}, "
+                    f"{self.tr('Actual FPR')}: {fpr:.1%}</pre>"
+                )
+                self.results_text.setHtml(html)
+                self._add_history("A/A Test", html)
+                self._last_fig = None
+
+            self._run_task(
+                RESULTS_TASK,
+                lambda cancel, progress: run_aa_simulation(
+                    p, n, alpha, cancel=cancel, progress=progress
+                ),
+                render,
+                label=self.tr("A/A Test"),
             )
-            self.results_text.setHtml(html)
-            self._add_history("A/A Test", html)
-            self._last_fig = None
         except Exception as e:
             show_error(self, str(e))
 
@@ -1508,14 +1618,22 @@ class ABTestWindow(QMainWindow):
             ub, cb = int(self.users_B_var.text()), int(self.conv_B_var.text())
             alpha = self.alpha_slider.value() / 100
             url = self._config.get("webhook_url") or None
-            steps, pa = run_sequential_analysis(ua, ca, ub, cb, alpha, webhook_url=url)
-            txt = f"<pre>{self.tr('Pocock α')}={pa:.4f}\n"
-            for i, r in enumerate(steps, 1):
-                txt += f"{self.tr('Step')}{i}: p={r['p_value_ab']:.4f}, {self.tr('win')}={r['winner']}\n"
-            txt += "</pre>"
-            self.results_text.setHtml(txt)
-            self._add_history("Sequential Analysis", txt)
-            self._last_fig = None
+
+            def render(out):
+                steps, pa = out
+                txt = f"<pre>{self.tr('Pocock α')}={pa:.4f}\n"
+                for i, r in enumerate(steps, 1):
+                    txt += f"{self.tr('Step')}{i}: p={r['p_value_ab']:.4f}, {self.tr('win')}={r['winner']}\n"
+                txt += "</pre>"
+                self.results_text.setHtml(txt)
+                self._add_history("Sequential Analysis", txt)
+                self._last_fig = None
+
+            self._run_task(
+                RESULTS_TASK,
+                lambda cancel, progress: run_sequential_analysis(ua, ca, ub, cb, alpha, webhook_url=url),
+                render,
+            )
         except Exception as e:
             show_error(self, str(e))
 
@@ -1527,18 +1645,25 @@ class ABTestWindow(QMainWindow):
             ub, cb = int(self.users_B_var.text()), int(self.conv_B_var.text())
             alpha = self.alpha_slider.value() / 100
             url = self._config.get("webhook_url") or None
-            steps = run_obrien_fleming(ua, ca, ub, cb, alpha, webhook_url=url)
-            txt = "<pre>" + self.tr("O'Brien-Fleming") + "\n"
-            for i, r in enumerate(steps, 1):
-                txt += (
-                    f"{self.tr('Step')}{i}: p={r['p_value_ab']:.4f} "
-                    f"{self.tr('thr')}={r['threshold']:.4f} "
-                    f"{self.tr('win')}={r['winner']}\n"
-                )
-            txt += "</pre>"
-            self.results_text.setHtml(txt)
-            self._add_history("OBrien-Fleming", txt)
-            self._last_fig = None
+
+            def render(steps):
+                txt = "<pre>" + self.tr("O'Brien-Fleming") + "\n"
+                for i, r in enumerate(steps, 1):
+                    txt += (
+                        f"{self.tr('Step')}{i}: p={r['p_value_ab']:.4f} "
+                        f"{self.tr('thr')}={r['threshold']:.4f} "
+                        f"{self.tr('win')}={r['winner']}\n"
+                    )
+                txt += "</pre>"
+                self.results_text.setHtml(txt)
+                self._add_history("OBrien-Fleming", txt)
+                self._last_fig = None
+
+            self._run_task(
+                RESULTS_TASK,
+                lambda cancel, progress: run_obrien_fleming(ua, ca, ub, cb, alpha, webhook_url=url),
+                render,
+            )
         except Exception as e:
             show_error(self, str(e))
 
@@ -1559,6 +1684,8 @@ class ABTestWindow(QMainWindow):
                 f"{self.tr('Profit')}:   {pf:.2f}\n"
                 f"{self.tr('ROI')}:      {ro:.2f}%</pre>"
             )
+            # a running analysis must not overwrite this result
+            self._tasks.cancel(RESULTS_TASK)
             self.results_text.setHtml(html)
             self._add_history("ROI", html)
         except Exception as e:
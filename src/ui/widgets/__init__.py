@@ -1,6 +1,8 @@
 from .help import HelpIcon, with_help_label
+from .debounce import Debouncer
 
 __all__ = [
     "HelpIcon",
     "with_help_label",
+    "Debouncer",
 ]
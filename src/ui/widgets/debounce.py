@@ -0,0 +1,51 @@
+"""Coalesce bursts of signals, such as keystrokes, into one delayed call."""
+
+from typing import Any, Callable
+
+try:
+    from PySide6.QtCore import QTimer
+except Exception:
+    try:
+        from PyQt6.QtCore import QTimer
+    except Exception:  # pragma: no cover - allow tests without PyQt installed
+        QTimer = None
+
+
+class Debouncer:
+    """Call ``callback`` with the latest arguments once ``delay_ms`` passes quietly.
+
+    Connect it to a signal in place of the slot. Without Qt the call is made
+    immediately.
+    """
+
+    def __init__(self, callback: Callable[..., Any], delay_ms: int = 250, parent: Any = None) -> None:
+        self._callback = callback
+        self._args: tuple = ()
+        self._pending = False
+        self._timer = None
+        if QTimer is not None:
+            self._timer = QTimer(parent)
+            self._timer.setSingleShot(True)
+            self._timer.setInterval(delay_ms)
+            self._timer.timeout.connect(self.flush)
+
+    def __call__(self, *args: Any) -> None:
+        self._args = args
+        self._pending = True
+        if self._timer is None:
+            self.flush()
+        else:
+            self._timer.start()
+
+    def flush(self) -> None:
+        """Run the pending call now, if any."""
+        if self._timer is not None:
+            self._timer.stop()
+        if self._pending:
+            self._pending = False
+            self._callback(*self._args)
+
+    def cancel(self) -> None:
+        if self._timer is not None:
+            self._timer.stop()
+        self._pending = False
@@ -15,15 +15,25 @@ def export_pdf(sections: Dict[str, Iterable[str]], filepath: str) -> None:
     """Render ``sections`` using the notebook template and save as ``.ipynb``.
 
     ``export_pdf`` is kept as a thin wrapper for backwards compatibility. It
-    simply redirects to :func:`export_notebook` while adjusting the extension.
+    simply redirects to :func:`export_notebook` while adjusting the extension,
+    unless the ``export`` plugin provides a real PDF exporter.
     """
+    plug = plugin_loader.get_plugin("export")
+    if plug is not None and hasattr(plug, "export_pdf"):
+        return plug.export_pdf(sections, filepath)
     if filepath.lower().endswith(".pdf"):
         filepath = filepath[:-4] + ".ipynb"
     export_notebook(sections, filepath)
 
 
 def export_excel(sections: Dict[str, Iterable[str]], filepath: str) -> None:
-    """Export results to a Markdown file instead of Excel."""
+    """Export results to a Markdown file instead of Excel.
+
+    The ``export`` plugin, when available, writes a real Excel file instead.
+    """
+    plug = plugin_loader.get_plugin("export")
+    if plug is not None and hasattr(plug, "export_excel"):
+        return plug.export_excel(sections, filepath)
     if filepath.lower().endswith(('.xls', '.xlsx')):
         filepath = filepath.rsplit('.', 1)[0] + '.md'
     export_markdown(sections, filepath)
@@ -83,9 +93,3 @@ def compute_custom_metric(records: List[Dict[str, Any]], expression: str) -> flo
     """Safely evaluate simple metric expressions on ``records``."""
     return safe_eval(expression, records)
 
-
-# Replace export helpers with plugin implementations if available
-_plug = plugin_loader.get_plugin("export")
-if _plug:
-    export_pdf = getattr(_plug, "export_pdf", export_pdf)  # type: ignore
-    export_excel = getattr(_plug, "export_excel", export_excel)  # type: ignore
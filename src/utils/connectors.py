@@ -7,11 +7,6 @@ from typing import Any, Dict, List, Type
 
 import plugin_loader
 
-try:  # UI message boxes are optional
-    from PyQt6.QtWidgets import QMessageBox
-except Exception:  # pragma: no cover - optional dependency
-    QMessageBox = None  # type: ignore
-
 # Registry for dynamically added connectors
 _CONNECTORS: Dict[str, Type] = {}
 
@@ -30,32 +25,22 @@ def _missing_class(name: str) -> Type:
     return MissingConnector
 
 
-# Ensure plugins are loaded before accessing the registry
-plugin_loader.load_plugins()
+_plugins_checked = False
 
-# Plugins may register their connectors during import
-_plug = plugin_loader.get_plugin("connectors")
-if _plug:
-    for attr in dir(_plug):
-        obj = getattr(_plug, attr)
-        if isinstance(obj, type) and attr.endswith("Connector"):
-            register_connector(attr.replace("Connector", ""), obj)
 
-# Ensure registry is populated if plugins were loaded lazily
-if "bigquery" not in _CONNECTORS or "redshift" not in _CONNECTORS:
-    plugin_loader.load_plugins()
-    _plug = plugin_loader.get_plugin("connectors")
-    if _plug:
-        for attr in dir(_plug):
-            obj = getattr(_plug, attr)
-            if isinstance(obj, type) and attr.endswith("Connector"):
-                register_connector(attr.replace("Connector", ""), obj)
+def _ensure_plugin_connectors() -> None:
+    """Import the ``connectors`` plugin on first use; it registers its classes."""
+    global _plugins_checked
+    if not _plugins_checked:
+        _plugins_checked = True
+        plugin_loader.get_plugin("connectors")
 
 
 class _ConnectorProxy:
     _name: str
 
     def __new__(cls, *args: Any, **kwargs: Any):
+        _ensure_plugin_connectors()
         real_cls = _CONNECTORS.get(cls._name)
         if real_cls is None:
             raise ImportError(f"{cls.__name__} plugin not available")
@@ -71,7 +56,12 @@ class RedshiftConnector(_ConnectorProxy):
 
 
 def _show_error(msg: str) -> None:
-    if QMessageBox and hasattr(QMessageBox, "critical"):
+    # Qt is imported only when there is an error to show
+    try:
+        from PyQt6.QtWidgets import QMessageBox
+    except Exception:  # pragma: no cover - optional dependency
+        return
+    if hasattr(QMessageBox, "critical"):
         QMessageBox.critical(None, "Error", msg)
 
 
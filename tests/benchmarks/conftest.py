@@ -0,0 +1,91 @@
+"""Opt-in performance benchmarks built on pytest-benchmark.
+
+Benchmarks are skipped unless ``ABTEST_BENCHMARK=1`` is set::
+
+    ABTEST_BENCHMARK=1 ABTEST_BENCH_SIZES=10k,1M \
+        pytest tests/benchmarks --benchmark-json=bench.json
+    python scripts/compare_benchmarks.py bench.json --threshold 20
+
+``ABTEST_BENCH_SIZES`` selects the synthetic input sizes (``10k``, ``1M``,
+``10M``; default ``10k``). Benchmarks whose cost is not linear in the input
+cap the sizes they accept with ``@pytest.mark.max_size(n)``.
+"""
+import functools
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(__file__), "..", "..")
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, ROOT)
+
+SIZES = {"10k": 10_000, "1M": 1_000_000, "10M": 10_000_000}
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def selected_sizes():
+    names = [s.strip() for s in os.getenv("ABTEST_BENCH_SIZES", "10k").split(",") if s.strip()]
+    unknown = [s for s in names if s not in SIZES]
+    if unknown:
+        raise pytest.UsageError(f"unknown ABTEST_BENCH_SIZES entries: {unknown}; use {list(SIZES)}")
+    return names
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "max_size(n): largest synthetic size the benchmark runs at")
+
+
+def pytest_generate_tests(metafunc):
+    if "size" in metafunc.fixturenames:
+        names = selected_sizes()
+        metafunc.parametrize("size", [SIZES[s] for s in names], ids=names)
+
+
+def pytest_collection_modifyitems(config, items):
+    enabled = bool(os.getenv("ABTEST_BENCHMARK"))
+    off = pytest.mark.skip(reason="set ABTEST_BENCHMARK=1 to run benchmarks")
+    for item in items:
+        if not str(item.path).startswith(HERE):
+            continue
+        if not enabled:
+            item.add_marker(off)
+            continue
+        cap = item.get_closest_marker("max_size")
+        size = getattr(item, "callspec", None) and item.callspec.params.get("size")
+        if cap is not None and size and size > cap.args[0]:
+            item.add_marker(pytest.mark.skip(reason=f"capped at {cap.args[0]:,} rows"))
+
+
+def rounds_for(size):
+    """Fewer rounds for larger inputs keeps a 10M run within minutes."""
+    return 20 if size <= 10_000 else 5 if size <= 1_000_000 else 2
+
+
+@functools.lru_cache(maxsize=2)
+def synthetic_frame(size, seed=0):
+    """Two-group user-level frame with every column the engine can use."""
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    group = np.where(rng.random(size) < 0.5, "A", "B")
+    lift = np.where(group == "B", 0.02, 0.0)
+    pre = rng.gamma(2.0, 5.0, size)
+    denominator = rng.poisson(3.0, size) + 1.0
+    return pd.DataFrame(
+        {
+            "group": group,
+            "metric": pre * 0.8 + rng.normal(0.0, 2.0, size) * (1 + lift),
+            "conversion": (rng.random(size) < 0.1 + lift).astype(float),
+            "pre": pre,
+            "numerator": rng.binomial(denominator.astype(int), 0.3 + lift).astype(float),
+            "denominator": denominator,
+            "country": rng.choice(["ru", "kz", "by", "uz"], size),
+        }
+    )
+
+
+@pytest.fixture
+def frame(size):
+    return synthetic_frame(size)
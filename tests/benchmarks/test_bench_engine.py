@@ -0,0 +1,67 @@
+import pytest
+
+from conftest import rounds_for
+
+from abtest_core.bayes import prob_win_binomial, prob_win_continuous
+from abtest_core.engine import analyze_groups
+from abtest_core.stats_continuous import bootstrap_bca_ci
+from abtest_core.types import AnalysisConfig
+
+CASES = {
+    "binomial": ({"conversion": "metric"}, {"metric_type": "binomial"}),
+    "continuous": ({}, {"metric_type": "continuous"}),
+    "robust": ({}, {"metric_type": "continuous", "robust": True}),
+    "ratio": ({}, {"metric_type": "ratio"}),
+    "quantile": ({}, {"metric_type": "quantile", "quantile": 0.9}),
+    "cuped": ({}, {"metric_type": "continuous", "use_cuped": True, "preperiod_metric_col": "pre"}),
+    "segments": ({}, {"metric_type": "continuous", "segments": ["country"]}),
+}
+
+
+@pytest.mark.parametrize("case", list(CASES))
+def test_analyze_groups(benchmark, frame, size, case):
+    rename, cfg = CASES[case]
+    columns = ["group", "metric", "pre", "country"]
+    if case == "ratio":
+        columns = ["group", "numerator", "denominator"]
+    df = frame.drop(columns="metric").rename(columns=rename) if rename else frame
+    df = df[columns]
+    config = AnalysisConfig(alpha=0.05, **cfg)
+    # CUPED adjusts the frame in place, so every round gets a fresh copy
+    result = benchmark.pedantic(
+        analyze_groups,
+        setup=lambda: ((df.copy(),), {"config": config}),
+        rounds=rounds_for(size),
+    )
+    assert 0.0 <= result.p_value <= 1.0
+
+
+# the BCa jackknife is quadratic in the sample size
+@pytest.mark.max_size(10_000)
+def test_bootstrap_bca_ci(benchmark, frame, size):
+    a = frame.loc[frame["group"] == "A", "metric"].to_numpy()
+    b = frame.loc[frame["group"] == "B", "metric"].to_numpy()
+    lo, hi = benchmark.pedantic(
+        bootstrap_bca_ci,
+        args=(a, b, lambda x, y: float(y.mean() - x.mean())),
+        kwargs={"iters": 200},
+        rounds=rounds_for(size),
+    )
+    assert lo <= hi
+
+
+def test_prob_win_binomial(benchmark, frame, size):
+    conv = frame["conversion"].to_numpy()
+    is_a = (frame["group"] == "A").to_numpy()
+    x1, n1 = int(conv[is_a].sum()), int(is_a.sum())
+    x2, n2 = int(conv[~is_a].sum()), int((~is_a).sum())
+    res = benchmark(prob_win_binomial, x1, n1, x2, n2, rope=(-0.001, 0.001))
+    # grid quadrature of very narrow posteriors can overshoot 1 slightly
+    assert res["p_win"] == pytest.approx(min(max(res["p_win"], 0.0), 1.0), abs=1e-3)
+
+
+def test_prob_win_continuous(benchmark, frame, size):
+    a = frame.loc[frame["group"] == "A", "metric"].to_numpy()
+    b = frame.loc[frame["group"] == "B", "metric"].to_numpy()
+    res = benchmark.pedantic(prob_win_continuous, args=(a, b), rounds=rounds_for(size))
+    assert 0.0 <= res["p_win"] <= 1.0
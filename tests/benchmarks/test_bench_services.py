@@ -0,0 +1,106 @@
+import io
+import json
+import os
+
+import pytest
+
+from conftest import rounds_for
+
+from flags import FeatureFlagStore
+from plugins.bayesian import bayesian_analysis
+
+os.environ.setdefault("JWT_SECRET_KEY", "bench-secret")
+
+
+def test_bayesian_plugin(benchmark):
+    # cost is set by the 500-point grid, not by the counts; math.gamma in the
+    # plugin overflows beyond ~170 trials, so the counts stay small
+    prob, *_ = benchmark(bayesian_analysis, 1, 1, 150, 15, 150, 21)
+    assert 0.0 <= prob <= 1.0
+
+
+@pytest.mark.max_size(10_000)
+def test_flag_store_writes(benchmark, tmp_path, size):
+    counter = iter(range(10**9))
+
+    def setup():
+        store = FeatureFlagStore(str(tmp_path / f"flags-{next(counter)}.db"))
+        return (store,), {}
+
+    def write(store):
+        for i in range(size // 10):
+            store.create_flag(f"f{i}", enabled=bool(i % 2), rollout=50.0)
+        for i in range(0, size // 10, 2):
+            store.update_flag(f"f{i}", rollout=25.0)
+        store.close()
+
+    benchmark.pedantic(write, setup=setup, rounds=3)
+
+
+@pytest.mark.max_size(1_000_000)
+def test_flag_store_reads(benchmark, tmp_path, size):
+    store = FeatureFlagStore(str(tmp_path / "flags.db"))
+    n_flags = 1000
+    for i in range(n_flags):
+        store.create_flag(f"f{i}", enabled=True)
+    names = [f"f{i % n_flags}" for i in range(size // 100)]
+
+    def read():
+        for name in names:
+            store.get_flag(name)
+        return store.list_flags()
+
+    flags = benchmark.pedantic(read, rounds=rounds_for(size))
+    assert len(flags) == n_flags
+    store.close()
+
+
+@pytest.fixture
+def analysis_client(monkeypatch):
+    pytest.importorskip("flask")
+    monkeypatch.setenv("RESULT_CACHE_SIZE", "0")
+    from api.analysis import create_app
+
+    client = create_app().test_client()
+    token = client.post("/login", json={"username": "admin", "password": "admin"}).get_json()["access_token"]
+    return client, {"Authorization": f"Bearer {token}"}
+
+
+def test_abtest_endpoint_counts(benchmark, analysis_client, frame, size):
+    client, headers = analysis_client
+    conv = frame["conversion"].to_numpy()
+    is_a = (frame["group"] == "A").to_numpy()
+    payload = {
+        "users_a": int(is_a.sum()),
+        "conv_a": int(conv[is_a].sum()),
+        "users_b": int((~is_a).sum()),
+        "conv_b": int(conv[~is_a].sum()),
+    }
+    resp = benchmark(client.post, "/abtest", json=payload, headers=headers)
+    assert resp.status_code == 200
+
+
+@pytest.mark.max_size(1_000_000)
+def test_abtest_endpoint_arrow(benchmark, analysis_client, frame, size):
+    pa = pytest.importorskip("pyarrow")
+    client, headers = analysis_client
+    table = pa.Table.from_pandas(frame[["group", "metric", "pre"]], preserve_index=False)
+    params = {
+        "schema": {"group_col": "group", "metric_col": "metric", "preperiod_metric_col": "pre"},
+        "config": {"metric_type": "continuous", "use_cuped": True},
+    }
+    table = table.replace_schema_metadata({"abtest": json.dumps(params)})
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    body = sink.getvalue()
+    resp = benchmark.pedantic(
+        client.post,
+        args=("/abtest",),
+        kwargs={
+            "data": body,
+            "headers": {**headers, "Content-Type": "application/vnd.apache.arrow.stream"},
+        },
+        rounds=rounds_for(size),
+    )
+    assert resp.status_code == 200
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from abtest_core.aggregation import aggregate_event_chunks, aggregate_events
+from abtest_core.types import DataSchema
+from abtest_core.validation import ValidationError
+
+
+def _events(seed=0, n=20000, users=3000):
+    rng = np.random.default_rng(seed)
+    ids = rng.integers(0, users, n)
+    uid = np.array([f"u{i}" for i in ids], dtype=object)
+    group = np.where(ids % 2 == 0, "A", "B").astype(object)
+    return pd.DataFrame(
+        {"uid": uid, "group": group, "revenue": rng.exponential(1.0, n), "country": rng.choice(["RU", "US"], n)}
+    )
+
+
+SCHEMA = DataSchema(user_id="uid", group_col="group", metric_col="revenue")
+
+
+def test_aggregate_events_matches_groupby():
+    df = _events()
+    res = aggregate_events(df, SCHEMA, carry=["country"])
+    expected = df.groupby("uid").agg(revenue=("revenue", "sum"), n=("revenue", "size"), group=("group", "first"))
+    got = res.users.set_index("uid").loc[expected.index]
+    assert np.allclose(got["revenue"], expected["revenue"])
+    assert (got["n_events"] == expected["n"]).all()
+    assert (got["group"] == expected["group"]).all()
+    assert res.n_events == len(df)
+    assert res.multi_group_users.size == 0
+
+
+def test_multi_group_users_detected():
+    df = _events(1)
+    df.loc[len(df)] = {"uid": df["uid"].iloc[0], "group": "C", "revenue": 1.0, "country": "RU"}
+    res = aggregate_events(df, SCHEMA)
+    assert list(res.multi_group_users) == [df["uid"].iloc[0]]
+    assert df["uid"].iloc[0] not in set(res.users["uid"])
+    kept = aggregate_events(df, SCHEMA, on_conflict="first")
+    assert len(kept.users) == df["uid"].nunique()
+    with pytest.raises(ValidationError) as exc:
+        aggregate_events(df, SCHEMA, on_conflict="error")
+    assert exc.value.code == "user_in_multiple_groups"
+
+
+def test_missing_user_ids_rejected():
+    df = _events(2, n=500)
+    df.loc[3, "uid"] = None
+    with pytest.raises(ValidationError) as exc:
+        aggregate_events(df, SCHEMA)
+    assert exc.value.code == "missing_user_id_values"
+    with pytest.raises(ValidationError):
+        aggregate_event_chunks([df.iloc[:250], df.iloc[250:]], SCHEMA)
+
+
+def test_chunked_aggregation_with_spill(tmp_path):
+    df = _events(2)
+    whole = aggregate_events(df, SCHEMA).users.set_index("uid").sort_index()
+    chunks = (df.iloc[i: i + 1500] for i in range(0, len(df), 1500))
+    res = aggregate_event_chunks(chunks, SCHEMA, max_rows=2000, partitions=4, spill_dir=str(tmp_path))
+    got = res.users.set_index("uid").sort_index()
+    assert got.index.equals(whole.index)
+    assert np.allclose(got["revenue"], whole["revenue"])
+    assert (got["group"] == whole["group"]).all()
+    assert list(tmp_path.iterdir()) == []
@@ -1,5 +1,7 @@
 import os
 import sys
+import time
+
 import pytest
 
 pytest.importorskip("flask")
@@ -84,7 +86,114 @@ def test_analyze_endpoint(analysis_client):
     assert 'p_value_ab' in resp.get_json()
 
 
+def test_abtest_result_cache_and_etag(analysis_client):
+    headers = {'Authorization': f'Bearer {_login(analysis_client)}'}
+    payload = {'users_a': 50, 'conv_a': 5, 'users_b': 50, 'conv_b': 9}
+    first = analysis_client.post('/abtest', json=payload, headers=headers)
+    assert first.headers['X-Cache'] == 'computed'
+    etag = first.headers['ETag']
+    second = analysis_client.post('/abtest', json=dict(reversed(list(payload.items()))), headers=headers)
+    assert second.headers['X-Cache'] == 'memory'
+    assert second.headers['ETag'] == etag
+    assert second.get_json() == first.get_json()
+    cached = analysis_client.post('/abtest', json=payload, headers={**headers, 'If-None-Match': etag})
+    assert cached.status_code == 304
+
+
+def test_abtest_accepts_gzip_ndjson(analysis_client):
+    import gzip
+    import json
+
+    headers = {'Authorization': f'Bearer {_login(analysis_client)}'}
+    rows = [{'g': 'A' if i % 2 else 'B', 'y': float(i % 5)} for i in range(300)]
+    params = {'schema': {'group_col': 'g', 'metric_col': 'y'}, 'config': {'metric_type': 'continuous'}}
+    resp = analysis_client.post(
+        '/abtest',
+        data=gzip.compress('\n'.join(json.dumps(r) for r in rows).encode()),
+        headers={
+            **headers,
+            'Content-Type': 'application/x-ndjson',
+            'Content-Encoding': 'gzip',
+            'X-Abtest-Params': json.dumps(params),
+        },
+    )
+    assert resp.status_code == 200
+    assert 'p_value' in resp.get_json()
+    bad = analysis_client.post('/abtest', data=b'x', headers={**headers, 'Content-Type': 'text/csv'})
+    assert bad.status_code == 415
+    ndjson = {**headers, 'Content-Type': 'application/x-ndjson'}
+    bad_params = analysis_client.post('/abtest', data=b'{}', headers={**ndjson, 'X-Abtest-Params': '{oops'})
+    assert bad_params.status_code == 400 and bad_params.get_json()['code'] == 'bad_payload'
+    not_gzip = analysis_client.post(
+        '/jobs',
+        data=b'{"g": "A", "y": 1}',
+        headers={**ndjson, 'Content-Encoding': 'gzip', 'X-Abtest-Params': json.dumps(params)},
+    )
+    assert not_gzip.status_code == 400 and not_gzip.get_json()['code'] == 'bad_payload'
+
+
 def test_metrics_endpoint(analysis_client):
     resp = analysis_client.get('/metrics')
     assert resp.status_code == 200
 
+
+def test_bad_config_is_rejected_before_running(tmp_path, monkeypatch):
+    monkeypatch.setenv('JOBS_DB', str(tmp_path / 'jobs.db'))
+    app = create_analysis_app()
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {_login(client)}'}
+    rows = [{'g': 'A' if i % 2 else 'B', 'y': float(i % 7)} for i in range(200)]
+    base = {'rows': rows, 'schema': {'group_col': 'g', 'metric_col': 'y'}}
+    for config, code in [
+        ({'metric_type': 'nope'}, 'bad_config'),
+        ({'metric_type': 'continuous', 'alpha': 5}, 'bad_config'),
+        ({'metric_type': 'continuous', 'sided': 'up'}, 'bad_config'),
+        (['robust'], 'bad_config'),
+    ]:
+        for route in ('/abtest', '/jobs'):
+            resp = client.post(route, json={**base, 'config': config}, headers=headers)
+            assert resp.status_code == 400, (route, config)
+            assert resp.get_json()['code'] == code
+    resp = client.post('/abtest', json={**base, 'schema': {'metric_col': 'y'}}, headers=headers)
+    assert resp.status_code == 400 and resp.get_json()['code'] == 'bad_schema'
+    # nothing was queued, so the job queue was never started
+    assert 'job_queue' not in app.extensions
+
+
+def test_jobs_endpoints(tmp_path, monkeypatch):
+    monkeypatch.setenv('JOBS_DB', str(tmp_path / 'jobs.db'))
+    monkeypatch.setenv('JOBS_START_METHOD', 'fork')
+    app = create_analysis_app()
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {_login(client)}'}
+    rows = [{'g': 'A' if i % 2 else 'B', 'y': float(i % 7)} for i in range(200)]
+    payload = {
+        'rows': rows,
+        'schema': {'group_col': 'g', 'metric_col': 'y'},
+        'config': {'metric_type': 'continuous', 'robust': True},
+    }
+    try:
+        resp = client.post('/jobs', json=payload, headers=headers)
+        assert resp.status_code == 202
+        job_id = resp.get_json()['id']
+        for _ in range(400):
+            job = client.get(f'/jobs/{job_id}', headers=headers).get_json()
+            if job['status'] not in ('queued', 'running'):
+                break
+            time.sleep(0.05)
+        assert job['status'] == 'done'
+        assert 'yuen' in job['result']['method_notes']
+        assert client.get('/jobs/nope', headers=headers).status_code == 404
+        assert b'analysis_jobs_queued' in client.get('/metrics').data
+    finally:
+        app.extensions['job_queue'].shutdown()
+
+
+def test_metrics_include_stage_histograms(analysis_client):
+    from abtest_core.engine import analyze_groups
+    from abtest_core.types import AnalysisConfig
+
+    df = {'group': ['A', 'B'] * 10, 'metric': list(range(20))}
+    analyze_groups(df, AnalysisConfig(alpha=0.05, metric_type='continuous'))
+    body = analysis_client.get('/metrics').data
+    assert b'analysis_stage_seconds_count{stage="test"}' in body
@@ -0,0 +1,61 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from api.cache import ResultCache, cache_key
+
+
+def test_cache_key_is_canonical():
+    a = cache_key({"config": {"alpha": 0.05, "metric_type": "binomial"}, "rows": [1.0, 2]}, version="v1")
+    b = cache_key({"rows": [1, 2.0], "config": {"metric_type": "binomial", "alpha": 0.05}}, version="v1")
+    assert a == b
+    assert a != cache_key({"rows": [1, 2]}, version="v2")
+
+
+def test_lru_ttl_and_disk_tier(tmp_path):
+    db = str(tmp_path / "cache.db")
+    cache = ResultCache(maxsize=1, ttl=60, db_path=db)
+    cache.set("k1", {"v": 1})
+    cache.set("k2", {"v": 2})
+    assert cache.get("k2") == ({"v": 2}, "memory")
+    assert cache.get("k1") == ({"v": 1}, "disk")
+    other = ResultCache(maxsize=4, ttl=60, db_path=db)
+    assert other.get("k2") == ({"v": 2}, "disk")
+    expired = ResultCache(maxsize=4, ttl=-1, db_path=str(tmp_path / "old.db"))
+    expired.set("k", 1)
+    assert expired.get("k") == (None, None)
+
+
+def test_concurrent_requests_coalesce():
+    cache = ResultCache()
+    calls = []
+    gate = threading.Event()
+
+    def compute():
+        calls.append(1)
+        gate.wait(5)
+        return {"answer": 42}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)
+    gate.set()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert sorted(src for _, src in results) == ["coalesced"] * 4 + ["computed"]
+    assert cache.get_or_compute("k", compute) == ({"answer": 42}, "memory")
+
+
+def test_errors_are_not_cached():
+    cache = ResultCache()
+    with pytest.raises(ValueError):
+        cache.get_or_compute("k", lambda: (_ for _ in ()).throw(ValueError("boom")))
+    assert cache.get_or_compute("k", lambda: 1) == (1, "computed")
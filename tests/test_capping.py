@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from abtest_core.capping import MetricCapper
+from abtest_core.engine import analyze_groups
+from abtest_core.types import AnalysisConfig
+
+
+def test_streaming_capped_moments_match_clipped_array():
+    rng = np.random.default_rng(0)
+    data = rng.pareto(1.5, 200001)
+    data[::1000] = np.nan
+    capper = MetricCapper(0.99, k=400)
+    for chunk in np.array_split(data, 7):
+        capper.partial_fit(chunk)
+    rank = np.mean(data[~np.isnan(data)] <= capper.upper)
+    assert rank == pytest.approx(0.99, abs=capper.sketch.rank_error)
+    for chunk in np.array_split(data, 7):
+        capper.update(chunk)
+    clipped = capper.transform(data)
+    clipped = clipped[~np.isnan(clipped)]
+    mom = capper.moments()
+    assert mom["n"] == clipped.size
+    assert mom["mean"] == pytest.approx(clipped.mean())
+    assert mom["var"] == pytest.approx(clipped.var(ddof=1))
+    assert mom["n_capped"] == int(np.count_nonzero(data > capper.upper))
+
+
+def test_two_sided_winsorization_in_place():
+    values = np.arange(100, dtype=float)
+    capper = MetricCapper(0.9, lower_quantile=0.1).partial_fit(values)
+    out = capper.transform(values, out=values)
+    assert out is values
+    assert values.min() == capper.lower and values.max() == capper.upper
+
+
+def test_engine_caps_on_control():
+    rng = np.random.default_rng(1)
+    a = rng.lognormal(0, 1, 2000)
+    b = rng.lognormal(0, 1, 2000)
+    b[0] = 1e6
+    df = pd.DataFrame({"group": ["A"] * 2000 + ["B"] * 2000, "metric": np.concatenate([a, b])})
+    cfg = AnalysisConfig(alpha=0.05, metric_type="continuous", cap_quantile=0.99)
+    res = analyze_groups(df, cfg)
+    cap = res.meta["capping"]
+    assert cap["on"] == "control"
+    assert np.mean(a <= cap["threshold"]) == pytest.approx(0.99, abs=0.005)
+    assert abs(res.effect) < 0.2
+    assert "Capped at p99 (control)" in res.method_notes
+    assert df["metric"].max() == 1e6
+
+
+def test_engine_capping_threshold_is_deterministic(monkeypatch):
+    import abtest_core.engine as engine
+
+    rng = np.random.default_rng(2)
+    values = rng.lognormal(0, 1, 40000)
+    df = pd.DataFrame({"group": ["A"] * 20000 + ["B"] * 20000, "metric": values})
+    cfg = AnalysisConfig(alpha=0.05, metric_type="continuous", cap_quantile=0.99)
+    exact = analyze_groups(df, cfg).meta["capping"]["threshold"]
+    assert exact == np.quantile(values[:20000], 0.99, method="inverted_cdf")
+    monkeypatch.setattr(engine, "_EXACT_SKETCH_ROWS", 1000)
+    runs = [analyze_groups(df, cfg) for _ in range(3)]
+    assert len({(r.p_value, r.meta["capping"]["threshold"]) for r in runs}) == 1
@@ -34,3 +34,167 @@ def test_run_analysis_text(tmp_path, caplog):
     out = caplog.text
     assert "p_value_ab" in out
 
+
+def _experiments(n):
+    return [
+        {"id": f"exp{i}", "users_a": 1000, "conv_a": 100 + i % 7, "users_b": 1000, "conv_b": 110 + i % 11}
+        for i in range(n)
+    ]
+
+
+def test_run_batch_jsonl_in_input_order(tmp_path, caplog):
+    _setup_caplog(caplog)
+    src_file = tmp_path / "exps.jsonl"
+    exps = _experiments(40)
+    exps[5] = {"id": "bad", "users_a": 10, "conv_a": 20, "users_b": 10, "conv_b": 1}
+    src_file.write_text("\n".join(json.dumps(e) for e in exps) + "\n")
+    out_file = tmp_path / "out.jsonl"
+
+    cli.main([
+        "run-batch", "--source", str(src_file), "--output", str(out_file),
+        "--workers", "2", "--chunk-size", "3",
+    ])
+    rows = [json.loads(line) for line in out_file.read_text().splitlines()]
+    assert [r["index"] for r in rows] == list(range(40))
+    assert rows[0]["id"] == "exp0" and "p_value_ab" in rows[0]["result"]
+    assert "error" in rows[5]
+    stats = json.loads(caplog.records[-1].message)
+    assert stats["experiments"] == 40 and stats["errors"] == 1
+
+
+def test_run_batch_reports_malformed_lines(tmp_path):
+    src_file = tmp_path / "exps.jsonl"
+    lines = [json.dumps(e) for e in _experiments(4)]
+    lines[1] = '{"id": "broken", "users_a": '
+    lines[2] = '[1, 2]'
+    src_file.write_text("\n".join(lines) + "\n")
+    out_file = tmp_path / "out.jsonl"
+
+    cli.main(["run-batch", "--source", str(src_file), "--output", str(out_file), "--workers", "1"])
+    rows = [json.loads(line) for line in out_file.read_text().splitlines()]
+    assert [r["index"] for r in rows] == [0, 1, 2, 3]
+    assert rows[1]["error"]["code"] == "JSONDecodeError" and "line 2" in rows[1]["error"]["details"]
+    assert "line 3" in rows[2]["error"]["details"]
+    assert "result" in rows[0] and "result" in rows[3]
+
+
+def _slow_first_chunk(chunk):
+    import time
+
+    if chunk[0][0] == 0:
+        time.sleep(1.0)
+    return [{"index": i} for i, _ in chunk]
+
+
+def test_ordered_batch_bounds_buffered_chunks(monkeypatch):
+    monkeypatch.setattr(cli, "_run_chunk", _slow_first_chunk)
+    pulled = []
+
+    def chunks():
+        for i in range(100):
+            pulled.append(i)
+            yield [(i, {})]
+
+    results = cli._batch_results(chunks(), workers=2, ordered=True)
+    assert next(results) == {"index": 0}
+    assert len(pulled) <= 4 * 2 + 1
+    assert [r["index"] for r in results] == list(range(1, 100))
+
+
+def test_run_batch_csv_stdin_as_completed(tmp_path, monkeypatch, capsys):
+    import io
+
+    lines = ["id,users_a,conv_a,users_b,conv_b,alpha"]
+    lines += [f"e{i},500,{40 + i},500,{50 + i},0.05" for i in range(10)]
+    monkeypatch.setattr(sys, "stdin", io.StringIO("\n".join(lines) + "\n"))
+
+    cli.main(["run-batch", "--input-format", "csv", "--workers", "1", "--order", "completed"])
+    rows = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert sorted(r["index"] for r in rows) == list(range(10))
+    assert all("result" in r for r in rows)
+
+
+def _events_csv(path, n=4000, seed=1):
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    grp = np.where(rng.random(n) < 0.5, "control", "test")
+    pre = rng.normal(5, 1, n)
+    df = pd.DataFrame(
+        {
+            "uid": np.arange(n),
+            "variant": grp,
+            "revenue": 0.9 * pre + rng.normal(0, 0.5, n) + 0.05 * (grp == "test"),
+            "revenue_pre": pre,
+            "country": rng.choice(["de", "fr", "us"], n),
+            "unused": "x" * 20,
+        }
+    )
+    df.to_csv(path, index=False)
+    return df
+
+
+def test_analyze_file_matches_in_memory_engine(tmp_path, caplog):
+    import pytest
+    from abtest_core import AnalysisConfig, analyze_groups
+
+    _setup_caplog(caplog)
+    src_file = tmp_path / "export.csv"
+    df = _events_csv(src_file)
+    schema = {"group_col": "variant", "metric_col": "revenue", "preperiod_metric_col": "revenue_pre"}
+    config = {"metric_type": "continuous", "use_cuped": True, "segments": ["country"]}
+    (tmp_path / "config.json").write_text(json.dumps(config))
+
+    cli.main([
+        "analyze-file", "--source", str(src_file), "--schema", json.dumps(schema),
+        "--config", "@" + str(tmp_path / "config.json"), "--chunk-rows", "333",
+    ])
+    res = json.loads(caplog.records[-1].message)
+    expected = analyze_groups(
+        df.rename(columns={"variant": "group", "revenue": "metric"}),
+        AnalysisConfig(alpha=0.05, preperiod_metric_col="revenue_pre", **config),
+    )
+    assert res["groups"] == list(df["variant"].unique())
+    assert abs(res["p_value"] - expected.p_value) < 1e-9
+    assert abs(res["effect"] - expected.effect) < 1e-9
+    assert "CUPED theta" in res["method_notes"]
+    assert [s["p_adj"] for s in res["segments"]] == pytest.approx([s["p_adj"] for s in expected.segments])
+    assert res["meta"]["rows"] == len(df)
+
+
+def test_analyze_file_aggregates_events_and_infers_type(tmp_path, caplog):
+    _setup_caplog(caplog)
+    src_file = tmp_path / "events.csv"
+    rows = ["user,grp,converted"]
+    rows += [f"u{i},{'a' if i % 2 else 'b'},{int(i % 7 == 0)}" for i in range(600)]
+    rows += [f"u{i},{'a' if i % 2 else 'b'},0" for i in range(0, 600, 3)]  # repeat events
+    src_file.write_text("\n".join(rows) + "\n")
+    schema = {"user_id": "user", "group_col": "grp", "metric_col": "converted"}
+
+    cli.main([
+        "analyze-file", "--source", str(src_file), "--schema", json.dumps(schema),
+        "--aggregate", "--chunk-rows", "100",
+    ])
+    res = json.loads(caplog.records[-1].message)
+    assert res["meta"]["rows"] == 600
+    assert "newcombe" in res["method_notes"]
+
+
+def test_analyze_file_rejects_aggregate_without_user_id_and_empty_input(tmp_path, capsys):
+    import pytest
+
+    src_file = tmp_path / "empty.csv"
+    src_file.write_text("user,grp,converted\n")
+    schema = {"group_col": "grp", "metric_col": "converted"}
+    with pytest.raises(SystemExit) as exc:
+        cli.main(["analyze-file", "--source", str(src_file), "--schema", json.dumps(schema), "--aggregate"])
+    assert exc.value.code == 2
+    assert "--aggregate needs a user_id" in capsys.readouterr().err
+
+    for extra, config in (([], "{}"), ([], '{"metric_type": "binomial"}'), (["--aggregate"], "{}")):
+        with pytest.raises(SystemExit, match="has no data rows"):
+            cli.main([
+                "analyze-file", "--source", str(src_file), "--config", config,
+                "--schema", json.dumps({**schema, "user_id": "user"}), *extra,
+            ])
@@ -1,7 +1,7 @@
 import numpy as np
 import pandas as pd
 
-from abtest_core.cuped import estimate_theta, apply_cuped
+from abtest_core.cuped import RegressionAdjustment, estimate_theta, apply_cuped
 from abtest_core.types import AnalysisConfig
 from abtest_core.engine import analyze_groups
 
@@ -38,3 +38,33 @@ def test_cuped_skips_when_correlation_low():
     res = analyze_groups(df, config)
     assert "CUPED" in res.method_notes
     assert "skipped" in res.method_notes
+
+
+def test_regression_adjustment_chunked_matches_full():
+    rng = np.random.default_rng(1)
+    X = rng.normal(size=(5000, 3)) + 100.0
+    y = X @ np.array([0.5, -0.3, 0.2]) + rng.normal(size=5000)
+    full = RegressionAdjustment().update(y, X).fit()
+    merged = RegressionAdjustment()
+    for start in range(0, 5000, 700):
+        part = RegressionAdjustment().update(y[start:start + 700], X[start:start + 700])
+        merged.merge(part)
+    chunked = merged.fit()
+    assert np.allclose(full["theta"], chunked["theta"])
+    adjusted = merged.transform(y, X, chunked["theta"])
+    assert np.isclose(np.var(adjusted, ddof=1), chunked["var_adjusted"])
+    single = estimate_theta(X[:, 0], y)
+    assert chunked["variance_reduction_pct"] > single["variance_reduction_pct"]
+
+
+def test_engine_multi_covariate_cuped():
+    rng = np.random.default_rng(2)
+    n = 2000
+    x1, x2 = rng.normal(size=n), rng.normal(size=n)
+    metric = 0.6 * x1 + 0.6 * x2 + rng.normal(size=n)
+    df = pd.DataFrame({"group": ["A", "B"] * (n // 2), "metric": metric, "x1": x1, "x2": x2})
+    config = AnalysisConfig(
+        alpha=0.05, metric_type="continuous", use_cuped=True, cuped_covariates=["x1", "x2"]
+    )
+    res = analyze_groups(df, config)
+    assert "CUPED theta=[" in res.method_notes
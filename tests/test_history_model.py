@@ -0,0 +1,113 @@
+import json
+import os
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from migrations_runner import run_migrations
+from ui.history_model import CHART_ROLE, HistoryTableModel, Qt, chart_value, selected_ids
+
+
+NAMES = ["Bayesian Analysis", "A/A Test", "Sequential Analysis", "ROI", "Sample Size", "Quick AB Test", "OBrien-Fleming"]
+
+
+def _db(tmp_path, n):
+    conn = sqlite3.connect(tmp_path / 'history.db')
+    run_migrations(conn)
+    conn.executemany(
+        "INSERT INTO history(timestamp,test,result) VALUES(?,?,?)",
+        [
+            (f"2024-01-{1 + i % 28:02d}T10:00:00", NAMES[i % 7], json.dumps({"p_value": (i % 10) / 10}))
+            for i in range(n)
+        ],
+    )
+    conn.commit()
+    return conn
+
+
+def _ids(model):
+    return [model.record_id(r) for r in range(model.rowCount())]
+
+
+def test_pages_are_fetched_lazily(tmp_path):
+    conn = _db(tmp_path, 250)
+    model = HistoryTableModel(conn, page_size=100)
+    model.reload()
+    assert model.rowCount() == 100 and model.canFetchMore()
+    model.fetchMore()
+    model.fetchMore()
+    assert model.rowCount() == 250 and not model.canFetchMore()
+    assert _ids(model) == list(range(1, 251))
+    index = model.index(0, 3)
+    assert model.data(index) == "p_value: 0.0"
+    assert model.data(model.index(0, 1)) == "01.01.2024 10:00"
+    assert model.data(model.index(1, 4), CHART_ROLE) == 90
+
+
+def test_keyset_sort_matches_sql_order(tmp_path):
+    conn = _db(tmp_path, 230)
+    model = HistoryTableModel(conn, page_size=40)
+    model.sort(2, Qt.SortOrder.DescendingOrder)
+    model.fetch_all()
+    expected = [r[0] for r in conn.execute("SELECT id FROM history ORDER BY test DESC, id DESC")]
+    assert _ids(model) == expected
+
+
+def test_incremental_insert_and_delete(tmp_path):
+    conn = _db(tmp_path, 30)
+    model = HistoryTableModel(conn, page_size=10)
+    model.reload()
+    cur = conn.execute("INSERT INTO history(timestamp,test,result) VALUES('2024-02-01T00:00:00','new','x')")
+    model.append_record(cur.lastrowid, "2024-02-01T00:00:00", "new", "x")
+    assert model.rowCount() == 10  # past the loaded page; paging picks it up
+    model.fetch_all()
+    assert model.record_id(model.rowCount() - 1) == cur.lastrowid
+
+    model.sort(0, Qt.SortOrder.DescendingOrder)
+    cur = conn.execute("INSERT INTO history(timestamp,test,result) VALUES('2024-02-02T00:00:00','newer','y')")
+    model.append_record(cur.lastrowid, "2024-02-02T00:00:00", "newer", "y")
+    assert model.record_id(0) == cur.lastrowid and model.rowCount() == 11
+
+    model.setData(model.index(3, 0), Qt.CheckState.Checked, Qt.ItemDataRole.CheckStateRole)
+    ids = selected_ids(model, [model.index(1, 0), model.index(2, 0)])
+    assert ids == [model.record_id(1), model.record_id(2), model.record_id(3)]
+    model.remove_ids(ids)
+    assert model.rowCount() == 8 and not set(ids) & set(_ids(model))
+    assert model.checked_ids() == []
+
+
+def test_search_uses_fts_index(tmp_path):
+    conn = _db(tmp_path, 70)
+    indexes = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='index'")}
+    assert {"ix_history_timestamp", "ix_history_test"} <= indexes
+    model = HistoryTableModel(conn, page_size=5)
+    model.set_filter("sequen")
+    model.fetch_all()
+    assert model.rowCount() == 10
+    assert {model.data(model.index(r, 2)) for r in range(model.rowCount())} == {"Sequential Analysis"}
+    model.set_filter("analysis")
+    model.fetch_all()
+    assert model.rowCount() == 20
+
+    conn.execute("DELETE FROM history WHERE test='Bayesian Analysis'")
+    cur = conn.execute("INSERT INTO history(timestamp,test,result) VALUES('2024-03-01','Bayesian Analysis','{}')")
+    model.reload()
+    model.fetch_all()
+    assert _ids(model)[-1] == cur.lastrowid and model.rowCount() == 11
+    model.append_record(999, "2024-03-01T00:00:00", "ROI", "{}")
+    assert model.rowCount() == 11
+
+
+def test_search_falls_back_to_like_without_fts(tmp_path):
+    conn = _db(tmp_path, 70)
+    conn.execute("DROP TABLE history_fts")
+    model = HistoryTableModel(conn, page_size=5)
+    model.set_filter("Fleming")
+    model.fetch_all()
+    assert model.rowCount() == 10
+
+
+def test_chart_value_falls_back_to_stable_hash():
+    assert chart_value(json.dumps({"p_value_ab": 0.25})) == 75
+    assert chart_value("<pre>text</pre>") == chart_value("<pre>text</pre>")
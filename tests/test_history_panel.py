@@ -34,3 +34,17 @@ def test_add_and_undo_redo(tmp_path):
     assert loaded['payload'] == {'v': 1}
     panel.redo_state()
     assert loaded['payload'] == {'v': 2}
+
+
+def test_add_state_appends_without_reload(tmp_path, monkeypatch):
+    conn = sqlite3.connect(tmp_path / 'history.db')
+    panel = HistoryPanel(conn=conn)
+    panel.state_loaded = lambda p: None
+    panel.add_state({'v': 0})
+    monkeypatch.setattr(panel, 'load_states', lambda: (_ for _ in ()).throw(AssertionError))
+    loaded = []
+    panel.state_loaded = loaded.append
+    big = {'rows': list(range(3000))}
+    panel.add_state(big)
+    assert loaded == [big] and [s['id'] for s in panel._states] == [1, 2]
+    assert conn.execute("SELECT payload IS NULL, data IS NOT NULL FROM session_states WHERE id=2").fetchone() == (1, 1)
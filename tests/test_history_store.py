@@ -0,0 +1,103 @@
+import json
+import os
+import sqlite3
+import sys
+from datetime import datetime
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import history_store
+from history_store import RetentionPolicy
+from migrations_runner import run_migrations
+
+
+def _db(tmp_path):
+    conn = sqlite3.connect(tmp_path / 'history.db')
+    run_migrations(conn)
+    return conn
+
+
+def test_structured_columns_and_compressed_payload(tmp_path):
+    conn = _db(tmp_path)
+    res = {"p_value_ab": 0.03, "uplift_ab": 0.12, "ci_ab": [0.01, 0.2], "winner": "B", "significant_ab": True}
+    rec_id, text = history_store.insert_history(conn, "2024-01-01T00:00:00", "A/B/n", res)
+    row = conn.execute("SELECT p_value, effect, ci_low, ci_high, winner, payload FROM history WHERE id=?", (rec_id,)).fetchone()
+    assert row == (0.03, 0.12, 0.01, 0.2, "B", None)
+    assert json.loads(text) == res
+
+    html = "<pre>" + "row of a long report\n" * 2000 + "</pre>"
+    rec_id, text = history_store.insert_history(conn, "2024-01-02T00:00:00", "ROI", html)
+    stored, blob = conn.execute("SELECT result, payload FROM history WHERE id=?", (rec_id,)).fetchone()
+    assert stored == text and len(text) < history_store.INLINE_LIMIT and len(blob) < len(html) / 20
+    assert list(history_store.history_rows(conn))[-1] == ("2024-01-02T00:00:00", "ROI", html[5:-6])
+    assert conn.execute("SELECT count(*) FROM history_fts WHERE history_fts MATCH 'report'").fetchone() == (1,)
+
+
+def test_existing_json_results_are_backfilled(tmp_path):
+    alembic = pytest.importorskip("alembic.config")
+    from alembic import command
+
+    root = os.path.join(os.path.dirname(__file__), '..')
+    cfg = alembic.Config(os.path.join(root, 'alembic.ini'))
+    cfg.set_main_option("script_location", os.path.join(root, 'alembic'))
+    cfg.set_main_option("sqlalchemy.url", f"sqlite:///{tmp_path / 'old.db'}")
+    command.upgrade(cfg, "0003")
+    conn = sqlite3.connect(tmp_path / 'old.db')
+    conn.execute("INSERT INTO history(timestamp,test,result) VALUES('t','x',?)", (json.dumps({"p_value": 0.5, "ci": [1, 2]}),))
+    conn.execute("INSERT INTO history(timestamp,test,result) VALUES('t','y','plain text')")
+    conn.commit()
+    run_migrations(conn)
+    rows = conn.execute("SELECT p_value, ci_low, ci_high FROM history ORDER BY id").fetchall()
+    assert rows == [(0.5, 1.0, 2.0), (None, None, None)]
+
+
+def test_states_round_trip(tmp_path):
+    conn = _db(tmp_path)
+    small = history_store.insert_state(conn, {"v": 1}, "2024-01-01T00:00:00")
+    big_payload = {"rows": list(range(5000))}
+    big = history_store.insert_state(conn, big_payload, "2024-01-01T00:00:00")
+    assert conn.execute("SELECT data IS NULL FROM session_states WHERE id=?", (small,)).fetchone() == (1,)
+    assert conn.execute("SELECT payload IS NULL FROM session_states WHERE id=?", (big,)).fetchone() == (1,)
+    assert history_store.load_state(conn, small) == {"v": 1}
+    assert history_store.load_state(conn, big) == big_payload
+    assert history_store.load_state(conn, 999) is None
+
+
+def test_retention_and_legacy_compression(tmp_path):
+    conn = _db(tmp_path)
+    conn.executemany(
+        "INSERT INTO history(timestamp,test,result) VALUES(?,?,?)",
+        [(f"2024-01-{d:02d}T00:00:00", "t", "x" * (10000 if d == 30 else 10)) for d in range(1, 31)],
+    )
+    conn.execute("INSERT INTO history(timestamp,test,result) VALUES('Mon Jan 1 2024','t','legacy')")
+    state = history_store.insert_state(conn, {"v": 1}, "2024-01-01T00:00:00")
+    conn.commit()
+    policy = RetentionPolicy(max_age_days=10)
+    assert history_store.apply_retention(conn, policy, now=datetime(2024, 1, 31)) == 20
+    assert conn.execute("SELECT min(timestamp) FROM history").fetchone() == ("2024-01-21T00:00:00",)
+    assert history_store.apply_retention(conn, RetentionPolicy(max_rows=5)) == 6
+    assert [r[0] for r in conn.execute("SELECT result FROM history ORDER BY id")][-1] == "legacy"
+    assert history_store.load_state(conn, state) == {"v": 1}
+
+    assert history_store.compress_legacy(conn) == 1
+    assert [r[2] for r in history_store.history_rows(conn)][-2] == "x" * 10000
+
+
+def test_vacuum_runs_when_fragmented(tmp_path):
+    conn = _db(tmp_path)
+    conn.executemany("INSERT INTO history(timestamp,test,result) VALUES('t','t',?)", [("y" * 2000,)] * 500)
+    conn.commit()
+    policy = RetentionPolicy(vacuum_min_pages=10)
+    assert not history_store.vacuum_if_fragmented(conn, policy)
+    pages = conn.execute("PRAGMA page_count").fetchone()[0]
+    conn.execute("DELETE FROM history")
+    conn.commit()
+    assert history_store.maintain(conn, policy)["vacuumed"]
+    assert conn.execute("PRAGMA page_count").fetchone()[0] < pages / 4
+
+
+def test_policy_from_config():
+    policy = RetentionPolicy.from_config({"history_max_rows": "1000", "history_vacuum_free_ratio": 0.5})
+    assert (policy.max_rows, policy.max_age_days, policy.vacuum_free_ratio) == (1000, None, 0.5)
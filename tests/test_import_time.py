@@ -0,0 +1,55 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+SRC = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+# cumulative import budget per entry point, in milliseconds
+BUDGET_MS = {
+    'cli': 400,
+    'stats.ab_test': 300,
+    'utils.connectors': 300,
+}
+HEAVY = ('numpy', 'pandas', 'scipy', 'PyQt6', 'plugins')
+
+
+def _importtime(module):
+    """Return ``(total_ms, imported_modules)`` from ``python -X importtime``."""
+    env = {**os.environ, 'PYTHONPATH': SRC}
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=SRC, env=env, capture_output=True, text=True, check=True,
+    )
+    total, names = 0, []
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        names.append(name.strip())
+        if name.strip() == module:
+            total = int(cumulative)
+    return total / 1000.0, names
+
+
+@pytest.mark.parametrize('module', list(BUDGET_MS))
+def test_cold_start_skips_heavy_imports(module):
+    total_ms, names = _importtime(module)
+    heavy = sorted({n for n in names if n.split('.')[0] in HEAVY})
+    assert not heavy, f'{module} imports {heavy[:5]} at import time'
+    budget = float(os.getenv('ABTEST_IMPORT_BUDGET_MS', BUDGET_MS[module]))
+    assert total_ms <= budget, f'{module} took {total_ms:.0f} ms to import (budget {budget:.0f} ms)'
+
+
+def test_plugins_import_on_first_use():
+    code = (
+        'import sys, plugin_loader\n'
+        'assert "bayesian" in plugin_loader.available_plugins()\n'
+        'assert "plugins.bayesian" not in sys.modules\n'
+        'assert plugin_loader.get_plugin("bayesian").bayesian_analysis\n'
+        'assert "plugins.bayesian" in sys.modules\n'
+        'assert plugin_loader.get_plugin("missing") is None\n'
+    )
+    env = {**os.environ, 'PYTHONPATH': SRC}
+    subprocess.run([sys.executable, '-c', code], cwd=SRC, env=env, check=True)
@@ -0,0 +1,98 @@
+import gzip
+import io
+import json
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from abtest_core import ValidationError
+from api.ingest import ARROW_STREAM, MSGPACK, NDJSON, read_payload
+
+SCHEMA = {"group_col": "g", "metric_col": "y"}
+
+
+def _rows(n=500):
+    return [{"uid": f"u{i % 120}", "g": "A" if (i % 120) % 2 else "B", "y": float(i % 7)} for i in range(n)]
+
+
+def test_gzip_ndjson_in_chunks():
+    rows = _rows()
+    body = gzip.compress("\n".join(json.dumps(r) for r in rows).encode())
+    payload = read_payload(io.BytesIO(body), NDJSON, "gzip", {"schema": SCHEMA}, chunk_rows=64)
+    assert len(payload["columns"]["y"]) == len(rows)
+    assert payload["columns"]["y"].dtype.kind == "f"
+    again = read_payload(io.BytesIO(body), NDJSON, "gzip", {"schema": SCHEMA})
+    assert again["_body_sha256"] == payload["_body_sha256"]
+
+
+def test_ndjson_chunks_join_per_column():
+    rows = _rows(130)
+    for r in rows[100:]:
+        r["z"] = 1.0
+    body = "\n".join(json.dumps(r) for r in rows).encode()
+    payload = read_payload(io.BytesIO(body), NDJSON, params={"schema": SCHEMA}, chunk_rows=40)
+    cols = payload["columns"]
+    assert list(cols["y"]) == [r["y"] for r in rows]
+    assert list(cols["g"]) == [r["g"] for r in rows]
+    assert np.isnan(cols["z"][:100]).all() and (cols["z"][100:] == 1.0).all()
+
+
+def test_ndjson_aggregates_events_per_user():
+    body = "\n".join(json.dumps(r) for r in _rows()).encode()
+    params = {"schema": {**SCHEMA, "user_id": "uid"}, "aggregate": True}
+    payload = read_payload(io.BytesIO(body), NDJSON, params=params, chunk_rows=50)
+    assert len(payload["columns"]["uid"]) == 120
+    assert payload["columns"]["n_events"].sum() == 500
+
+
+def test_msgpack_raw_buffers_zero_copy():
+    msgpack = pytest.importorskip("msgpack")
+    y = np.arange(10, dtype="<f8")
+    body = msgpack.packb(
+        {"columns": {"g": ["A", "B"] * 5, "y": {"dtype": "<f8", "data": y.tobytes()}}, "schema": SCHEMA}
+    )
+    payload = read_payload(io.BytesIO(body), MSGPACK)
+    assert np.array_equal(payload["columns"]["y"], y)
+    assert payload["schema"] == SCHEMA
+
+
+def test_arrow_stream_with_metadata():
+    pa = pytest.importorskip("pyarrow")
+    table = pa.table({"g": ["A", "B"] * 50, "y": np.arange(100.0)})
+    table = table.replace_schema_metadata({"abtest": json.dumps({"schema": SCHEMA})})
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        for batch in table.to_batches(max_chunksize=30):
+            writer.write_batch(batch)
+    payload = read_payload(io.BytesIO(sink.getvalue()), ARROW_STREAM)
+    assert payload["schema"] == SCHEMA
+    assert payload["columns"]["y"].sum() == 4950.0
+
+
+def test_unsupported_type_rejected():
+    with pytest.raises(ValidationError) as exc:
+        read_payload(io.BytesIO(b""), "text/csv", params={"schema": SCHEMA})
+    assert exc.value.code == "unsupported_media_type"
+
+
+@pytest.mark.parametrize(
+    "content_type, encoding, body",
+    [
+        (NDJSON, None, b'{"g": "A", "y": 1}\n{not json\n'),
+        (NDJSON, "gzip", b'{"g": "A", "y": 1}\n'),
+        (MSGPACK, None, b"\xc1\xc1\xc1"),
+        (ARROW_STREAM, None, b"garbage, not an arrow stream"),
+    ],
+)
+def test_malformed_body_is_bad_payload(content_type, encoding, body):
+    if content_type == MSGPACK:
+        pytest.importorskip("msgpack")
+    if content_type == ARROW_STREAM:
+        pytest.importorskip("pyarrow")
+    with pytest.raises(ValidationError) as exc:
+        read_payload(io.BytesIO(body), content_type, encoding, {"schema": SCHEMA})
+    assert exc.value.code == "bad_payload"
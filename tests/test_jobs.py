@@ -0,0 +1,127 @@
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from api.jobs import JobQueue, JobStore
+
+
+def _ok(payload, progress):
+    progress(0.5)
+    return {"echo": payload["x"]}
+
+
+def _boom(payload, progress):
+    raise RuntimeError("bad payload")
+
+
+def _slow(payload, progress):
+    time.sleep(30)
+    return {}
+
+
+def _wait(store, job_id, timeout=20.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = store.get(job_id)
+        if job["status"] not in ("queued", "running"):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def _queue(tmp_path, target, **kw):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    return JobQueue(store, target, mp_context="fork", poll_interval=0.02, **kw)
+
+
+def test_store_cancel_queued_and_claim_order(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    first = store.create("analysis", {"x": 1})
+    second = store.create("analysis", {"x": 2})
+    assert store.request_cancel(second) == "cancelled"
+    assert store.claim_next()["id"] == first
+    assert store.claim_next() is None
+    assert store.count("running") == 1
+    assert store.requeue_running() == 1
+    with pytest.raises(KeyError):
+        store.get("missing")
+
+
+def test_queue_runs_jobs_and_reports_failures(tmp_path):
+    queue = _queue(tmp_path, _ok).start()
+    try:
+        job = _wait(queue.store, queue.submit({"x": 42}))
+        assert job["status"] == "done"
+        assert job["result"] == {"echo": 42}
+        assert job["progress"] == 1.0
+        queue.target = _boom
+        failed = _wait(queue.store, queue.submit({"x": 0}))
+        assert failed["status"] == "failed"
+        assert "bad payload" in failed["error"]["details"]
+    finally:
+        queue.shutdown()
+
+
+def test_queue_timeout_and_cancel_running(tmp_path):
+    queue = _queue(tmp_path, _slow, workers=2).start()
+    try:
+        timed = queue.submit({}, timeout=0.3)
+        running = queue.submit({})
+        deadline = time.time() + 10
+        while queue.store.get(running)["status"] != "running" and time.time() < deadline:
+            time.sleep(0.02)
+        assert queue.cancel(running) == "running"
+        assert _wait(queue.store, running)["status"] == "cancelled"
+        job = _wait(queue.store, timed)
+        assert job["status"] == "timeout"
+        assert job["error"]["code"] == "job_timeout"
+    finally:
+        queue.shutdown()
+
+
+def test_reap_keeps_result_of_worker_that_exits_before_poll(tmp_path):
+    class ExitsAfterFirstCheck:
+        """Worker that sends its result and exits right after the first check."""
+
+        exitcode = 0
+
+        def __init__(self):
+            self.checks = 0
+
+        def _exited(self):
+            self.checks += 1
+            return self.checks > 1
+
+        def is_alive(self):
+            return not self._exited()
+
+        def join(self):
+            pass
+
+    class Pipe:
+        def __init__(self, proc):
+            self.proc = proc
+
+        def poll(self):
+            return self.proc._exited()
+
+        def recv(self):
+            return "done", {"ok": True}
+
+        def close(self):
+            pass
+
+    queue = _queue(tmp_path, _ok)
+    job_id = queue.submit({"x": 1})
+    queue.store.claim_next()
+    proc = ExitsAfterFirstCheck()
+    queue._running[job_id] = {
+        "conn": Pipe(proc), "process": proc, "started": time.time(), "deadline": time.time() + 60, "timeout": 60,
+    }
+    queue._reap()
+    job = queue.store.get(job_id)
+    assert job["status"] == "done" and job["result"] == {"ok": True}
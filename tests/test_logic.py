@@ -130,6 +130,7 @@ from stats.ab_test import (
     evaluate_abn_test,
     run_obrien_fleming,
     cuped_adjustment,
+    cuped_adjust_groups,
     pocock_alpha_curve,
 )
 from bandit.strategies import ucb1, epsilon_greedy
@@ -197,6 +198,21 @@ def test_cuped_no_change_with_zero_covariate():
     x = [1, 2, 3]
     adjusted = cuped_adjustment(x, [0, 0, 0])
     assert all(math.isclose(a, b) for a, b in zip(x, adjusted))
+
+
+def test_cuped_adjust_groups_pooled_theta():
+    cov = [[1.0, 2.0, 3.0, 4.0], [2.0, 3.0, 4.0, 5.0]]
+    metric = [[1.5, 2.5, 3.0, 4.5], [3.0, 3.5, 5.0, 5.5]]
+    adj = cuped_adjust_groups({"a": metric[0], "b": metric[1]}, {"a": cov[0], "b": cov[1]})
+    assert set(adj) == {"a", "b"}
+    raw_diff = sum(metric[1]) / 4 - sum(metric[0]) / 4
+    adj_diff = sum(adj["b"]) / 4 - sum(adj["a"]) / 4
+    # a pooled theta removes the part of the difference explained by the covariate
+    assert abs(adj_diff) < abs(raw_diff)
+    pooled = sum(sum(a) for a in adj.values()) / 8
+    assert math.isclose(pooled, sum(sum(m) for m in metric) / 8)
+
+
 def test_pocock_alpha_curve_len():
     curve = pocock_alpha_curve(0.05, 3)
     assert len(curve) == 3 and all(0 < a < 0.05 for a in curve)
@@ -5,7 +5,16 @@ import os, sys
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
 
-from abtest_core.multiple import holm, benjamini_yekutieli
+import numpy as np
+
+from abtest_core.multiple import (
+    LordFdr,
+    adjust_pvalues,
+    benjamini_hochberg,
+    benjamini_yekutieli,
+    hochberg,
+    holm,
+)
 from abtest_core.engine import analyze_groups
 from abtest_core.types import AnalysisConfig
 
@@ -49,6 +58,37 @@ def test_by_basic():
     assert fdr <= 0.12
 
 
+def test_step_up_procedures_known_values():
+    pvals = np.array([0.01, 0.04, 0.03, 0.005])
+    assert np.allclose(benjamini_hochberg(pvals), [0.02, 0.04, 0.04, 0.02])
+    assert np.allclose(hochberg(pvals), [0.03, 0.04, 0.04, 0.02])
+    assert np.allclose(benjamini_yekutieli(pvals), benjamini_hochberg(pvals) * (1 + 1 / 2 + 1 / 3 + 1 / 4))
+    assert np.all(hochberg(pvals) <= holm(pvals))
+
+
+def test_corrections_vectorize_over_families():
+    rng = np.random.default_rng(0)
+    pvals = rng.random((6, 50))
+    for method in ("holm", "hochberg", "bh", "by"):
+        batched = adjust_pvalues(pvals, method)
+        assert batched.shape == pvals.shape
+        for row in range(pvals.shape[0]):
+            assert np.allclose(batched[row], adjust_pvalues(pvals[row], method))
+        assert np.allclose(adjust_pvalues(pvals.T, method, axis=0).T, batched)
+
+
+def test_lord_online_fdr():
+    rng = np.random.default_rng(1)
+    lord = LordFdr(alpha=0.05)
+    assert lord.next_level < 0.05
+    signals = lord.test_many(np.full(5, 1e-8))
+    assert signals.all()
+    nulls = lord.test_many(rng.random(2000))
+    assert lord.discoveries == 5 + int(nulls.sum())
+    assert nulls.mean() < 0.01
+    assert lord.wealth >= 0
+
+
 def test_segment_integration_smoke():
     df = pd.DataFrame({
         "group": ["A", "A", "B", "B", "A", "B", "A", "B"],
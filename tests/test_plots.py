@@ -5,6 +5,8 @@ import statistics
 import math
 import importlib
 
+import pytest
+
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
 
 # Stubs for optional dependencies
@@ -89,8 +91,13 @@ class FakeFigure:
             f.write(b"PNG")
 
 
+class FakeScattergl(FakeScatter):
+    pass
+
+
 go_mod.Figure = lambda *a, **k: FakeFigure()
 go_mod.Scatter = FakeScatter
+go_mod.Scattergl = FakeScattergl
 plotly_mod.graph_objects = go_mod
 sys.modules["plotly"] = plotly_mod
 sys.modules["plotly.graph_objects"] = go_mod
@@ -99,6 +106,14 @@ import plots as _plots
 
 importlib.reload(_plots)
 from plots import plot_alpha_spending, plot_confidence_intervals, plot_power_curve
+from plots.downsample import lttb, minmax
+
+try:
+    import plots.cumulative as _cumulative
+
+    importlib.reload(_cumulative)
+except ImportError:  # pragma: no cover - pandas not installed
+    _cumulative = None
 
 
 def test_plot_alpha_spending_png(tmp_path):
@@ -126,3 +141,75 @@ def test_plot_power_curve_png(tmp_path):
     assert path.exists() and path.stat().st_size > 0
     assert len(fig.data) == 1
     assert len(fig.data[0].x) == 100 and len(fig.data[0].y) == 100
+
+
+def test_downsamplers_keep_extremes_and_endpoints():
+    x = np.arange(10_000, dtype=float)
+    y = np.sin(x / 500)
+    y[4321] = 5.0
+    for keep in (lttb(x, y, 300), minmax(y, 300)):
+        assert keep[0] == 0 and keep[-1] == len(x) - 1
+        assert len(keep) <= 300 and np.all(np.diff(keep) > 0)
+        assert 4321 in keep
+    assert list(lttb(x[:10], y[:10], 50)) == list(range(10))
+    # budgets too small for the method keep only the endpoints
+    for n_out in (1, 2):
+        assert list(lttb(x, y, n_out)) == [0, len(x) - 1]
+    for n_out in (1, 2, 3):
+        assert list(minmax(y, n_out)) == [0, len(x) - 1]
+    assert len(lttb(x, y, 3)) == 3 and len(minmax(y, 4)) <= 4
+
+
+def test_cumulative_conversion_is_bucketed_and_bounded():
+    import pandas as pd
+
+    if _cumulative is None:
+        pytest.skip("pandas not installed")
+    plot_cumulative_conversion = _cumulative.plot_cumulative_conversion
+    rng = np.random.default_rng(0)
+    n = 200_000
+    df = pd.DataFrame(
+        {
+            "date": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 365 * 24, n), unit="h"),
+            "group": rng.choice(["A", "B"], n),
+            "conversion": (rng.random(n) < 0.1).astype(int),
+        }
+    )
+    fig = plot_cumulative_conversion(df, freq="h", max_points=1500)
+    assert [type(t).__name__ for t in fig.data] == ["FakeScattergl", "FakeScattergl"]
+    assert all(len(t.x) <= 1500 for t in fig.data)
+    for grp, trace in zip(["A", "B"], fig.data):
+        assert trace.y[-1] == df.loc[df.group == grp, "conversion"].mean()
+
+    head = df.iloc[:5000].assign(date=lambda d: d.date.dt.strftime("%Y-%m-%d"))
+    daily = plot_cumulative_conversion(head)
+    assert type(daily.data[0]).__name__ == "FakeScatter" and daily.data[0].mode == "lines"
+    assert len(daily.data[0].x) == head.loc[head.group == "A", "date"].nunique()
+
+
+def test_cumulative_effect_plots_engine_series():
+    import pandas as pd
+
+    if _cumulative is None:
+        pytest.skip("pandas not installed")
+    from abtest_core.timeseries import cumulative_series
+
+    rng = np.random.default_rng(1)
+    n = 20_000
+    df = pd.DataFrame(
+        {
+            "date": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 30 * 24, n), unit="h"),
+            "group": rng.choice(["A", "B"], n),
+            "conversion": (rng.random(n) < 0.1).astype(int),
+        }
+    )
+    fig = _cumulative.plot_cumulative_effect(df, preset="pocock", looks=40)
+    series = cumulative_series(_cumulative.bucket_conversions(df), preset="pocock", looks=40)
+    assert len(fig.data) == 6 and all(len(t.x) == 30 for t in fig.data)
+    assert fig.data[2].y == list(series.effect)
+    assert fig.data[5].y == list(series.p_value)
+
+    hourly = _cumulative.plot_cumulative_effect(df, freq="h", max_points=100)
+    assert all(len(t.x) == 100 for t in hourly.data)
+    tiny = _cumulative.plot_cumulative_conversion(df, freq="h", max_points=1)
+    assert all(len(t.x) == 4 for t in tiny.data)
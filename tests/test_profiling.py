@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+
+from abtest_core import profiling
+from abtest_core.engine import analyze_groups
+from abtest_core.types import AnalysisConfig
+
+
+def _frame(n=400, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "group": np.repeat(["A", "B"], n // 2),
+            "metric": rng.normal(10, 2, n),
+            "pre": rng.normal(10, 2, n),
+            "country": np.tile(["ru", "kz"], n // 2),
+        }
+    )
+
+
+def test_span_is_noop_without_profile_or_listeners(monkeypatch):
+    monkeypatch.setattr(profiling, "_listeners", [])
+    assert profiling.current_profile() is None
+    assert profiling.span("x", n=1) is profiling.span("y")
+
+
+def test_nested_spans_record_paths_and_attrs():
+    seen = []
+    listener = lambda stage, seconds, attrs: seen.append((stage, attrs.get("n")))
+    profiling.add_listener(listener)
+    try:
+        with profiling.profiling() as prof:
+            with profiling.span("outer", n=3):
+                with profiling.span("inner") as sp:
+                    sp.set(n=2)
+    finally:
+        profiling.remove_listener(listener)
+    assert [r["stage"] for r in prof.records] == ["outer/inner", "outer"]
+    assert prof.records[0]["n"] == 2
+    assert seen == [("inner", 2), ("outer", 3)]
+    assert profiling.current_profile() is None
+
+
+def test_analyze_groups_returns_stage_timings():
+    df = _frame()
+    df["metric"] = df["metric"] + df["pre"]
+    cfg = AnalysisConfig(
+        alpha=0.05,
+        metric_type="continuous",
+        use_cuped=True,
+        preperiod_metric_col="pre",
+        segments=["country"],
+        profile=True,
+    )
+    res = analyze_groups(df, cfg)
+    stages = [t["stage"] for t in res.meta["timings"]]
+    assert stages[-1] == "analyze_groups"
+    assert "analyze_groups/cuped" in stages
+    assert "analyze_groups/test" in stages
+    assert "analyze_groups/segments/analyze_groups/test" in stages
+    top = res.meta["timings"][-1]
+    assert top["n"] == len(df)
+    assert all(t["seconds"] >= 0 for t in res.meta["timings"])
+    plain = analyze_groups(_frame(), AnalysisConfig(alpha=0.05, metric_type="continuous"))
+    assert plain.meta is None
@@ -0,0 +1,97 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from abtest_core.simulation import SimulationDesign, simulate_power
+from abtest_core.types import AnalysisConfig
+
+
+def test_aa_fpr_close_to_alpha():
+    design = SimulationDesign(n_per_group=500, baseline=0.2)
+    config = AnalysisConfig(alpha=0.05, metric_type="binomial")
+    res = simulate_power(design, config, n_reps=400, seed=1, workers=1)
+    assert res["replications"] == 400
+    assert 0.01 <= res["rejection_rate"] <= 0.1
+    assert res["ci_coverage"] > 0.9
+
+
+def test_power_with_cuped_and_parallel_workers_reproducible():
+    design = SimulationDesign(
+        n_per_group=300, metric_type="continuous", baseline=1.0, effect=0.2, pre_corr=0.7
+    )
+    config = AnalysisConfig(
+        alpha=0.05, metric_type="continuous", use_cuped=True, preperiod_metric_col="pre"
+    )
+    serial = simulate_power(design, config, n_reps=40, seed=7, workers=1, batch_size=10)
+    parallel = simulate_power(design, config, n_reps=40, seed=7, workers=2, batch_size=10)
+    assert serial == parallel
+    assert serial["rejection_rate"] > 0.5
+
+
+def test_checkpoint_resume_and_progress(tmp_path):
+    design = SimulationDesign(n_per_group=200, baseline=0.3, segments={"seg": ["x", "y"]})
+    config = AnalysisConfig(
+        alpha=0.05,
+        metric_type="binomial",
+        segments=["seg"],
+        use_sequential=True,
+        sequential_preset="obf",
+        sequential_looks=3,
+    )
+    ckpt = tmp_path / "sim.json"
+    seen = []
+    first = simulate_power(
+        design, config, n_reps=20, seed=3, workers=1, batch_size=5,
+        checkpoint=str(ckpt), progress=lambda done, total: seen.append((done, total)),
+    )
+    assert seen[-1] == (20, 20)
+    assert ckpt.exists()
+    seen.clear()
+    resumed = simulate_power(
+        design, config, n_reps=20, seed=3, workers=1, batch_size=5,
+        checkpoint=str(ckpt), progress=lambda done, total: seen.append((done, total)),
+    )
+    assert seen == []
+    assert resumed == first
+    assert 1 <= resumed["mean_stop_look"] <= 3
+    assert "segment_rejection_rate" in resumed
+
+
+def test_unseeded_checkpoint_resumes_and_global_rng_untouched(tmp_path):
+    import numpy as np
+
+    design = SimulationDesign(n_per_group=100, baseline=0.3)
+    config = AnalysisConfig(alpha=0.05, metric_type="binomial")
+    ckpt = tmp_path / "unseeded.json"
+    np.random.seed(123)
+    expected = np.random.random(3)
+    np.random.seed(123)
+    first = simulate_power(design, config, n_reps=10, workers=1, batch_size=5, checkpoint=str(ckpt))
+    assert (np.random.random(3) == expected).all()
+    seen = []
+    resumed = simulate_power(
+        design, config, n_reps=10, workers=1, batch_size=5,
+        checkpoint=str(ckpt), progress=lambda done, total: seen.append(done),
+    )
+    assert seen == []
+    assert resumed == first
+
+
+def test_cancel_stops_between_batches(tmp_path):
+    import json
+    import threading
+    from concurrent.futures import CancelledError
+
+    import pytest
+
+    design = SimulationDesign(n_per_group=200, baseline=0.2)
+    config = AnalysisConfig(alpha=0.05, metric_type="binomial")
+    cancel = threading.Event()
+    ckpt = tmp_path / "ckpt.json"
+    with pytest.raises(CancelledError):
+        simulate_power(
+            design, config, n_reps=40, seed=3, workers=1, batch_size=10,
+            checkpoint=str(ckpt), progress=lambda done, total: done >= 20 and cancel.set(), cancel=cancel,
+        )
+    assert len(json.loads(ckpt.read_text())["batches"]) == 2
@@ -0,0 +1,38 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from abtest_core.sketch import QuantileSketch
+
+
+def test_sketch_quantiles_within_rank_error():
+    rng = np.random.default_rng(0)
+    data = rng.exponential(1.0, 200000)
+    sketch = QuantileSketch(k=200, seed=0)
+    for chunk in np.array_split(data, 37):
+        sketch.update(chunk)
+    assert sketch.n == data.size
+    assert sketch.num_retained < 1000
+    qs = np.array([0.01, 0.5, 0.9, 0.99])
+    est = sketch.quantile(qs)
+    ranks = np.searchsorted(np.sort(data), est) / data.size
+    assert np.all(np.abs(ranks - qs) < sketch.rank_error)
+    assert sketch.quantile(0.0) == data.min()
+    assert sketch.quantile(1.0) == data.max()
+
+
+def test_sketch_merge_and_roundtrip():
+    rng = np.random.default_rng(1)
+    a, b = rng.normal(size=30000), rng.normal(2, 1, 30000)
+    left = QuantileSketch(seed=0).update(a)
+    left.merge(QuantileSketch(seed=1).update(b))
+    assert left.n == 60000
+    assert left.cdf(1.0) == pytest.approx(0.5, abs=0.02)
+    restored = QuantileSketch.from_dict(left.to_dict())
+    assert restored.quantile(0.5) == left.quantile(0.5)
+    with pytest.raises(ValueError):
+        QuantileSketch().quantile(0.5)
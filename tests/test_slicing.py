@@ -0,0 +1,94 @@
+import os
+import sys
+import types
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+
+from abtest_core.slicing import SliceIndex
+from ui.filters_panel import FiltersPanel
+from utils import segment_data
+
+
+def _records(n=3000, seed=1):
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            "group": ["A", "B", "C"][i % 3] if i % 97 else None,
+            "converted": int(rng.random() < 0.2),
+            "device": rng.choice(["ios", "android", "web"]),
+            "country": rng.choice(["US", "DE", "FR", "JP"]),
+            "age": int(rng.integers(18, 25)),
+        }
+        for i in range(n)
+    ]
+
+
+@pytest.mark.parametrize(
+    "filters",
+    [{}, {"device": "ios"}, {"device": "web", "country": "DE"}, {"device": "ios", "country": "US", "age": 20}],
+)
+def test_counts_match_record_scan(filters):
+    records = _records()
+    index = SliceIndex(records)
+    expected = FiltersPanel._count_records(segment_data(records, **filters))
+    expected.pop(None, None)
+    assert index.counts(filters) == {g: expected.get(g, (0, 0)) for g in index.groups}
+    assert index.mask(filters).sum() == len(segment_data(records, **filters))
+
+
+def test_text_values_match_typed_columns_and_unknowns_are_empty():
+    records = _records()
+    index = SliceIndex(pd.DataFrame(records))
+    assert index.counts({"age": "20"}) == index.counts({"age": 20})
+    assert index.counts({"age": "nope"}) == {g: (0, 0) for g in index.groups}
+    assert index.counts({"missing": "x"}) == {g: (0, 0) for g in index.groups}
+    assert sorted(index.values("device")) == ["android", "ios", "web"]
+    assert index.dimensions == ["device", "country", "age"]
+
+
+def test_bitmaps_are_cached_and_bounded():
+    index = SliceIndex(_records(), cache_size=2)
+    first = index.bitmap("device", "ios")
+    assert index.bitmap("device", "ios") is first
+    index.bitmap("device", "web")
+    index.bitmap("country", "US")
+    assert index.bitmap("device", "ios") is not first
+
+
+def test_filter_signals_with_text_recalculate_through_debouncer():
+    class Signal:
+        def __init__(self):
+            self.slots = []
+
+        def connect(self, slot):
+            self.slots.append(slot)
+
+        def emit(self, *args):
+            for slot in self.slots:
+                slot(*args)
+
+        __call__ = emit
+
+    def widget(text=""):
+        return types.SimpleNamespace(
+            currentText=lambda: text, text=lambda: text, currentTextChanged=Signal(), textChanged=Signal()
+        )
+
+    emitted = []
+    panel = FiltersPanel.__new__(FiltersPanel)
+    panel._records = _records()
+    panel._index = SliceIndex(panel._records)
+    panel.device_combo, panel.country_combo = widget("ios"), widget()
+    panel.utm_edit, panel.trait_edit = widget(), widget()
+    panel.metrics_updated = Signal()
+    panel.metrics_updated.connect(emitted.append)
+    panel._connect_signals()
+    # Qt passes the new text to the slot, like currentTextChanged(str)
+    panel.device_combo.currentTextChanged.emit("ios")
+    panel.trait_edit.textChanged.emit("age=20")
+    assert len(emitted) == 2
@@ -1,5 +1,6 @@
+import math
 import random
-from abtest_core.srm import srm_check
+from abtest_core.srm import SrmMonitor, chi2_sf, srm_check, srm_check_batch
 
 
 def test_srm_equal_counts_pass():
@@ -26,3 +27,38 @@ def test_srm_false_positive_rate():
             fails += 1
     rate = fails / trials
     assert abs(rate - alpha) < 0.005
+
+
+def test_chi2_sf_matches_closed_forms():
+    # df=2 is exactly exp(-x/2); df=1 is 2*(1-Phi(sqrt(x)))
+    assert abs(float(chi2_sf(3.0, 2)) - math.exp(-1.5)) < 1e-12
+    assert abs(float(chi2_sf(3.841458820694124, 1)) - 0.05) < 1e-9
+    assert abs(float(chi2_sf(7.814727903251178, 3)) - 0.05) < 1e-9
+    assert float(chi2_sf(0.0, 5)) == 1.0
+
+
+def test_srm_custom_weights():
+    assert srm_check({"A": 900, "B": 100}, weights={"A": 9, "B": 1})["passed"]
+    assert not srm_check({"A": 500, "B": 500}, weights={"A": 9, "B": 1})["passed"]
+
+
+def test_srm_batch_matches_single_checks():
+    counts = [[100, 100, 0], [1000, 100, 50], [510, 490, 500]]
+    weights = [[1, 1, 0], [1, 1, 1], [1, 1, 1]]
+    res = srm_check_batch(counts, weights)
+    assert list(res["df"]) == [1, 2, 2]
+    assert list(res["passed"]) == [True, False, True]
+    single = srm_check({"A": 510, "B": 490, "C": 500})
+    assert abs(res["p_value"][2] - single["p_value"]) < 1e-12
+
+
+def test_srm_monitor_streaming():
+    mon = SrmMonitor(["A", "B"])
+    mon.set_weights("exp2", {"A": 3, "B": 1})
+    mon.record_batch(["exp1"] * 200 + ["exp2"] * 400, ["A", "B"] * 100 + ["A", "A", "A", "B"] * 100)
+    mon.record("exp1", "A", 300)
+    assert mon.counts("exp1") == {"A": 400, "B": 100}
+    res = mon.check()
+    assert not res["exp1"]["passed"]
+    assert res["exp2"]["passed"]
+    assert mon.failed() == ["exp1"]
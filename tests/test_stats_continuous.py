@@ -1,7 +1,13 @@
 import numpy as np
 import pytest
 
-from abtest_core.stats_continuous import welch_ttest, yuen_trimmed_mean_test, bootstrap_bca_ci
+from abtest_core.sketch import QuantileSketch
+from abtest_core.stats_continuous import (
+    welch_ttest,
+    yuen_trimmed_mean_test,
+    yuen_from_sketches,
+    bootstrap_bca_ci,
+)
 
 
 def test_welch_ttest():
@@ -30,6 +36,45 @@ def test_yuen_trimmed_mean():
     assert res["p_value"] < 0.05
 
 
+def test_yuen_selection_matches_sorted_reference():
+    rng = np.random.default_rng(3)
+    a = rng.lognormal(0, 1, 1001)
+    b = rng.lognormal(0.1, 1, 800)
+
+    def ref(x, trim=0.2):
+        xs = np.sort(x)
+        n = len(xs)
+        g = int(trim * n)
+        w = xs.copy()
+        w[:g] = xs[g]
+        w[n - g:] = xs[n - g - 1]
+        h = n - 2 * g
+        return xs[g: n - g].mean(), (n - 1) * w.var(ddof=1) / (h * (h - 1))
+
+    m1, d1 = ref(a)
+    m2, d2 = ref(b)
+    res = yuen_trimmed_mean_test(a, b)
+    assert res["effect"] == pytest.approx(m2 - m1)
+    half = (res["ci"][1] - res["ci"][0]) / 2
+    assert half == pytest.approx(1.959964 * np.sqrt(d1 + d2), rel=1e-5)
+    scratch = a.copy()
+    assert yuen_trimmed_mean_test(scratch, b, overwrite_input=True) == res
+
+
+def test_yuen_from_sketches_approximates_exact():
+    rng = np.random.default_rng(4)
+    a = rng.lognormal(0, 1, 50000)
+    b = rng.lognormal(0.1, 1, 50000)
+    sa, sb = QuantileSketch(k=400, seed=0), QuantileSketch(k=400, seed=1)
+    for i in range(0, 50000, 5000):
+        sa.update(a[i: i + 5000])
+        sb.update(b[i: i + 5000])
+    exact = yuen_trimmed_mean_test(a, b)
+    approx = yuen_from_sketches(sa, sb)
+    assert approx["effect"] == pytest.approx(exact["effect"], abs=0.02)
+    assert approx["ci"][0] < exact["effect"] < approx["ci"][1]
+
+
 def test_bootstrap_bca_ci():
     np.random.seed(2)
     a = np.random.normal(0, 1, 50)
@@ -1,7 +1,11 @@
 import numpy as np
 import pytest
 
-from abtest_core.stats_ratio import ratio_test
+import pandas as pd
+
+from abtest_core.engine import analyze_groups
+from abtest_core.stats_ratio import RatioAggregates, ratio_delta_test, ratio_test
+from abtest_core.types import AnalysisConfig
 
 
 def test_ratio_delta_and_fieller():
@@ -23,3 +27,85 @@ def test_ratio_delta_and_fieller():
     assert lo2 < effect < hi2
     assert "fieller" in res_fieller["notes"]
 
+
+def _sessions_revenue(rng, n, lift=1.0):
+    sessions = rng.poisson(3, n) + 1
+    revenue = sessions * rng.gamma(2.0, 1.0, n) * lift
+    return revenue, sessions
+
+
+def test_user_level_delta_variance_matches_simulation():
+    rng = np.random.default_rng(0)
+    ratios = []
+    for _ in range(300):
+        x, y = _sessions_revenue(rng, 400)
+        ratios.append(x.sum() / y.sum())
+    x, y = _sessions_revenue(rng, 400)
+    _, var = RatioAggregates.from_arrays(x, y).ratio_and_variance()
+    assert np.sqrt(var) == pytest.approx(np.std(ratios, ddof=1), rel=0.2)
+
+
+def test_ratio_aggregates_add_and_segments():
+    rng = np.random.default_rng(1)
+    x, y = _sessions_revenue(rng, 1000)
+    whole = RatioAggregates.from_arrays(x, y)
+    parts = RatioAggregates.from_arrays(x[:300], y[:300]) + RatioAggregates.from_arrays(x[300:], y[300:])
+    assert parts.ratio_and_variance()[0] == pytest.approx(whole.ratio_and_variance()[0])
+
+    codes = rng.integers(0, 3, 1000)
+    x2, y2 = _sessions_revenue(rng, 1000, lift=1.1)
+    codes2 = rng.integers(0, 3, 1000)
+    res = ratio_delta_test(
+        RatioAggregates.from_arrays(x, y, codes, 3),
+        RatioAggregates.from_arrays(x2, y2, codes2, 3),
+    )
+    assert res["effect"].shape == (3,)
+    single = ratio_delta_test(
+        RatioAggregates.from_arrays(x[codes == 1], y[codes == 1]),
+        RatioAggregates.from_arrays(x2[codes2 == 1], y2[codes2 == 1]),
+    )
+    assert res["p_value"][1] == pytest.approx(single["p_value"])
+    assert res["ci"][0][1] == pytest.approx(single["ci"][0])
+
+
+def test_engine_user_level_ratio():
+    rng = np.random.default_rng(2)
+    xa, ya = _sessions_revenue(rng, 5000)
+    xb, yb = _sessions_revenue(rng, 5000, lift=1.1)
+    df = pd.DataFrame(
+        {
+            "group": ["A"] * 5000 + ["B"] * 5000,
+            "numerator": np.concatenate([xa, xb]),
+            "denominator": np.concatenate([ya, yb]),
+        }
+    )
+    res = analyze_groups(df, AnalysisConfig(alpha=0.05, metric_type="ratio"))
+    assert res.method_notes == "delta_user_level"
+    assert res.ci[0] < res.effect < res.ci[1]
+    assert res.effect == pytest.approx(1.1, rel=0.05)
+    assert res.p_value < 0.05
+    assert res.meta["ratio"]["diff"] > 0
+
+
+def test_engine_user_level_ratio_segments_match_per_segment_runs():
+    rng = np.random.default_rng(3)
+    xa, ya = _sessions_revenue(rng, 3000)
+    xb, yb = _sessions_revenue(rng, 3000, lift=1.1)
+    df = pd.DataFrame(
+        {
+            "group": ["A"] * 3000 + ["B"] * 3000,
+            "numerator": np.concatenate([xa, xb]),
+            "denominator": np.concatenate([ya, yb]),
+            "country": rng.choice(["de", "fr", "us"], 6000),
+        }
+    )
+    cfg = AnalysisConfig(alpha=0.05, metric_type="ratio", segments=["country"])
+    res = analyze_groups(df, cfg)
+    assert [s["segment"]["val"] for s in res.segments] == ["de", "fr", "us"]
+    for seg in res.segments:
+        sdf = df[df["country"] == seg["segment"]["val"]]
+        single = analyze_groups(sdf, AnalysisConfig(alpha=0.05, metric_type="ratio"))
+        assert seg["p_raw"] == pytest.approx(single.p_value)
+        assert seg["effect"] == pytest.approx(single.effect)
+        assert seg["n"] == len(sdf)
+        assert seg["p_adj"] >= seg["p_raw"]
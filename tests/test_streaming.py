@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from abtest_core.engine import analyze_groups
+from abtest_core.streaming import StreamingAnalyzer, analyze_chunks
+from abtest_core.types import AnalysisConfig, DataSchema
+from abtest_core.validation import ValidationError
+
+
+def _frame(seed=0, n=6000):
+    rng = np.random.default_rng(seed)
+    grp = np.where(rng.random(n) < 0.5, "A", "B").astype(object)
+    pre = rng.normal(10, 2, n)
+    metric = 0.8 * pre + rng.normal(0, 1, n) + 0.1 * (grp == "B")
+    pre[rng.random(n) < 0.05] = np.nan
+    return pd.DataFrame(
+        {
+            "variant": grp,
+            "value": metric,
+            "pre": pre,
+            "converted": (rng.random(n) < 0.1 + 0.02 * (grp == "B")).astype(int),
+            "num": rng.gamma(2.0, 3.0, n),
+            "den": rng.integers(1, 5, n),
+            "os": rng.choice(["android", "ios", "web"], n),
+        }
+    )
+
+
+def _chunks(df, size=777):
+    return [df.iloc[i : i + size] for i in range(0, len(df), size)]
+
+
+def _engine(df, schema, cfg):
+    names = {schema.group_col: "group", schema.metric_col: "metric",
+             schema.numerator_col: "numerator", schema.denominator_col: "denominator"}
+    return analyze_groups(df.rename(columns={k: v for k, v in names.items() if k}), cfg)
+
+
+@pytest.mark.parametrize(
+    "schema,cfg",
+    [
+        (DataSchema(group_col="variant", metric_col="converted"), AnalysisConfig(alpha=0.05, metric_type="binomial")),
+        (DataSchema(group_col="variant", metric_col="value"), AnalysisConfig(alpha=0.05, metric_type="continuous")),
+        (
+            DataSchema(group_col="variant", metric_col="value"),
+            AnalysisConfig(alpha=0.05, metric_type="continuous", use_cuped=True, preperiod_metric_col="pre",
+                           segments=["os"]),
+        ),
+        (
+            DataSchema(group_col="variant", metric_col="value"),
+            AnalysisConfig(alpha=0.05, metric_type="ratio", use_cuped=True, preperiod_metric_col="pre"),
+        ),
+        (
+            DataSchema(group_col="variant", numerator_col="num", denominator_col="den"),
+            AnalysisConfig(alpha=0.05, metric_type="ratio", segments=["os"], multiple_testing="bh"),
+        ),
+    ],
+)
+def test_chunked_analysis_matches_engine(schema, cfg):
+    df = _frame()
+    got = analyze_chunks(_chunks(df), schema, cfg)
+    expected = _engine(df, schema, cfg)
+    assert got.p_value == pytest.approx(expected.p_value, rel=1e-9)
+    assert got.effect == pytest.approx(expected.effect, rel=1e-9)
+    assert got.ci == pytest.approx(expected.ci, rel=1e-9)
+    assert got.method_notes == expected.method_notes
+    if cfg.segments:
+        assert [s["segment"] for s in got.segments] == [s["segment"] for s in expected.segments]
+        assert [s["p_adj"] for s in got.segments] == pytest.approx([s["p_adj"] for s in expected.segments])
+        assert [s["n"] for s in got.segments] == [s["n"] for s in expected.segments]
+
+
+def test_quantile_close_to_engine():
+    df = _frame()
+    schema = DataSchema(group_col="variant", metric_col="value")
+    cfg = AnalysisConfig(alpha=0.05, metric_type="quantile", quantile=0.9)
+    got = analyze_chunks(_chunks(df), schema, cfg)
+    expected = _engine(df, schema, cfg)
+    assert got.meta["quantile"]["value_a"] == pytest.approx(expected.meta["quantile"]["value_a"], rel=0.02)
+    assert got.effect == pytest.approx(expected.effect, abs=0.1)
+
+
+def test_columns_and_group_order():
+    schema = DataSchema(group_col="variant", metric_col="value", preperiod_metric_col="pre")
+    cfg = AnalysisConfig(alpha=0.05, metric_type="continuous", use_cuped=True, segments=["os"])
+    analyzer = StreamingAnalyzer(schema, cfg)
+    assert analyzer.columns == ["variant", "value", "pre", "os"]
+    df = _frame()
+    analyzer.update(df.iloc[:1]).update(df.iloc[1:])
+    assert analyzer.groups == list(df["variant"].unique())
+    assert analyzer.result().meta["rows"] == len(df)
+
+
+def test_rejects_options_needing_raw_rows():
+    schema = DataSchema(group_col="variant", metric_col="value")
+    with pytest.raises(ValidationError) as err:
+        StreamingAnalyzer(schema, AnalysisConfig(alpha=0.05, metric_type="continuous", bootstrap=True))
+    assert err.value.code == "unsupported_streaming_option"
+
+
+def test_more_than_two_groups():
+    df = _frame().assign(variant=lambda d: np.where(np.arange(len(d)) % 3 == 0, "C", d["variant"]))
+    schema = DataSchema(group_col="variant", metric_col="value")
+    with pytest.raises(ValueError):
+        analyze_chunks(_chunks(df), schema, AnalysisConfig(alpha=0.05, metric_type="continuous"))
@@ -0,0 +1,73 @@
+import os
+import sys
+import threading
+from concurrent.futures import CancelledError
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from abtest_core.utils import check_cancelled
+from ui.tasks import TaskRunner
+
+
+def test_results_progress_and_errors_are_delivered():
+    runner = TaskRunner()
+    got, progress, errors = [], [], []
+
+    def work(cancel, report):
+        report(1, 2)
+        report(2, 2)
+        return 42
+
+    runner.submit("k", work, got.append, errors.append, lambda d, t: progress.append((d, t)))
+    runner.submit("k", lambda c, p: 1 / 0, got.append, errors.append)
+    assert got == [42] and progress == [(1, 2), (2, 2)]
+    assert isinstance(errors[0], ZeroDivisionError) and runner.running() == []
+
+
+def test_superseded_result_is_discarded():
+    runner = TaskRunner()
+    got = []
+    tokens = []
+
+    def outer(cancel, report):
+        tokens.append(cancel)
+        runner.submit("k", lambda c, p: "new", got.append)
+        return "stale"
+
+    runner.submit("k", outer, got.append)
+    runner.submit("other", lambda c, p: "independent", got.append)
+    assert got == ["new", "independent"]
+    assert tokens[0].is_set()
+
+
+def test_cancelled_task_reports_nothing():
+    runner = TaskRunner()
+    got, errors = [], []
+
+    def work(cancel, report):
+        runner.cancel("k")
+        check_cancelled(cancel)
+        return "done"
+
+    runner.submit("k", work, got.append, errors.append)
+    assert got == [] and errors == [] and runner.running() == []
+
+
+def test_long_loops_honour_cancel_tokens():
+    from abtest_core.stats_continuous import bootstrap_bca_ci
+    from stats.ab_test import run_aa_simulation
+
+    steps = []
+    fpr = run_aa_simulation(0.1, 2000, 0.05, num_sim=1000, progress=lambda d, t: steps.append(d))
+    assert 0 <= fpr <= 0.2 and steps == [250, 500, 750, 1000]
+    with pytest.raises(ValueError):
+        run_aa_simulation(0.1, 2000, 0.05, num_sim=0)
+
+    cancel = threading.Event()
+    cancel.set()
+    with pytest.raises(CancelledError):
+        run_aa_simulation(0.1, 2000, 0.05, cancel=cancel)
+    with pytest.raises(CancelledError):
+        bootstrap_bca_ci([1.0, 2.0, 3.0], [2.0, 3.0, 4.0], lambda a, b: b.mean() - a.mean(), cancel=cancel)
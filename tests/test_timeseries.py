@@ -0,0 +1,97 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+
+from abtest_core.sequential import make_plan, sequential_test
+from abtest_core.stats_binomial import prop_diff_test
+from abtest_core.stats_continuous import welch_ttest
+from abtest_core.timeseries import cumulative_series
+
+
+def _daily(days=20, seed=3):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for d in range(days):
+        for group, p, mu in (("A", 0.10, 1.0), ("B", 0.13, 1.1)):
+            n = int(rng.integers(50, 300))
+            values = rng.normal(mu, 1.0, n)
+            rows.append(
+                {
+                    "date": pd.Timestamp("2024-03-01") + pd.Timedelta(days=d),
+                    "group": group,
+                    "users": n,
+                    "conversions": int(rng.binomial(n, p)),
+                    "revenue": values.sum(),
+                    "revenue_sq": (values ** 2).sum(),
+                }
+            )
+    # shuffled input and a split day exercise the scatter onto the date axis
+    df = pd.DataFrame(rows).sample(frac=1, random_state=0)
+    extra = df.iloc[[0]].assign(users=10, conversions=1, revenue=5.0, revenue_sq=4.0)
+    return pd.concat([df, extra], ignore_index=True)
+
+
+def _prefix(df, date):
+    return df[df["date"] <= date].groupby("group").sum(numeric_only=True)
+
+
+def test_binary_series_matches_per_prefix_analysis():
+    df = _daily()
+    series = cumulative_series(df, alpha=0.1)
+    assert len(series) == 20 and (series.control, series.treatment) == ("A", "B")
+    for i, date in enumerate(series.dates):
+        pre = _prefix(df, date)
+        ref = prop_diff_test(pre.conversions.A, pre.users.A, pre.conversions.B, pre.users.B, alpha=0.1)
+        assert series.n_control[i] == pre.users.A
+        assert series.p_value[i] == pytest.approx(ref["p_value"])
+        assert series.effect[i] == pytest.approx(ref["effect"])
+        assert (series.ci_low[i], series.ci_high[i]) == pytest.approx(ref["ci"])
+
+
+def test_continuous_series_and_boundaries_match_sequential_test():
+    df = _daily()
+    series = cumulative_series(
+        df, sum_col="revenue", sumsq_col="revenue_sq", preset="pocock", looks=30
+    )
+    for i, date in enumerate(series.dates):
+        pre = _prefix(df, date)
+        m = pre.revenue / pre.users
+        v = (pre.revenue_sq - pre.revenue * m) / (pre.users - 1)
+        ref = welch_ttest(m.A, v.A, pre.users.A, m.B, v.B, pre.users.B)
+        assert series.p_value[i] == pytest.approx(ref["p_value"])
+        assert (series.ci_low[i], series.ci_high[i]) == pytest.approx(ref["ci"])
+
+    plan = make_plan(30, 0.05, "pocock")
+    assert list(series.threshold) == pytest.approx(plan["thresholds"][:20])
+    ref = sequential_test(list(series.p_value), plan)
+    assert series.stop_look == (ref["look"] if ref["stop"] else None)
+    # the effect-scale bound rejects exactly where the p-value does
+    assert np.array_equal(series.stopped, np.abs(series.effect) >= series.bound)
+
+    frame = series.to_frame()
+    assert list(frame["date"]) == list(series.dates) and frame["stopped"].dtype == bool
+
+
+def test_series_waits_for_both_groups_and_validates_input():
+    df = pd.DataFrame(
+        {
+            "date": ["d1", "d1", "d2", "d3"],
+            "group": ["A", "A", "B", "B"],
+            "users": [100, 50, 120, 80],
+            "conversions": [10, 5, 18, 9],
+        }
+    )
+    series = cumulative_series(df)
+    assert list(series.n_control) == [150, 150, 150]
+    assert np.isnan(series.p_value[0]) and not np.isnan(series.p_value[1])
+    assert series.mean_control[0] == pytest.approx(0.1)
+    with pytest.raises(ValueError):
+        cumulative_series(df, treatment="C")
+    with pytest.raises(ValueError):
+        cumulative_series(df, looks=2)
@@ -160,6 +160,8 @@ def test_ui_renders_bayes(monkeypatch):
         prior_beta_spin = types.SimpleNamespace(value=lambda: 1.0)
         results_text = types.SimpleNamespace(setHtml=lambda html: called.setdefault('html', html))
         _add_history = lambda *a, **k: None
+        _tasks = ui_mainwindow.TaskRunner()
+        _run_task = ui_mainwindow.ABTestWindow._run_task
 
     monkeypatch.setattr(ui_mainwindow, 'bayesian_analysis', lambda *a, **k: (0.6, [], [], []))
     monkeypatch.setattr(ui_mainwindow, 'plot_bayesian_posterior', lambda *a, **k: 'fig')
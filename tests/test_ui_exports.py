@@ -234,11 +234,51 @@ def test_analyze_abn_triggers_srm(monkeypatch):
         results_text=types.SimpleNamespace(setHtml=lambda x: None),
         _add_history=lambda *a, **k: None,
     )
+    dummy._tasks = ui_mainwindow.TaskRunner()
+    dummy._run_task = types.MethodType(ABTestWindow._run_task, dummy)
 
     ABTestWindow._on_analyze(dummy)
     assert warned.get('called')
 
 
+def test_analyze_uses_engine_on_cuped_arrays(monkeypatch):
+    monkeypatch.setattr(
+        ui_mainwindow,
+        'srm_check',
+        lambda *a, **k: {'p_value': 1.0, 'passed': True, 'expected': {}, 'observed': {}},
+    )
+    rng = np.random.default_rng(0)
+    pre_a, pre_b = rng.normal(size=500), rng.normal(size=500)
+    recorded = {}
+    dummy = types.SimpleNamespace(
+        users_A_var=types.SimpleNamespace(text=lambda: '500'),
+        conv_A_var=types.SimpleNamespace(text=lambda: '0'),
+        users_B_var=types.SimpleNamespace(text=lambda: '500'),
+        conv_B_var=types.SimpleNamespace(text=lambda: '0'),
+        users_C_var=types.SimpleNamespace(text=lambda: '0'),
+        conv_C_var=types.SimpleNamespace(text=lambda: '0'),
+        alpha_slider=types.SimpleNamespace(value=lambda: 5),
+        results_text=types.SimpleNamespace(setHtml=lambda x: recorded.setdefault('html', x)),
+        _add_history=lambda name, res: recorded.setdefault('res', res),
+        _analyze_cuped_arrays=ABTestWindow._analyze_cuped_arrays,
+        tr=lambda s: s,
+        lang='en',
+        metric_a=pre_a + rng.normal(scale=0.3, size=500),
+        covariate_a=pre_a,
+        metric_b=pre_b + 0.2 + rng.normal(scale=0.3, size=500),
+        covariate_b=pre_b,
+    )
+    dummy._tasks = ui_mainwindow.TaskRunner()
+    dummy._run_task = types.MethodType(ABTestWindow._run_task, dummy)
+
+    ABTestWindow._on_analyze(dummy)
+    res = recorded['res']
+    assert res['n_a'] == 500 and res['n_b'] == 500
+    assert res['p_value_ab'] < 0.05
+    assert res['winner'] == 'B'
+    assert 'CUPED' in res['method_notes']
+
+
 def test_add_data_source_dialog(monkeypatch):
     dlg = ui_mainwindow.AddDataSourceDialog(None)
     dlg.type_combo.currentText = lambda: 'Redshift'
@@ -267,3 +307,49 @@ def test_add_data_source_dialog(monkeypatch):
     assert recorded['sql'] == 'SELECT 1'
 
 
+
+
+def test_result_handlers_share_one_task_key(monkeypatch):
+    monkeypatch.setattr(
+        ui_mainwindow,
+        'srm_check',
+        lambda *a, **k: {'p_value': 1.0, 'passed': True, 'expected': {}, 'observed': {}},
+    )
+    keys = []
+    slider = types.SimpleNamespace(value=lambda: 5)
+    dummy = types.SimpleNamespace(
+        users_A_var=types.SimpleNamespace(text=lambda: '1000'),
+        conv_A_var=types.SimpleNamespace(text=lambda: '100'),
+        users_B_var=types.SimpleNamespace(text=lambda: '1000'),
+        conv_B_var=types.SimpleNamespace(text=lambda: '110'),
+        users_C_var=types.SimpleNamespace(text=lambda: '0'),
+        conv_C_var=types.SimpleNamespace(text=lambda: '0'),
+        alpha_slider=slider,
+        baseline_slider=slider,
+        prior_alpha_spin=types.SimpleNamespace(value=lambda: 1.0),
+        prior_beta_spin=types.SimpleNamespace(value=lambda: 1.0),
+        _config={},
+        tr=lambda s: s,
+        lang='en',
+        _run_task=lambda key, *a, **k: keys.append(key),
+    )
+    for handler in (
+        ABTestWindow._on_analyze,
+        ABTestWindow._on_bayes,
+        ABTestWindow._on_run_aa,
+        ABTestWindow._on_run_sequential,
+        ABTestWindow._on_run_obrien_fleming,
+    ):
+        handler(dummy)
+    assert keys == [ui_mainwindow.RESULTS_TASK] * 5
+
+    # synchronous results cancel a running analysis so it cannot overwrite them
+    runner = ui_mainwindow.TaskRunner()
+    running = types.SimpleNamespace(cancel=types.SimpleNamespace(set=lambda: keys.append('cancelled')))
+    runner._pending[ui_mainwindow.RESULTS_TASK] = running
+    dummy.uplift_slider = dummy.power_slider = types.SimpleNamespace(value=lambda: 80)
+    dummy.results_text = types.SimpleNamespace(setHtml=lambda x: None)
+    dummy._add_history = lambda *a, **k: None
+    dummy._tasks = runner
+    ABTestWindow.calculate_sample_size(dummy)
+    assert keys[-1] == 'cancelled' and not runner.running()
@@ -47,6 +47,18 @@ def test_validate_dataframe_nan_error():
     assert "nan_policy='drop'" in exc.value.fix_hint
 
 
+def test_validate_ratio_schema():
+    df = pd.DataFrame(
+        {"group": ["A", "B", "A"], "revenue": [1.0, None, 3.0], "sessions": [1, 2, 3]}
+    )
+    schema = DataSchema(group_col="group", numerator_col="revenue", denominator_col="sessions")
+    cleaned = validate_dataframe(df, schema, nan_policy="drop")
+    assert len(cleaned) == 2
+    with pytest.raises(ValidationError) as exc:
+        validate_dataframe(df, DataSchema(group_col="group", numerator_col="revenue"))
+    assert exc.value.code == "incomplete_ratio_schema"
+
+
 def test_infer_metric_type():
     df_bin = pd.DataFrame({"metric": [0, 1, 0, 1]})
     assert infer_metric_type(df_bin, "metric") == "binomial"